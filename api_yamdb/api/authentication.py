@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpRequest
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import get_versions
+
+User = get_user_model()
+
+AUTH_VERSION_CLAIM = 'auth_version'
+
+
+def auth_resource(user_id) -> str:
+    """Ресурс версии прав пользователя (см. :obj:`api.cache`)."""
+    return f'auth:{user_id}'
+
+
+def get_auth_version(user_id) -> int:
+    return get_versions((auth_resource(user_id),))[0]
+
+
+def access_token_for(user: User) -> AccessToken:
+    """
+    AccessToken с ролью и флагами администратора пользователя.
+
+    auth_version - версия прав на момент выдачи: после смены роли
+    или удаления пользователя версия меняется, и утверждения
+    токена перестают приниматься без обращения к БД.
+    """
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token[AUTH_VERSION_CLAIM] = get_auth_version(user.pk)
+    return token
+
+
+class UserCache:
+    """
+    Кэш пользователей в памяти процесса: LRU на maxsize записей,
+    запись живёт не дольше ttl секунд.
+
+    Запись действительна только для той версии прав, с которой
+    загружена, поэтому смена роли в другом процессе тоже делает
+    её неактуальной.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version: int) -> User:
+        with self._lock:
+            entry = self._data.get(user_id)
+            if (entry is not None and entry[1] == version
+                    and entry[2] > time.monotonic()):
+                self._data.move_to_end(user_id)
+                return entry[0]
+        user = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        with self._lock:
+            # (пользователь, версия прав, время истечения)
+            self._data[user_id] = (
+                user, version, time.monotonic() + self.ttl
+            )
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id) -> None:
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+user_cache = UserCache(
+    settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL
+)
+
+
+class ClaimsUser(TokenUser):
+    """
+    Пользователь из утверждений токена: роль и флаги администратора
+    берутся из токена, объект User загружается только по требованию.
+    """
+
+    @property
+    def role(self) -> str:
+        return self.token.get('role', User.USER)
+
+    @property
+    def is_admin(self) -> bool:
+        return (
+            self.role == User.ADMIN
+            or self.is_superuser
+            or self.is_staff
+        )
+
+    @property
+    def is_moderator(self) -> bool:
+        return self.role == User.MODERATOR
+
+    def get_user(self) -> User:
+        """Объект User из кэша пользователей процесса."""
+        return user_cache.get(self.id, self.token[AUTH_VERSION_CLAIM])
+
+
+def check_active(user: Optional[User]) -> User:
+    if user is None:
+        raise AuthenticationFailed(
+            'Пользователь не найден', code='user_not_found'
+        )
+    if not user.is_active:
+        raise AuthenticationFailed(
+            'Пользователь неактивен', code='user_inactive'
+        )
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без запроса к БД для чтения.
+
+    Если версия прав в токене совпадает с текущей, request.user -
+    :obj:`ClaimsUser` из утверждений токена. Иначе (роль изменилась,
+    пользователь удалён, токен выдан до появления утверждений)
+    пользователь загружается из БД через :obj:`UserCache`.
+
+    Версии прав хранятся в кэше: другие воркеры видят их смену только
+    с общим кэшем (memcached). Поэтому для небезопасных методов роль
+    и is_active всегда читаются из БД одним запросом по ключу: отзыв
+    прав действует на запись сразу во всех процессах.
+    """
+
+    def authenticate(self, request: HttpRequest):
+        result = super().authenticate(request)
+        if result is None or request.method in SAFE_METHODS:
+            return result
+        user, token = result
+        return check_active(User.objects.filter(
+            **{api_settings.USER_ID_FIELD: token[api_settings.USER_ID_CLAIM]}
+        ).first()), token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит идентификатор пользователя')
+        version = get_auth_version(user_id)
+        if validated_token.get(AUTH_VERSION_CLAIM) == version:
+            return ClaimsUser(validated_token)
+        try:
+            user = user_cache.get(user_id, version)
+        except User.DoesNotExist:
+            user = None
+        return check_active(user)
+
+
+def get_request_user(request: HttpRequest) -> Optional[User]:
+    """Объект User автора запроса, в т.ч. для :obj:`ClaimsUser`."""
+    user = request.user
+    if isinstance(user, ClaimsUser):
+        return user.get_user()
+    return user
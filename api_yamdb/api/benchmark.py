@@ -0,0 +1,365 @@
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from core.models import DeletionJob, EmailOutbox
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from reviews.models import Category, Comment, Genre, Review, Title
+
+from .authentication import access_token_for
+
+User = get_user_model()
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+PERCENTILES = (50, 95, 99)
+
+
+class Endpoint(NamedTuple):
+    """
+    Маршрут нагрузочного теста. path и body - шаблоны с подстановками
+    из :obj:`BenchmarkData.context`, в body также {i} - номер запроса.
+    auth: None - анонимно, 'user' или 'admin'.
+    """
+    name: str
+    method: str
+    path: str
+    auth: Optional[str] = None
+    body: Optional[Union[dict, list]] = None
+
+
+# Все маршруты и методы api/urls.py, кроме удаления: DELETE ставит
+# объекты в очередь фонового удаления и меняет данные следующих
+# маршрутов. Полноту проверяет test_endpoints_cover_urls.
+ENDPOINTS = (
+    Endpoint('api-root', 'GET', '/api/v1/'),
+    Endpoint('categories-list', 'GET', '/api/v1/categories/'),
+    Endpoint('categories-create', 'POST', '/api/v1/categories/', 'admin',
+             {'name': 'Benchmark {i}', 'slug': 'bench-{run}-{i}'}),
+    Endpoint('genres-list', 'GET', '/api/v1/genres/'),
+    Endpoint('genres-create', 'POST', '/api/v1/genres/', 'admin',
+             {'name': 'Benchmark {i}', 'slug': 'bench-{run}-{i}'}),
+    Endpoint('titles-list', 'GET', '/api/v1/titles/'),
+    Endpoint('titles-filter', 'GET',
+             '/api/v1/titles/?genre={genre}&category={category}'),
+    Endpoint('titles-detail', 'GET', '/api/v1/titles/{title}/'),
+    Endpoint('titles-rating-stats', 'GET',
+             '/api/v1/titles/{title}/rating-stats/'),
+    Endpoint('titles-create', 'POST', '/api/v1/titles/', 'admin', {
+        'name': 'Произведение {i}', 'year': 2000,
+        'category': '{category}', 'genre': ['{genre}'],
+    }),
+    Endpoint('titles-batch', 'POST', '/api/v1/titles/batch/', 'admin', [
+        {'name': f'Произведение {{i}}.{n}', 'year': 2000,
+         'category': '{category}', 'genre': ['{genre}']}
+        for n in range(10)
+    ]),
+    Endpoint('titles-update', 'PATCH', '/api/v1/titles/{title}/', 'admin',
+             {'description': 'Описание {i}'}),
+    Endpoint('titles-replace', 'PUT', '/api/v1/titles/{title}/', 'admin', {
+        'name': 'Benchmark {i}', 'year': 2000,
+        'category': '{category}', 'genre': ['{genre}'],
+    }),
+    Endpoint('leaderboards', 'GET', '/api/v1/leaderboards/'),
+    Endpoint('leaderboards-category', 'GET',
+             '/api/v1/leaderboards/categories/{category}/'),
+    Endpoint('leaderboards-genre', 'GET',
+             '/api/v1/leaderboards/genres/{genre}/'),
+    Endpoint('reviews-list', 'GET', '/api/v1/titles/{title}/reviews/'),
+    Endpoint('reviews-detail', 'GET',
+             '/api/v1/titles/{title}/reviews/{review}/'),
+    Endpoint('reviews-create', 'POST',
+             '/api/v1/titles/{write_title}/reviews/', 'user',
+             {'text': 'Отзыв {i}', 'score': 7}),
+    Endpoint('reviews-update', 'PATCH',
+             '/api/v1/titles/{title}/reviews/{review}/', 'admin',
+             {'text': 'Отзыв {i}'}),
+    Endpoint('reviews-replace', 'PUT',
+             '/api/v1/titles/{title}/reviews/{review}/', 'admin',
+             {'text': 'Отзыв {i}', 'score': 5}),
+    Endpoint('comments-list', 'GET',
+             '/api/v1/titles/{title}/reviews/{review}/comments/'),
+    Endpoint('comments-detail', 'GET',
+             '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/'),
+    Endpoint('comments-create', 'POST',
+             '/api/v1/titles/{title}/reviews/{review}/comments/', 'user',
+             {'text': 'Комментарий {i}'}),
+    Endpoint('comments-update', 'PATCH',
+             '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/',
+             'admin', {'text': 'Комментарий {i}'}),
+    Endpoint('comments-replace', 'PUT',
+             '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/',
+             'admin', {'text': 'Комментарий {i}'}),
+    Endpoint('users-me', 'GET', '/api/v1/users/me/', 'user'),
+    Endpoint('users-me-update', 'PATCH', '/api/v1/users/me/', 'user',
+             {'bio': 'Биография {i}'}),
+    Endpoint('users-list', 'GET', '/api/v1/users/', 'admin'),
+    Endpoint('users-create', 'POST', '/api/v1/users/', 'admin',
+             {'username': 'bench_{run}_created_{i}',
+              'email': 'bench_{run}_created_{i}@benchmark.local'}),
+    Endpoint('users-detail', 'GET', '/api/v1/users/{username}/', 'admin'),
+    Endpoint('users-update', 'PATCH', '/api/v1/users/{username}/', 'admin',
+             {'first_name': 'Имя {i}'}),
+    Endpoint('users-replace', 'PUT', '/api/v1/users/{username}/', 'admin',
+             {'username': '{username}', 'email': '{email}',
+              'bio': 'Биография {i}'}),
+    Endpoint('deletions-list', 'GET', '/api/v1/deletions/', 'admin'),
+    Endpoint('deletions-detail', 'GET', '/api/v1/deletions/{deletion}/',
+             'admin'),
+    Endpoint('metrics', 'GET', '/api/v1/metrics/', 'admin'),
+    Endpoint('slow-queries', 'GET', '/api/v1/slow-queries/', 'admin'),
+    Endpoint('signup', 'POST', '/api/v1/auth/signup/', None,
+             {'username': 'bench_{run}_signup_{i}',
+              'email': 'bench_{run}_signup_{i}@benchmark.local'}),
+    Endpoint('token', 'POST', '/api/v1/auth/token/', None,
+             {'username': '{username}',
+              'confirmation_code': '{confirmation_code}'}),
+)
+
+
+class BenchmarkData:
+    """
+    Объекты нагрузочного теста в БД сервера: категория, жанр,
+    произведение с отзывом и комментарием, пользователь, администратор
+    и выполненная задача удаления (для deletions-detail).
+    Для reviews-create - по произведению на запрос (один отзыв автора
+    на произведение). Имена содержат id прогона, cleanup удаляет всё
+    созданное, в том числе запросами теста.
+    """
+
+    def __init__(self, writes: int):
+        self.run = uuid.uuid4().hex[:8]
+        self.writes = writes
+        self.context = {}
+
+    def create(self) -> dict:
+        run = self.run
+        category = Category.objects.create(
+            name=f'Benchmark {run}', slug=f'bench-{run}'
+        )
+        genre = Genre.objects.create(
+            name=f'Benchmark {run}', slug=f'bench-{run}'
+        )
+        user, admin = (
+            User.objects.create(
+                username=f'bench_{run}_{role}', role=role,
+                email=f'bench_{run}_{role}@benchmark.local',
+            )
+            for role in (User.USER, User.ADMIN)
+        )
+        Title.objects.bulk_create(
+            Title(name=f'Benchmark {i}', year=2000, category=category)
+            for i in range(self.writes + 1)
+        )
+        titles = list(
+            Title.objects.filter(category=category).order_by('pk')
+        )
+        titles[0].genre.add(genre)
+        review = Review.objects.create(
+            title=titles[0], author=admin, text='Отзыв', score=5
+        )
+        comment = Comment.objects.create(
+            review=review, author=admin, text='Комментарий'
+        )
+        deletion = DeletionJob.objects.create(
+            model='reviews.category', object_id=category.pk,
+            object_repr=f'Benchmark {run}', status=DeletionJob.DONE,
+        )
+        self.context = {
+            'run': run,
+            'category': category.slug,
+            'genre': genre.slug,
+            'title': titles[0].pk,
+            'write_titles': [title.pk for title in titles[1:]],
+            'review': review.pk,
+            'comment': comment.pk,
+            'deletion': deletion.pk,
+            'username': user.username,
+            'email': user.email,
+            'confirmation_code': default_token_generator.make_token(user),
+            'tokens': {
+                'user': str(access_token_for(user)),
+                'admin': str(access_token_for(admin)),
+            },
+        }
+        return self.context
+
+    def cleanup(self) -> None:
+        Title.objects.filter(category__slug=f'bench-{self.run}').delete()
+        User.objects.filter(username__startswith=f'bench_{self.run}_').delete()
+        Category.objects.filter(slug__startswith=f'bench-{self.run}').delete()
+        Genre.objects.filter(slug__startswith=f'bench-{self.run}').delete()
+        DeletionJob.objects.filter(
+            object_repr=f'Benchmark {self.run}'
+        ).delete()
+        EmailOutbox.objects.filter(
+            recipients__contains=f'bench_{self.run}_'
+        ).delete()
+
+
+def render(template, context: dict, i: int):
+    """Подстановка context и номера запроса в шаблон пути или тела."""
+    if isinstance(template, str):
+        values = dict(context, i=i)
+        if context.get('write_titles'):
+            values['write_title'] = context['write_titles'][
+                i % len(context['write_titles'])
+            ]
+        return template.format(**values)
+    if isinstance(template, list):
+        return [render(item, context, i) for item in template]
+    if isinstance(template, dict):
+        return {key: render(value, context, i)
+                for key, value in template.items()}
+    return template
+
+
+class Result(NamedTuple):
+    status: int
+    latency: float
+    queries: Optional[int]
+
+
+def send(base_url: str, endpoint: Endpoint, context: dict, i: int,
+         timeout: float) -> Result:
+    headers = {}
+    data = None
+    if endpoint.body is not None:
+        data = json.dumps(render(endpoint.body, context, i)).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    if endpoint.auth is not None:
+        headers['Authorization'] = f'Bearer {context["tokens"][endpoint.auth]}'
+    request = Request(
+        base_url + render(endpoint.path, context, i),
+        data=data, headers=headers, method=endpoint.method,
+    )
+    started = time.perf_counter()
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            response.read()
+            status, server_timing = (
+                response.status, response.headers.get('Server-Timing', '')
+            )
+    except HTTPError as error:
+        error.read()
+        status, server_timing = (
+            error.code, error.headers.get('Server-Timing', '')
+        )
+    except (URLError, OSError):
+        status, server_timing = 0, ''
+    latency = time.perf_counter() - started
+    match = QUERIES_RE.search(server_timing)
+    return Result(status, latency, int(match.group(1)) if match else None)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Перцентиль по методу ближайшего ранга, values отсортированы."""
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(endpoint: Endpoint, results: List[Result],
+              elapsed: float) -> dict:
+    latencies = sorted(result.latency * 1000 for result in results)
+    queries = [result.queries for result in results
+               if result.queries is not None]
+    summary = {
+        'method': endpoint.method,
+        'path': endpoint.path,
+        'requests': len(results),
+        'errors': sum(
+            not 200 <= result.status < 400 for result in results
+        ),
+        'statuses': {
+            str(status): count for status, count in sorted(
+                Counter(result.status for result in results).items()
+            )
+        },
+        'throughput': round(len(results) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3),
+            **{f'p{percent}': round(percentile(latencies, percent), 3)
+               for percent in PERCENTILES},
+            'max': round(latencies[-1], 3),
+        },
+        'queries': None,
+    }
+    if queries:
+        summary['queries'] = {
+            'mean': round(sum(queries) / len(queries), 2),
+            'max': max(queries),
+        }
+    return summary
+
+
+def run_endpoint(base_url: str, endpoint: Endpoint, context: dict,
+                 requests: int, concurrency: int,
+                 timeout: float = 30) -> dict:
+    """requests запросов к endpoint в concurrency потоков."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        results = list(executor.map(
+            lambda i: send(base_url, endpoint, context, i, timeout),
+            range(requests),
+        ))
+        elapsed = time.perf_counter() - started
+    return summarize(endpoint, results, elapsed)
+
+
+def run_benchmark(base_url: str, endpoints: List[Endpoint], context: dict,
+                  requests: int, concurrency: int,
+                  progress: Callable[[str, dict], None] = None
+                  ) -> Dict[str, dict]:
+    report = {}
+    for endpoint in endpoints:
+        report[endpoint.name] = run_endpoint(
+            base_url, endpoint, context, requests, concurrency
+        )
+        if progress is not None:
+            progress(endpoint.name, report[endpoint.name])
+    return report
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServer:
+    """
+    Сервер приложения в потоке текущего процесса на свободном порту
+    127.0.0.1, как runserver: поток на запрос.
+    """
+
+    def __init__(self):
+        self.server = None
+        self.thread = None
+
+    def __enter__(self) -> str:
+        if '127.0.0.1' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, '127.0.0.1']
+        self.server = ThreadedWSGIServer(
+            ('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False
+        )
+        self.server.set_app(get_wsgi_application())
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
@@ -0,0 +1,231 @@
+import hashlib
+import time
+from typing import Iterable, Optional, Tuple
+
+from core.routers import get_replica, use_primary
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+VERSION_PREFIX = 'yamdb:version:'
+MODIFIED_PREFIX = 'yamdb:modified:'
+RESPONSE_PREFIX = 'yamdb:response:'
+STATS_PREFIX = 'yamdb:stats:'
+STATS_INDEX = f'{STATS_PREFIX}views'
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def resource_state(resources: Iterable[str]) -> Tuple[list, int]:
+    """
+    Версии ресурсов и время последнего изменения любого из них в мс.
+
+    Версия - счётчик изменений ресурса, от него зависят ключи ответов
+    и ETag. Отсутствующий (новый или вытесненный) счётчик
+    инициализируется текущим временем в мс, поэтому не совпадает
+    с прежними значениями и не оживляет устаревшие ключи.
+    """
+    cache = get_cache()
+    resources = list(resources)
+    keys = [f'{VERSION_PREFIX}{resource}' for resource in resources]
+    modified_keys = [f'{MODIFIED_PREFIX}{resource}' for resource in resources]
+    values = cache.get_many(keys + modified_keys)
+    now = now_ms()
+    for key in keys + modified_keys:
+        if key not in values:
+            cache.add(key, now, timeout=None)
+            values[key] = cache.get(key, now)
+    return (
+        [values[key] for key in keys],
+        max((values[key] for key in modified_keys), default=now),
+    )
+
+
+def get_versions(resources: Iterable[str]) -> list:
+    """Текущие версии ресурсов (см. :obj:`resource_state`)."""
+    return resource_state(resources)[0]
+
+
+def bump_versions(*resources: str) -> None:
+    """
+    Обновляет версии ресурсов.
+
+    Версия увеличивается атомарным cache.incr (в memcached), поэтому
+    одновременные изменения не теряются; время изменения записывается
+    рядом и нужно только для Last-Modified и задержки реплик.
+    Внутри транзакции версии обновляются ещё раз после фиксации:
+    иначе ответ, прочитанный до COMMIT, попал бы в кэш под новой
+    версией.
+    """
+    keys = [f'{VERSION_PREFIX}{resource}' for resource in resources]
+    modified_keys = [f'{MODIFIED_PREFIX}{resource}' for resource in resources]
+
+    def bump():
+        cache = get_cache()
+        now = now_ms()
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                if not cache.add(key, now, timeout=None):
+                    cache.incr(key)
+        cache.set_many({key: now for key in modified_keys}, timeout=None)
+    bump()
+    if connection.in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def increment_stat(view_name: str, result: str) -> None:
+    """Счётчик попаданий (hit) и промахов (miss) кэша по view."""
+    cache = get_cache()
+    key = f'{STATS_PREFIX}{view_name}:{result}'
+    if cache.add(key, 1, timeout=None):
+        views = cache.get(STATS_INDEX, set())
+        views.add(view_name)
+        cache.set(STATS_INDEX, views, timeout=None)
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_stats() -> dict:
+    """Счётчики hit/miss по каждому view."""
+    cache = get_cache()
+    views = sorted(cache.get(STATS_INDEX, set()))
+    counters = cache.get_many(
+        f'{STATS_PREFIX}{view}:{result}'
+        for view in views for result in ('hit', 'miss')
+    )
+    return {
+        view: {
+            result: counters.get(f'{STATS_PREFIX}{view}:{result}', 0)
+            for result in ('hit', 'miss')
+        }
+        for view in views
+    }
+
+
+class ResponseCacheMixin:
+    """
+    Кэширование и условные GET-запросы (ETag, Last-Modified).
+
+    Ответ зависит от версий ресурсов из cache_versions
+    ({action: (ресурс, ...)}), в именах ресурсов допустимы
+    подстановки из kwargs URL: 'reviews:{title_id}'. Версии
+    обновляются сигналами моделей (см. api.signals), поэтому запись
+    делает неактуальными только зависящие от неё ответы.
+
+    ETag и Last-Modified вычисляются по версиям без обращения к БД:
+    на If-None-Match/If-Modified-Since отвечаем 304 без запроса
+    и сериализации. Ответы анонимным пользователям кэшируются,
+    ключ включает полный URL запроса и версии ресурсов.
+    """
+    cache_versions = {}
+
+    def get_etag(self, request: HttpRequest, versions: list) -> str:
+        """ETag представления: версии ресурсов, URL и формат ответа."""
+        url = request.get_full_path()
+        renderer = getattr(request, 'accepted_renderer', None)
+        media_type = renderer.media_type if renderer else ''
+        versions = '.'.join(str(value) for value in versions)
+        digest = hashlib.md5(
+            f'{self.basename}:{self.action}:{versions}:{url}:{media_type}'
+            .encode('utf-8')
+        ).hexdigest()
+        return f'"{digest}"'
+
+    def get_cache_key(self, request: HttpRequest,
+                      versions: list) -> Optional[str]:
+        if (not settings.RESPONSE_CACHE_TIMEOUT
+                or request.user.is_authenticated):
+            return None
+        url = hashlib.md5(
+            request.build_absolute_uri().encode('utf-8')
+        ).hexdigest()
+        version = '.'.join(str(value) for value in versions)
+        view = f'{self.basename}:{self.action}'
+        return f'{RESPONSE_PREFIX}{view}:{version}:{url}'
+
+    def cached(self, handler, request: HttpRequest, *args,
+               **kwargs) -> HttpResponse:
+        resources = self.cache_versions.get(self.action)
+        if resources is None:
+            return handler(request, *args, **kwargs)
+        versions, modified = resource_state(
+            resource.format(**self.kwargs) for resource in resources
+        )
+        now = now_ms()
+        if (get_replica() is not None
+                and now - modified < settings.DATABASE_REPLICA_LAG * 1000):
+            # Реплика могла ещё не получить изменение: иначе устаревший
+            # ответ попал бы в кэш и получил ETag новой версии.
+            use_primary()
+        etag = self.get_etag(request, versions)
+        # Last-Modified с точностью до секунды: пока секунда изменения
+        # не прошла, в неё возможно ещё одно изменение, и
+        # If-Modified-Since вернул бы устаревший 304. До тех пор
+        # проверяется только ETag.
+        last_modified = modified // 1000
+        if last_modified >= now // 1000:
+            last_modified = None
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is None:
+            response = self.cached_response(
+                handler, request, versions, *args, **kwargs
+            )
+        else:
+            response = not_modified
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def cached_response(self, handler, request: HttpRequest, versions: list,
+                        *args, **kwargs) -> HttpResponse:
+        key = self.get_cache_key(request, versions)
+        if key is None:
+            return handler(request, *args, **kwargs)
+        view_name = f'{self.basename}-{self.action}'
+        cached = get_cache().get(key)
+        if cached is not None:
+            increment_stat(view_name, 'hit')
+            response = Response(cached)
+            response['X-Cache'] = 'HIT'
+            return response
+        increment_stat(view_name, 'miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            get_cache().set(
+                key, response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedListMixin(ResponseCacheMixin):
+    """Кэширование ответов list."""
+
+    def list(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return self.cached(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(ResponseCacheMixin):
+    """Кэширование ответов retrieve."""
+
+    def retrieve(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return self.cached(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,62 @@
+from functools import partial
+from typing import Tuple
+
+from core.deletion import delete_chunk, register, update_chunk
+from django.contrib.auth import get_user_model
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, TitleRank)
+
+from .cache import bump_versions
+
+User = get_user_model()
+
+# Ресурсы кэша, которые меняются, когда объект скрывается в очереди
+# на удаление или снова показывается после ошибки задачи.
+DELETION_VERSIONS = {
+    Category: ('category',),
+    Genre: ('genre',),
+}
+
+
+def clear_category(category: Category, batch_size: int) -> Tuple[int, int]:
+    """SET_NULL пачки произведений категории (update без сигналов)."""
+    ids = update_chunk(
+        Title.objects.filter(category=category), batch_size, category=None
+    )
+    if ids:
+        bump_versions('title', *(f'title:{pk}' for pk in ids))
+    return 0, len(ids)
+
+
+def scope_ranks(scope: str, scope_id: int):
+    return TitleRank.objects.filter(scope=scope, scope_id=scope_id)
+
+
+@register(Category)
+def category_plan(category: Category) -> tuple:
+    """Рейтинг категории, затем SET_NULL её произведений."""
+    return (
+        partial(delete_chunk, scope_ranks(TitleRank.CATEGORY, category.pk)),
+        partial(clear_category, category),
+    )
+
+
+@register(Genre)
+def genre_plan(genre: Genre) -> tuple:
+    return (
+        partial(delete_chunk, scope_ranks(TitleRank.GENRE, genre.pk)),
+        partial(delete_chunk, GenreTitle.objects.filter(genre=genre)),
+    )
+
+
+@register(User)
+def user_plan(user: User) -> tuple:
+    """
+    Комментарии пользователя, комментарии к его отзывам, затем
+    отзывы: сигналы удаления отзывов пересчитывают рейтинг.
+    """
+    return (
+        partial(delete_chunk, Comment.objects.filter(author=user)),
+        partial(delete_chunk, Comment.objects.filter(review__author=user)),
+        partial(delete_chunk, Review.objects.filter(author=user)),
+    )
@@ -0,0 +1,201 @@
+from collections import defaultdict
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from core.metrics import time_serialization
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models.query import QuerySet
+from django.http import HttpRequest, HttpResponse
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Поля DRF, представление которых совпадает со значением из БД.
+# BooleanField сюда не входит: SQLite возвращает 0/1.
+RAW_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.SlugRelatedField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+# Вычисляемые поля: {имя поля: ((колонки, ...), функция колонок)}.
+Computed = Dict[str, Tuple[Tuple[str, ...], Callable]]
+
+
+def convert(getter: Callable, field: serializers.Field) -> Callable:
+    """Значение колонки через to_representation, None как есть."""
+    to_representation = field.to_representation
+
+    def get(row):
+        value = getter(row)
+        return None if value is None else to_representation(value)
+    return get
+
+
+class ValuesRepresentation:
+    """
+    Представление сериалайзера, собранное из строк values_list().
+
+    Поля сериалайзера один раз сопоставляются колонкам запроса:
+    поля модели, SlugRelatedField и PrimaryKeyRelatedField -
+    колонки (с JOIN по внешнему ключу), вложенный сериалайзер
+    внешнего ключа - его колонки, вложенный сериалайзер many=True
+    по ManyToManyField - один запрос к промежуточной таблице на
+    страницу. Порядок ключей и форматирование значений те же, что у
+    сериалайзера: для полей не из RAW_FIELDS вызывается их
+    to_representation.
+    """
+
+    def __init__(self, serializer_class, computed: Computed = None):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.computed = computed or {}
+        self.columns = []
+        self.many = []
+        self.plan = self.build(serializer, self.model, '')
+        self.pk_index = self.column(self.model._meta.pk.attname)
+
+    def column(self, path: str) -> int:
+        if path not in self.columns:
+            self.columns.append(path)
+        return self.columns.index(path)
+
+    def build(self, serializer, model, prefix: str) -> List[tuple]:
+        plan = []
+        for key, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if not prefix and key in self.computed:
+                plan.append((key, self.build_computed(key, field)))
+            elif isinstance(field, serializers.ListSerializer):
+                plan.append((key, self.build_many(key, field, model)))
+            elif isinstance(field, serializers.BaseSerializer):
+                plan.append((key, self.build_nested(field, model, prefix)))
+            else:
+                plan.append((key, self.build_field(field, model, prefix)))
+        return plan
+
+    def build_field(self, field, model, prefix: str) -> Callable:
+        if isinstance(field, serializers.SlugRelatedField):
+            path = f'{field.source}__{field.slug_field}'
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            path = model._meta.get_field(field.source).attname
+        elif isinstance(field, serializers.ModelField) or (
+                field.source in {f.name for f in model._meta.fields}):
+            path = field.source
+        else:
+            raise ImproperlyConfigured(
+                f'{model.__name__}.{field.source}: нет колонки для поля '
+                f'{field.field_name}, укажите его в fast_computed'
+            )
+        getter = itemgetter(self.column(f'{prefix}{path}'))
+        if isinstance(field, RAW_FIELDS):
+            return getter
+        return convert(getter, field)
+
+    def build_nested(self, field, model, prefix: str) -> Callable:
+        foreign_key = model._meta.get_field(field.source)
+        null_index = self.column(f'{prefix}{foreign_key.attname}')
+        plan = self.build(
+            field, foreign_key.related_model, f'{prefix}{field.source}__'
+        )
+
+        def get(row):
+            if row[null_index] is None:
+                return None
+            return {key: getter(row) for key, getter in plan}
+        return get
+
+    def build_many(self, key: str, field, model) -> Callable:
+        """Место поля в ответе; значения подставляет :meth:`render`."""
+        self.many.append(
+            (key, model._meta.get_field(field.source),
+             ValuesRepresentation(type(field.child)))
+        )
+        return lambda row: None
+
+    def build_computed(self, key: str, field) -> Callable:
+        columns, function = self.computed[key]
+        indexes = [self.column(column) for column in columns]
+
+        def get(row):
+            return function(*(row[index] for index in indexes))
+        return convert(get, field)
+
+    def values(self, queryset: QuerySet) -> QuerySet:
+        """Запрос списка: те же фильтры и сортировка, только колонки."""
+        return queryset.prefetch_related(None).values_list(
+            *self.columns, named=True
+        )
+
+    @staticmethod
+    def fetch_many(m2m, child, ids: list) -> dict:
+        """Связанные объекты страницы одним запросом: {id: [...]}."""
+        source = m2m.m2m_field_name()
+        target = m2m.m2m_reverse_field_name()
+        rows = m2m.remote_field.through._default_manager.filter(
+            **{f'{source}__in': ids}
+        ).order_by(f'{target}_id').values_list(
+            f'{source}_id',
+            *(f'{target}__{column}' for column in child.columns),
+        )
+        related = defaultdict(list)
+        for row in rows:
+            related[row[0]].append(child.render_row(row[1:]))
+        return related
+
+    def render_row(self, row) -> dict:
+        return {key: getter(row) for key, getter in self.plan}
+
+    def render(self, rows: Iterable) -> list:
+        rows = list(rows)
+        data = [self.render_row(row) for row in rows]
+        if self.many:
+            ids = [row[self.pk_index] for row in rows]
+            for key, m2m, child in self.many:
+                related = self.fetch_many(m2m, child, ids)
+                for row_id, item in zip(ids, data):
+                    item[key] = related.get(row_id, [])
+        return data
+
+
+_representations = {}
+
+
+def get_representation(serializer_class,
+                       computed: Computed = None) -> ValuesRepresentation:
+    """ValuesRepresentation сериалайзера, строится один раз."""
+    if serializer_class not in _representations:
+        _representations[serializer_class] = ValuesRepresentation(
+            serializer_class, computed
+        )
+    return _representations[serializer_class]
+
+
+class FastListMixin:
+    """
+    Быстрый list: строки values_list() вместо объектов моделей.
+
+    JSON совпадает с ответом сериалайзера (см.
+    :obj:`ValuesRepresentation`), фильтры и пагинация те же.
+    Отключается настройкой FAST_LIST_SERIALIZATION.
+    Поля-свойства модели описываются в fast_computed.
+    """
+    fast_computed = {}
+
+    def list(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if not settings.FAST_LIST_SERIALIZATION:
+            return super().list(request, *args, **kwargs)
+        representation = get_representation(
+            self.get_serializer_class(), self.fast_computed
+        )
+        rows = representation.values(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(rows)
+        with time_serialization():
+            data = representation.render(rows if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -1,14 +1,92 @@
-from django_filters import CharFilter, FilterSet, NumberFilter
-from reviews.models import Title
+from core.deletion import hide_deleted
+from django.db.models import Count
+from django.db.models.query import QuerySet
+from django_filters import BaseInFilter, CharFilter, FilterSet, NumberFilter
+from reviews.models import Category, Genre, GenreTitle, Title
+from reviews.search import search_titles
+
+
+class SlugInFilter(BaseInFilter, CharFilter):
+    """Фильтр по одному или нескольким slug через запятую."""
 
 
 class TitleFilterSet(FilterSet):
-    """Фильтр произведений по 4-м полям."""
+    """
+    Фильтр произведений по 4-м полям и полнотекстовый поиск.
+
+    category, genre - точное совпадение slug, можно перечислить
+    несколько через запятую (?genre=rock,drama - любой из жанров,
+    ?genre__all=rock,drama - все жанры сразу).
+    Поиск по вхождению: category__icontains, genre__icontains.
+    Категории и жанры в очереди на удаление не совпадают ни с чем.
+    """
     name = CharFilter(field_name='name', lookup_expr='icontains')
-    category = CharFilter(field_name='category__slug', lookup_expr='icontains')
-    genre = CharFilter(field_name='genre__slug', lookup_expr='icontains')
+    category = SlugInFilter(method='filter_category')
+    category__icontains = CharFilter(method='filter_category_icontains')
+    genre = SlugInFilter(method='filter_genre')
+    genre__all = SlugInFilter(method='filter_genre_all')
+    genre__icontains = CharFilter(method='filter_genre_icontains')
     year = NumberFilter(field_name='year', lookup_expr='exact')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'year', 'name')
+
+    @staticmethod
+    def with_categories(queryset: QuerySet, **lookup) -> QuerySet:
+        """Произведения категорий, не поставленных в очередь на удаление."""
+        return queryset.filter(category__in=hide_deleted(
+            Category.objects.filter(**lookup)
+        ))
+
+    def filter_category(self, queryset: QuerySet, name: str,
+                        value: list) -> QuerySet:
+        return self.with_categories(queryset, slug__in=value)
+
+    def filter_category_icontains(self, queryset: QuerySet, name: str,
+                                  value: str) -> QuerySet:
+        return self.with_categories(queryset, slug__icontains=value)
+
+    @staticmethod
+    def with_genres(queryset: QuerySet, genre_titles: QuerySet) -> QuerySet:
+        """
+        Semi-join по связям жанров: id произведений берутся подзапросом,
+        поэтому строки не размножаются и DISTINCT не нужен.
+        """
+        return queryset.filter(pk__in=genre_titles.values('title_id'))
+
+    @staticmethod
+    def genre_titles(**lookup) -> QuerySet:
+        """Связи с жанрами, не поставленными в очередь на удаление."""
+        return GenreTitle.objects.filter(
+            genre__in=hide_deleted(Genre.objects.filter(**lookup))
+        )
+
+    def filter_genre(self, queryset: QuerySet, name: str,
+                     value: list) -> QuerySet:
+        """Произведения хотя бы с одним из жанров."""
+        return self.with_genres(queryset, self.genre_titles(slug__in=value))
+
+    def filter_genre_all(self, queryset: QuerySet, name: str,
+                         value: list) -> QuerySet:
+        """Произведения со всеми перечисленными жанрами."""
+        slugs = set(value)
+        return self.with_genres(
+            queryset,
+            self.genre_titles(slug__in=slugs).values(
+                'title_id'
+            ).annotate(genres=Count('genre_id')).filter(genres=len(slugs))
+        )
+
+    def filter_genre_icontains(self, queryset: QuerySet, name: str,
+                               value: str) -> QuerySet:
+        """Произведения с жанром, slug которого содержит value."""
+        return self.with_genres(
+            queryset, self.genre_titles(slug__icontains=value)
+        )
+
+    def filter_search(self, queryset: QuerySet, name: str,
+                      value: str) -> QuerySet:
+        """Поиск по индексу названий с сортировкой по релевантности."""
+        return search_titles(queryset, value)
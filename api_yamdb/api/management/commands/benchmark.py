@@ -0,0 +1,118 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from ...benchmark import ENDPOINTS, BenchmarkData, LocalServer, run_benchmark
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'), capture_output=True,
+            text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест маршрутов API: пропускная способность, '
+        'p50/p95/p99 задержки и число запросов к БД в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help=('Адрес запущенного сервера с той же БД, по умолчанию '
+                  'сервер запускается в процессе команды'),
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=100,
+            help='Количество запросов к каждому маршруту',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Количество одновременных запросов',
+        )
+        parser.add_argument(
+            '--endpoints',
+            help='Маршруты через запятую: ' + ', '.join(
+                endpoint.name for endpoint in ENDPOINTS
+            ),
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл отчёта JSON, по умолчанию stdout',
+        )
+        parser.add_argument(
+            '--keep-data',
+            action='store_true',
+            help='Не удалять созданные тестом объекты',
+        )
+
+    def get_endpoints(self, names: str) -> list:
+        if not names:
+            return list(ENDPOINTS)
+        by_name = {endpoint.name: endpoint for endpoint in ENDPOINTS}
+        names = [name.strip() for name in names.split(',') if name.strip()]
+        unknown = [name for name in names if name not in by_name]
+        if unknown:
+            raise CommandError(f'Неизвестные маршруты: {", ".join(unknown)}')
+        return [by_name[name] for name in names]
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError(
+                '--requests и --concurrency должны быть больше 0'
+            )
+        endpoints = self.get_endpoints(options['endpoints'])
+        data = BenchmarkData(writes=options['requests'])
+        context = data.create()
+        report = {'meta': {
+            'started': timezone.now().isoformat(),
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+        }}
+        try:
+            report['endpoints'] = self.run(options, endpoints, context)
+        finally:
+            if not options['keep_data']:
+                data.cleanup()
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+            return
+        self.stdout.write(output)
+
+    def run(self, options: dict, endpoints: list, context: dict) -> dict:
+        arguments = (
+            endpoints, context, options['requests'], options['concurrency'],
+            self.progress,
+        )
+        if options['url']:
+            return run_benchmark(options['url'].rstrip('/'), *arguments)
+        with LocalServer() as url:
+            return run_benchmark(url, *arguments)
+
+    def progress(self, name: str, summary: dict) -> None:
+        latency = summary['latency_ms']
+        self.stderr.write(
+            f'{name}: {summary["throughput"]} запросов/с, '
+            f'p50 {latency["p50"]} мс, p99 {latency["p99"]} мс, '
+            f'ошибок {summary["errors"]}'
+        )
@@ -0,0 +1,19 @@
+from api.cache import get_stats
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Счётчики попаданий и промахов кэша ответов API'
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        if not stats:
+            self.stdout.write('Статистика кэша пуста')
+            return
+        for view, counters in stats.items():
+            total = counters['hit'] + counters['miss']
+            ratio = counters['hit'] / total if total else 0
+            self.stdout.write(
+                f'{view}: hit {counters["hit"]}, miss {counters["miss"]}, '
+                f'hit ratio {ratio:.1%}'
+            )
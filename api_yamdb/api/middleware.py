@@ -0,0 +1,163 @@
+import random
+import time
+from contextlib import ExitStack
+from typing import Optional
+
+from core import slowlog
+from core.caches import require_shared_cache
+from core.metrics import (check_connections, finish_request, get_request_stats,
+                          observe, start_request, time_query)
+from core.routers import reset_replica, set_replica
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_cache
+
+PRIMARY_PREFIX = 'yamdb:primary:'
+CONNECTIONS_HEADER = 'X-DB-Connections'
+SERVER_TIMING_HEADER = 'Server-Timing'
+RENDER_STARTED = '_metrics_render_started'
+
+
+def request_user_id(request: HttpRequest) -> Optional[str]:
+    """
+    id пользователя запроса до аутентификации DRF: из проверенного
+    JWT или из сессии.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is not None:
+        try:
+            token = authentication.get_validated_token(
+                authentication.get_raw_token(header)
+            )
+        except AuthenticationFailed:
+            return None
+        return token.get(api_settings.USER_ID_CLAIM)
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Выбор БД для чтений запроса (см. :obj:`core.routers.ReplicaRouter`).
+
+    Небезопасные методы читают и пишут в основную БД. После успешной
+    (2xx) записи пользователь DATABASE_REPLICA_LAG секунд читает из
+    основной БД, чтобы видеть свои изменения (read-your-writes).
+    Остальные запросы читают из реплики, выбранной на весь запрос.
+    Метка записи хранится в кэше, общем для воркеров: следующий
+    запрос пользователя может попасть в другой процесс.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if settings.DATABASE_REPLICAS:
+            require_shared_cache('DATABASE_REPLICAS')
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        user_id = request_user_id(request)
+        key = f'{PRIMARY_PREFIX}{user_id}'
+        write = request.method not in SAFE_METHODS
+        replica = None
+        if not write and (user_id is None or get_cache().get(key) is None):
+            replica = random.choice(settings.DATABASE_REPLICAS)
+        token = set_replica(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica(token)
+        if write and user_id is not None and 200 <= response.status_code < 300:
+            get_cache().set(key, 1, timeout=settings.DATABASE_REPLICA_LAG)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Показатели запросов (:obj:`core.metrics`), журнал медленных
+    запросов к БД (:obj:`core.slowlog`) и проверка постоянных
+    соединений с БД.
+
+    При REQUEST_METRICS по каждому view копятся длительность
+    (гистограмма), число и время запросов к БД (execute_wrapper),
+    время сериализации и рендеринга, размер ответа; показатели
+    запроса выводятся в заголовке Server-Timing. При
+    SLOW_QUERY_THRESHOLD запросы к БД дольше порога сохраняются
+    с планом выполнения. При DATABASE_METRICS_HEADER счётчики
+    подключений запроса выводятся в заголовке X-DB-Connections:
+    открыто, переиспользовано и ожидание в мс.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        threshold = settings.SLOW_QUERY_THRESHOLD
+        token = start_request(threshold / 1000 if threshold > 0 else None)
+        try:
+            check_connections()
+            if settings.REQUEST_METRICS or threshold > 0:
+                response = self.measure(request)
+            else:
+                response = self.get_response(request)
+            stats = get_request_stats()
+        finally:
+            finish_request(token)
+        if stats.slow_queries:
+            slowlog.save(stats.slow_queries)
+        if settings.DATABASE_METRICS_HEADER:
+            response[CONNECTIONS_HEADER] = (
+                f'opened={stats.opened}; reused={stats.reused}; '
+                f'wait={stats.wait * 1000:.2f}'
+            )
+        return response
+
+    def measure(self, request: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(time_query))
+            response = self.get_response(request)
+        if settings.REQUEST_METRICS:
+            self.observe(request, response, time.perf_counter() - started)
+        return response
+
+    def observe(self, request: HttpRequest, response: HttpResponse,
+                duration: float) -> None:
+        stats = get_request_stats()
+        render_started = getattr(request, RENDER_STARTED, None)
+        if render_started is not None:
+            stats.serialize_time += (
+                time.perf_counter() - render_started
+            )
+        observe(
+            stats.view or 'unmatched', request.method,
+            response.status_code, duration, stats,
+            0 if response.streaming else len(response.content),
+        )
+        response[SERVER_TIMING_HEADER] = (
+            f'db;dur={stats.db_time * 1000:.2f};'
+            f'desc="{stats.queries} queries", '
+            f'serialize;dur={stats.serialize_time * 1000:.2f}, '
+            f'total;dur={duration * 1000:.2f}'
+        )
+
+    def process_view(self, request: HttpRequest, view_func, view_args,
+                     view_kwargs) -> None:
+        """Имя view - метка показателей и медленных запросов."""
+        get_request_stats().view = request.resolver_match.view_name
+
+    def process_template_response(self, request: HttpRequest,
+                                  response: HttpResponse) -> HttpResponse:
+        """Ответ DRF рендерится после view: начало рендеринга."""
+        setattr(request, RENDER_STARTED, time.perf_counter())
+        return response
@@ -0,0 +1,162 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from typing import Optional
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.http import HttpRequest
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset с опциональным режимом keyset (cursor).
+
+    По умолчанию работает как :obj:`LimitOffsetPagination`.
+    Режим keyset включается параметром cursor (для первой страницы
+    пустым: ?cursor=). Страница выбирается условием по ключу
+    сортировки последней записи, без COUNT(*) и OFFSET, поэтому
+    время ответа не зависит от глубины страницы.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный cursor.'
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset: QuerySet, request: HttpRequest,
+                          view=None) -> Optional[list]:
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.request = request
+        self.model = queryset.model
+        position, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self.invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        page = list(queryset[:self.limit + 1])
+        self.has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if self.reverse:
+            page.reverse()
+        self.has_position = position is not None
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data: list) -> Response:
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.keyset:
+            return super().get_next_link()
+        has_next = self.has_position if self.reverse else self.has_more
+        if not self.page or not has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.keyset:
+            return super().get_previous_link()
+        has_previous = self.has_more if self.reverse else self.has_position
+        if not self.page or not has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def invert(field: str) -> str:
+        """Меняет направление сортировки поля."""
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def after(ordering: tuple, position: list) -> Q:
+        """
+        Условие «строго после позиции» для составного ключа.
+
+        Помимо дизъюнкции добавлено условие по первому полю,
+        по которому индекс ограничивает диапазон сканирования.
+        """
+        lookups = [
+            (field.lstrip('-'), 'lt' if field.startswith('-') else 'gt')
+            for field in ordering
+        ]
+        condition = Q()
+        for index, (name, lookup) in enumerate(lookups):
+            equal = {lookups[i][0]: position[i] for i in range(index)}
+            condition |= Q(**equal, **{f'{name}__{lookup}': position[index]})
+        first_name, first_lookup = lookups[0]
+        bound = {f'{first_name}__{first_lookup}e': position[0]}
+        return Q(**bound) & condition
+
+    def decode_cursor(self, request: HttpRequest) -> tuple:
+        """Возвращает позицию ключа и направление из параметра cursor."""
+        encoded = request.query_params[self.cursor_query_param]
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = [
+                self.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, cursor['p'])
+            ]
+            reverse = bool(cursor['r'])
+        except (TypeError, ValueError, KeyError,
+                DjangoValidationError) as error:
+            raise NotFound(self.invalid_cursor_message) from error
+        if len(position) != len(self.ordering) or None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        """Ссылка на страницу, соседнюю с записью obj."""
+        position = [
+            self.model._meta.get_field(field.lstrip('-')).value_to_string(obj)
+            for field in self.ordering
+        ]
+        cursor = {'p': position, 'r': int(reverse)}
+        encoded = urlsafe_b64encode(
+            json.dumps(cursor, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+
+class TitlePagination(KeysetPagination):
+    """
+    Пагинация произведений: keyset по id.
+
+    Результаты поиска упорядочены по релевантности, keyset по id
+    потерял бы этот порядок: cursor вместе с search не принимается.
+    """
+    ordering = ('id',)
+    search_query_param = 'search'
+
+    def paginate_queryset(self, queryset: QuerySet, request: HttpRequest,
+                          view=None) -> Optional[list]:
+        if (self.cursor_query_param in request.query_params
+                and self.search_query_param in request.query_params):
+            raise ValidationError({
+                self.cursor_query_param: 'cursor нельзя сочетать с search.'
+            })
+        return super().paginate_queryset(queryset, request, view)
+
+
+class PubDatePagination(KeysetPagination):
+    """Пагинация отзывов и комментариев: keyset по (pub_date, id)."""
+    ordering = ('-pub_date', '-id')
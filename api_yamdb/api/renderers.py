@@ -0,0 +1,79 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson, если он установлен.
+
+    Вывод совпадает с JSONRenderer: даты, Decimal и ленивые строки
+    передаются в encoder_class DRF, U+2028/U+2029 экранируются.
+    Отступы (application/json; indent=4), нестроковые ключи и
+    целые вне 64 бит обрабатывает стандартный json.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii
+                or not self.compact or self.get_indent(
+                    accepted_media_type, renderer_context or {}
+                ) is not None):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=self.options,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class PrometheusRenderer(BaseRenderer):
+    """
+    Текстовый формат Prometheus: строка показателей как есть.
+
+    Версия формата указывается в content_type ответа: media_type
+    с параметрами DRF не сопоставляет с Accept: */*.
+    """
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Ошибки аутентификации и прав доступа.
+            data = ''.join(
+                f'# {key}: {value}\n' for key, value in data.items()
+            )
+        return data.encode(self.charset)
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser на orjson, если он установлен (только UTF-8)."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -1,13 +1,22 @@
-from collections import OrderedDict
-
+from core.deletion import hide_deleted
+from core.models import DeletionJob
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import validate_email
-from rest_framework.serializers import (CharField, CurrentUserDefault,
-                                        IntegerField, ModelSerializer,
+from django.db import IntegrityError, router, transaction
+from rest_framework.serializers import (CharField, ChoiceField,
+                                        CurrentUserDefault, IntegerField,
+                                        ListField, ListSerializer,
+                                        ModelSerializer,
+                                        PrimaryKeyRelatedField, Serializer,
                                         SlugRelatedField, ValidationError)
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.settings import api_settings
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.ranking import ORDERINGS
 from reviews.validators import validate_username
 
+from .cache import bump_versions
+
 User = get_user_model()
 
 
@@ -46,6 +55,8 @@ class TokenSerializer(ModelSerializer):
     class Meta:
         model = User
         fields = ('username', 'confirmation_code')
+        # Токен выдаётся существующему пользователю: без UniqueValidator.
+        extra_kwargs = {'username': {'validators': ()}}
 
     def validate_username(self, value: str) -> str:
         """Проверка на валидное username."""
@@ -119,28 +130,130 @@ class TitleGetSerializer(ModelSerializer):
     """Сериалайзер модели Title для чтения."""
     category = CategorySerializer(read_only=True, many=False)
     genre = GenreSerializer(read_only=True, many=True)
-    rating = IntegerField(max_value=10, min_value=0)
+    rating = IntegerField(max_value=10, min_value=0, read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = Title.RATING_FIELDS
 
 
 class TitlePostSerializer(ModelSerializer):
     """Сериалайзер модели Title для редактирования."""
     category = SlugRelatedField(
-        queryset=Category.objects.all(),
+        queryset=hide_deleted(Category.objects.all()),
         slug_field='slug'
     )
     genre = SlugRelatedField(
-        queryset=Genre.objects.all(),
+        queryset=hide_deleted(Genre.objects.all()),
         slug_field='slug',
         many=True
     )
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = Title.RATING_FIELDS
+
+
+class TitleBatchSerializer(ListSerializer):
+    """
+    Пакетное создание произведений.
+
+    Элементы проверяются без запросов к БД, затем slug категорий и
+    жанров всех элементов ищутся одним запросом на модель. Ошибки
+    возвращаются списком по элементам ({} у корректных), при
+    ошибке не создаётся ни одно произведение.
+    """
+    default_error_messages = {
+        'max_length': 'Не больше {max_length} произведений за запрос.',
+    }
+
+    def to_internal_value(self, data) -> list:
+        data = super().to_internal_value(data)
+        max_length = settings.TITLE_BATCH_MAX_SIZE
+        if len(data) > max_length:
+            self.fail('max_length', max_length=max_length)
+        return self.resolve_slugs(data)
+
+    def resolve_slugs(self, attrs: list) -> list:
+        """Заменяет slug категорий и жанров объектами."""
+        categories = hide_deleted(Category.objects.all()).in_bulk(
+            {item['category'] for item in attrs}, field_name='slug'
+        )
+        genres = hide_deleted(Genre.objects.all()).in_bulk(
+            {slug for item in attrs for slug in item['genre']},
+            field_name='slug'
+        )
+        errors = [{} for _ in attrs]
+        for item, item_errors in zip(attrs, errors):
+            if item['category'] not in categories:
+                item_errors['category'] = [
+                    self.child.does_not_exist(item['category'])
+                ]
+            missing = [slug for slug in item['genre'] if slug not in genres]
+            if missing:
+                item_errors['genre'] = [
+                    self.child.does_not_exist(slug) for slug in missing
+                ]
+        if any(errors):
+            raise ValidationError(errors)
+        return [
+            dict(
+                item,
+                category=categories[item['category']],
+                genre=[genres[slug] for slug in dict.fromkeys(item['genre'])],
+            )
+            for item in attrs
+        ]
+
+    def create(self, validated_data: list) -> list:
+        """
+        Создаёт произведения и их жанры двумя bulk_create в одной
+        транзакции.
+        """
+        titles = [
+            Title(**{k: v for k, v in item.items() if k != 'genre'})
+            for item in validated_data
+        ]
+        with transaction.atomic():
+            Title.objects.bulk_create(titles)
+            if titles and titles[0].pk is None:
+                self.set_pks(titles)
+            GenreTitle.objects.bulk_create(
+                GenreTitle(title=title, genre=genre)
+                for title, item in zip(titles, validated_data)
+                for genre in item['genre']
+            )
+            bump_versions('title')
+        return titles
+
+    @staticmethod
+    def set_pks(titles: list) -> None:
+        """
+        id произведений, если bulk_create их не вернул (SQLite).
+
+        Строки пакета - последние по id: SQLite блокирует запись в БД
+        до конца транзакции.
+        """
+        pks = list(Title.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:len(titles)])
+        for title, pk in zip(titles, reversed(pks)):
+            title.pk = pk
+
+
+class TitleBatchItemSerializer(TitlePostSerializer):
+    """Произведение пакета: slug проверяются в :obj:`TitleBatchSerializer`."""
+    category = CharField(max_length=50)
+    genre = ListField(child=CharField(max_length=50))
+
+    class Meta(TitlePostSerializer.Meta):
+        list_serializer_class = TitleBatchSerializer
+
+    @staticmethod
+    def does_not_exist(slug: str) -> str:
+        return SlugRelatedField.default_error_messages[
+            'does_not_exist'
+        ].format(slug_name='slug', value=slug)
 
 
 class ReviewSerializer(ModelSerializer):
@@ -159,15 +272,35 @@ class ReviewSerializer(ModelSerializer):
         model = Review
         fields = '__all__'
 
-    def validate(self, data: OrderedDict) -> OrderedDict:
-        """Защита от повторов отзыва от пользователя."""
-        if self.context['request'].method != 'POST':
-            return data
-        author = self.context['request'].user
-        title_id = self.context['view'].kwargs.get('title_id')
-        if Review.objects.filter(author=author, title_id=title_id).exists():
-            raise ValidationError('Отзыв уже был ранее')
-        return data
+    def create(self, validated_data: dict) -> Review:
+        """
+        Защита от повторов отзыва от пользователя.
+
+        Повтор отклоняет ограничение unique_together (title, author):
+        INSERT выполняется в точке сохранения, без предварительного
+        запроса на существование отзыва. Прочие нарушения целостности
+        (например, удалённое произведение) не скрываются: отзыв ищется
+        только после ошибки.
+        """
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.using(
+                router.db_for_write(Review)
+            ).filter(
+                title=validated_data['title'],
+                author=validated_data['author'],
+            ).exists():
+                raise
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ['Отзыв уже был ранее']}
+            )
+
+
+class CompactReviewSerializer(ReviewSerializer):
+    """Отзыв с id произведения вместо названия."""
+    title = PrimaryKeyRelatedField(read_only=True)
 
 
 class CommentSerializer(ModelSerializer):
@@ -185,3 +318,25 @@ class CommentSerializer(ModelSerializer):
     class Meta:
         model = Comment
         fields = '__all__'
+
+
+class CompactCommentSerializer(CommentSerializer):
+    """Комментарий с id отзыва вместо текста отзыва."""
+    review = PrimaryKeyRelatedField(read_only=True)
+
+
+class LeaderboardQuerySerializer(Serializer):
+    """Параметры рейтинга лучших: порядок и число мест."""
+    order = ChoiceField(choices=tuple(ORDERINGS), default='rating')
+    limit = IntegerField(
+        min_value=1, max_value=settings.LEADERBOARD_MAX_SIZE,
+        default=settings.LEADERBOARD_SIZE
+    )
+
+
+class DeletionJobSerializer(ModelSerializer):
+    """Сериалайзер статуса фонового удаления."""
+
+    class Meta:
+        model = DeletionJob
+        exclude = ('heartbeat',)
@@ -0,0 +1,141 @@
+from core.deletion import model_label
+from core.models import DeletionJob
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, users_updated)
+
+from .authentication import auth_resource, user_cache
+from .cache import bump_versions
+from .deletion import DELETION_VERSIONS
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance: Category, **kwargs) -> None:
+    bump_versions('category')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, instance: Genre, **kwargs) -> None:
+    bump_versions('genre')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance: Title, **kwargs) -> None:
+    """Название произведения выводится и в его отзывах."""
+    bump_versions(
+        'title', f'title:{instance.pk}', f'reviews:{instance.pk}'
+    )
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def genre_title_changed(sender, instance: GenreTitle, **kwargs) -> None:
+    bump_versions('title', f'title:{instance.title_id}')
+
+
+@receiver(m2m_changed, sender=GenreTitle)
+def title_genres_changed(sender, instance, action: str, reverse: bool,
+                         pk_set: set, **kwargs) -> None:
+    """Жанры, заданные через Title.genre.set() (без post_save)."""
+    if not action.startswith('post_'):
+        return
+    title_ids = (pk_set or ()) if reverse else (instance.pk,)
+    bump_versions('title', *(f'title:{pk}' for pk in title_ids))
+
+
+@receiver(post_save, sender=DeletionJob)
+def deletion_job_failed(sender, instance: DeletionJob, **kwargs) -> None:
+    """
+    Объект задачи с ошибкой снова показывается в API. Пользователь,
+    заблокированный при постановке в очередь (UserViewSet), снова
+    активен: удаление можно повторить.
+    """
+    if instance.status != DeletionJob.FAILED:
+        return
+    if instance.model == model_label(User):
+        User.objects.filter(pk=instance.object_id).update(is_active=True)
+    for model, resources in DELETION_VERSIONS.items():
+        if model_label(model) == instance.model:
+            bump_versions(*resources)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance: Review, **kwargs) -> None:
+    """Отзыв меняет рейтинг произведения и выводится в комментариях."""
+    bump_versions(
+        'title',
+        f'title:{instance.title_id}',
+        f'reviews:{instance.title_id}',
+        f'comments:{instance.pk}',
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance: Comment, **kwargs) -> None:
+    bump_versions(f'comments:{instance.review_id}')
+
+
+def author_resources(user_ids, using: str = None) -> list:
+    """
+    Ресурсы ответов, в которых выводится имя пользователей user_ids:
+    списки отзывов и комментариев, где они авторы.
+    """
+    title_ids = Review.objects.using(using).filter(
+        author_id__in=user_ids
+    ).values_list('title_id', flat=True).distinct()
+    review_ids = Comment.objects.using(using).filter(
+        author_id__in=user_ids
+    ).values_list('review_id', flat=True).distinct()
+    return [
+        *(f'reviews:{title_id}' for title_id in title_ids),
+        *(f'comments:{review_id}' for review_id in review_ids),
+    ]
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance: User, created: bool, using: str,
+                 **kwargs) -> None:
+    """
+    Смена роли или флагов делает неактуальными утверждения JWT, смена
+    имени - ещё и ответы с отзывами и комментариями пользователя.
+    У удалённого пользователя их удаляет каскад со своими сигналами.
+    """
+    user_cache.invalidate(instance.pk)
+    loaded = getattr(instance, '_loaded_auth', None)
+    instance._loaded_auth = instance.auth_state()
+    if created or loaded == instance._loaded_auth:
+        return
+    resources = [auth_resource(instance.pk)]
+    if (loaded is None or dict(zip(User.AUTH_FIELDS, loaded))['username']
+            != instance.username):
+        resources.extend(author_resources((instance.pk,), using))
+    bump_versions(*resources)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance: User, **kwargs) -> None:
+    user_cache.invalidate(instance.pk)
+    bump_versions(auth_resource(instance.pk))
+
+
+@receiver(users_updated, sender=User)
+def users_auth_updated(sender, user_ids: list, fields: set, using: str,
+                       **kwargs) -> None:
+    """queryset.update() имени, роли или флагов: как user_changed."""
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+    if not user_ids:
+        return
+    resources = [auth_resource(user_id) for user_id in user_ids]
+    if 'username' in fields:
+        resources.extend(author_resources(user_ids, using))
+    bump_versions(*resources)
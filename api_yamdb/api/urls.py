@@ -1,15 +1,19 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, SignupViewSet, TitleViewSet, TokenViewSet,
-                    UserViewSet)
+from .views import (CategoryViewSet, CommentViewSet, DeletionJobViewSet,
+                    GenreViewSet, LeaderboardViewSet, MetricsView,
+                    ReviewViewSet, SignupViewSet, SlowQueryView, TitleViewSet,
+                    TokenViewSet, UserViewSet)
 
 router_v1 = DefaultRouter()
 router_v1.register('users', UserViewSet, basename='users')
 router_v1.register('genres', GenreViewSet, basename='genres')
 router_v1.register('categories', CategoryViewSet, basename='category')
 router_v1.register('titles', TitleViewSet, basename='titles')
+router_v1.register('deletions', DeletionJobViewSet, basename='deletions')
+router_v1.register('leaderboards', LeaderboardViewSet,
+                   basename='leaderboards')
 router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet,
@@ -24,6 +28,8 @@ router_v1.register(
 urlpatterns = [
     path('api/v1/', include([
         path('', include(router_v1.urls)),
+        path('metrics/', MetricsView.as_view(), name='metrics'),
+        path('slow-queries/', SlowQueryView.as_view(), name='slow-queries'),
         path('auth/', include([
             path('signup/', SignupViewSet.as_view(), name='signup'),
             path('token/', TokenViewSet.as_view(), name='token'),
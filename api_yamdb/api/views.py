@@ -1,8 +1,13 @@
+from core.deletion import hide_deleted, pending_ids, schedule_deletion
+from core.metrics import export
+from core.models import DeletionJob
+from core.outbox import enqueue_mail
+from core.slowlog import get_recent
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Prefetch
 from django.db.models.query import QuerySet
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404
@@ -12,20 +17,30 @@ from rest_framework.decorators import action
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.serializers import ModelSerializer
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
-
+from reviews.models import Category, Comment, Genre, Review, Title, TitleRank
+from reviews.ranking import leaderboard
+
+from .authentication import access_token_for, get_request_user
+from .cache import (CachedListMixin, CachedRetrieveMixin, ResponseCacheMixin,
+                    bump_versions)
+from .deletion import DELETION_VERSIONS
+from .fastlist import FastListMixin
 from .filters import TitleFilterSet
+from .pagination import PubDatePagination, TitlePagination
 from .permissions import (IsAdmin, IsAdminOrReadOnly, IsAuthenticated,
                           IsAuthorModeratorAdminOrReadOnly)
+from .renderers import PROMETHEUS_CONTENT_TYPE, PrometheusRenderer
 from .serializers import (CategorySerializer, CommentSerializer,
-                          CustomUserSerializer, GenreSerializer,
+                          CompactCommentSerializer, CompactReviewSerializer,
+                          CustomUserSerializer, DeletionJobSerializer,
+                          GenreSerializer, LeaderboardQuerySerializer,
                           ReviewSerializer, SignupSerializer,
-                          TitleGetSerializer, TitlePostSerializer,
-                          TokenSerializer, UserSerializer)
+                          TitleBatchItemSerializer, TitleGetSerializer,
+                          TitlePostSerializer, TokenSerializer, UserSerializer)
 
 User = get_user_model()
 
@@ -41,6 +56,7 @@ class SignupViewSet(APIView):
     """
     permission_classes = (AllowAny,)
 
+    @transaction.atomic
     def post(self, request: HttpRequest) -> HttpResponse:
         """
         При POST запросе, сохраняет стерилизованные данные в юзера
@@ -56,7 +72,10 @@ class SignupViewSet(APIView):
     @staticmethod
     def send_message(user: QuerySet, confirmation_code: str) -> None:
         """
-        Отправка юзеру сообщения с confirmation_code.
+        Постановка в очередь письма юзеру с confirmation_code.
+
+        Письмо отправляет команда send_emails, ответ на запрос
+        не ждёт почтовый сервер.
         - user (:obj:`QuerySet`)
         - confirmation_code (:obj:`str`)
         """
@@ -69,7 +88,7 @@ class SignupViewSet(APIView):
             f'  "confirmation_code": "{confirmation_code}"\n'
             '}'
         )
-        send_mail(
+        enqueue_mail(
             'Код подтверждения для получения токена на YaMDB',
             massage,
             settings.EMAIL_HOST_USER,
@@ -98,7 +117,7 @@ class TokenViewSet(APIView):
         user = get_object_or_404(User, username=username)
         confirmation_code = serializer.validated_data['confirmation_code']
         if default_token_generator.check_token(user, confirmation_code):
-            token = AccessToken.for_user(user)
+            token = access_token_for(user)
             return Response({'token': f'{token}'}, status=status.HTTP_200_OK)
         return Response(
             'Неверный Confirmation_code!',
@@ -106,7 +125,81 @@ class TokenViewSet(APIView):
         )
 
 
-class UserViewSet(ModelViewSet):
+class BackgroundDestroyMixin:
+    """
+    Фоновое удаление объекта с большим каскадом.
+
+    DELETE ставит задачу :obj:`DeletionJob` (её выполняет команда
+    run_deletions) и сразу скрывает объект из API, поэтому время
+    ответа не зависит от числа зависимых строк. Ответ 204, заголовок
+    Location - адрес статуса задачи.
+    """
+    deletion_versions = ()
+
+    def get_queryset(self) -> QuerySet:
+        return hide_deleted(super().get_queryset())
+
+    def destroy(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        with transaction.atomic():
+            job = self.perform_destroy(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT, headers={
+            'Location': reverse(
+                'deletions-detail', args=(job.pk,), request=request
+            )
+        })
+
+    def perform_destroy(self, instance) -> DeletionJob:
+        if self.deletion_versions:
+            bump_versions(*self.deletion_versions)
+        return schedule_deletion(instance)
+
+
+class DeletionJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Статус фонового удаления.
+
+    Список задач удаления: Администратор
+        GET: /deletions/
+    Статус задачи удаления: Администратор
+        GET: /deletions/{id}/
+    """
+    queryset = DeletionJob.objects.order_by('-id')
+    serializer_class = DeletionJobSerializer
+    permission_classes = (IsAdmin,)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_fields = ('model', 'status')
+
+
+class MetricsView(APIView):
+    """
+    Показатели запросов воркера в текстовом формате Prometheus
+    (см. :obj:`api.middleware.MetricsMiddleware`).
+
+    Права доступа: Администратор
+        GET: /metrics/
+    """
+    permission_classes = (IsAdmin,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        return Response(export(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class SlowQueryView(APIView):
+    """
+    Последние медленные запросы к БД воркера, новые первыми
+    (см. :obj:`core.slowlog`). Журнал всех воркеров - в админке.
+
+    Права доступа: Администратор
+        GET: /slow-queries/
+    """
+    permission_classes = (IsAdmin,)
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        return Response(get_recent())
+
+
+class UserViewSet(BackgroundDestroyMixin, ModelViewSet):
     """
     Пользователи.
 
@@ -121,6 +214,10 @@ class UserViewSet(ModelViewSet):
         Поля email и username должны быть уникальными.
         PATCH: /users/{username}/
     Удаление пользователя по username: Администратор
+        Пользователь сразу блокируется и скрывается, его отзывы и
+        комментарии удаляются в фоне (см. :obj:`BackgroundDestroyMixin`).
+        Если задача удаления завершилась ошибкой, пользователь снова
+        активен (api.signals.deletion_job_failed).
         DELETE: /users/{username}/
     """
     permission_classes = (IsAdmin,)
@@ -130,6 +227,12 @@ class UserViewSet(ModelViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
 
+    def perform_destroy(self, instance: User) -> DeletionJob:
+        """Блокирует пользователя: его JWT перестают приниматься."""
+        instance.is_active = False
+        instance.save(update_fields=('is_active',))
+        return super().perform_destroy(instance)
+
     @action(methods=('GET', 'PATCH'), detail=False,
             permission_classes=(IsAuthenticated,))
     def me(self, request: HttpRequest) -> HttpResponse:
@@ -156,7 +259,10 @@ class UserViewSet(ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(viewsets.GenericViewSet,
+class CategoryViewSet(BackgroundDestroyMixin,
+                      CachedListMixin,
+                      FastListMixin,
+                      viewsets.GenericViewSet,
                       mixins.CreateModelMixin,
                       mixins.ListModelMixin,
                       mixins.DestroyModelMixin):
@@ -169,10 +275,13 @@ class CategoryViewSet(viewsets.GenericViewSet,
         Поле slug каждой категории должно быть уникальным
         POST: /categories/
     Удаление категории: Администратор
+        Произведения теряют категорию в фоне.
         DELETE: /categories/{slug}/
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_versions = {'list': ('category',)}
+    deletion_versions = DELETION_VERSIONS[Category]
     pagination_class = LimitOffsetPagination
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter, )
@@ -180,7 +289,10 @@ class CategoryViewSet(viewsets.GenericViewSet,
     search_fields = ('name',)
 
 
-class GenreViewSet(viewsets.GenericViewSet,
+class GenreViewSet(BackgroundDestroyMixin,
+                   CachedListMixin,
+                   FastListMixin,
+                   viewsets.GenericViewSet,
                    mixins.CreateModelMixin,
                    mixins.ListModelMixin,
                    mixins.DestroyModelMixin):
@@ -193,10 +305,13 @@ class GenreViewSet(viewsets.GenericViewSet,
         Поле slug каждого жанра должно быть уникальным.
         POST: /genres/
     Удаление жанра: Администратор
+        Связи с произведениями удаляются в фоне.
         DELETE: /genres/{slug}/
     """
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_versions = {'list': ('genre',)}
+    deletion_versions = DELETION_VERSIONS[Genre]
     pagination_class = LimitOffsetPagination
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter, )
@@ -204,7 +319,51 @@ class GenreViewSet(viewsets.GenericViewSet,
     search_fields = ('name',)
 
 
-class TitleViewSet(ModelViewSet):
+class HidePendingRelationsMixin:
+    """
+    Категории и жанры в очереди на удаление скрыты и во вложенных
+    представлениях произведений: их строки и связи удаляются позже,
+    командой run_deletions. Один запрос к очереди, slug - только
+    если в ней есть категории или жанры.
+    """
+
+    def list(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return self.hide_pending(super().list(request, *args, **kwargs))
+
+    def retrieve(self, request: HttpRequest, *args,
+                 **kwargs) -> HttpResponse:
+        return self.hide_pending(super().retrieve(request, *args, **kwargs))
+
+    @staticmethod
+    def hide_pending(response: HttpResponse) -> HttpResponse:
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        pending = {
+            model: set(model.objects.filter(pk__in=ids).values_list(
+                'slug', flat=True
+            ))
+            for model, ids in pending_ids(Category, Genre).items() if ids
+        }
+        if not pending:
+            return response
+        data = response.data
+        if isinstance(data, dict):
+            data = data['results'] if 'results' in data else [data]
+        categories = pending.get(Category, set())
+        genres = pending.get(Genre, set())
+        for title in data:
+            category = title['category']
+            if category is not None and category['slug'] in categories:
+                title['category'] = None
+            title['genre'] = [
+                genre for genre in title['genre']
+                if genre['slug'] not in genres
+            ]
+        return response
+
+
+class TitleViewSet(CachedListMixin, CachedRetrieveMixin,
+                   HidePendingRelationsMixin, FastListMixin, ModelViewSet):
     """
     Произведения, к которым пишут отзывы
     (определённый фильм, книга или песенка).
@@ -223,20 +382,167 @@ class TitleViewSet(ModelViewSet):
         PATCH: /titles/{titles_id}/
     Удаление произведения: Администратор
         DELETE /titles/{titles_id}/
+    Пакетное добавление произведений: Администратор
+        Не больше TITLE_BATCH_MAX_SIZE произведений за запрос.
+        POST: /titles/batch/
+    Статистика оценок произведения: Доступно без токена
+        GET: /titles/{titles_id}/rating-stats/
     """
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).all()
+    queryset = Title.objects.select_related('category').prefetch_related(
+        Prefetch('genre', queryset=Genre.objects.order_by('id'))
+    )
     permission_classes = (IsAdminOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = TitlePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilterSet
+    cache_versions = {
+        'list': ('title', 'category', 'genre'),
+        'retrieve': ('title:{pk}', 'category', 'genre'),
+        'rating_stats': ('title:{pk}',),
+    }
+    fast_computed = {
+        'rating': (('rating_sum', 'rating_count'), Title.average_rating),
+    }
 
     def get_serializer_class(self) -> ModelSerializer:
         if self.action in ('list', 'retrieve'):
             return TitleGetSerializer
+        if self.action == 'batch':
+            return TitleBatchItemSerializer
         return TitlePostSerializer
 
+    @action(methods=('POST',), detail=False)
+    def batch(self, request: HttpRequest) -> HttpResponse:
+        """
+        Создание списка произведений одним запросом.
+
+        Формат элемента как у POST /titles/. При ошибке в любом
+        элементе возвращается список ошибок по элементам,
+        произведения не создаются.
+        """
+        serializer = self.get_serializer(
+            data=request.data, many=True, allow_empty=False
+        )
+        serializer.is_valid(raise_exception=True)
+        titles = serializer.save()
+        queryset = self.get_queryset().filter(
+            pk__in=[title.pk for title in titles]
+        ).order_by('pk')
+        return Response(
+            TitleGetSerializer(queryset, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
 
-class ReviewViewSet(ModelViewSet):
+    @action(methods=('GET',), detail=True, url_path='rating-stats')
+    def rating_stats(self, request: HttpRequest, pk=None) -> HttpResponse:
+        """
+        Количество, среднее, медиана, перцентили и гистограмма оценок.
+
+        Считаются по гистограмме, хранимой в произведении: один запрос
+        к БД без чтения отзывов.
+        """
+        return self.cached(self.get_rating_stats, request, pk=pk)
+
+    def get_rating_stats(self, request: HttpRequest, pk=None) -> HttpResponse:
+        title = get_object_or_404(
+            Title.objects.only(*Title.HISTOGRAM_FIELDS), pk=pk
+        )
+        return Response(Title.rating_stats(title.rating_histogram))
+
+
+class LeaderboardViewSet(ResponseCacheMixin, viewsets.ViewSet):
+    """
+    Рейтинги лучших произведений по средней оценке или числу отзывов.
+
+    В рейтингах только произведения с LEADERBOARD_MIN_REVIEWS отзывами
+    и больше, при равенстве выше произведение с меньшим id.
+    Параметры: order=rating|reviews, limit - число мест
+    (до LEADERBOARD_MAX_SIZE).
+
+    Общий рейтинг: Доступно без токена
+        GET: /leaderboards/
+    Рейтинг категории: Доступно без токена
+        GET: /leaderboards/categories/{slug}/
+    Рейтинг жанра: Доступно без токена
+        GET: /leaderboards/genres/{slug}/
+    """
+    permission_classes = (AllowAny,)
+    cache_versions = {
+        'list': ('title',),
+        'category': ('title', 'category'),
+        'genre': ('title', 'genre'),
+    }
+
+    def list(self, request: HttpRequest) -> HttpResponse:
+        return self.cached(self.get_leaderboard, request, TitleRank.GLOBAL)
+
+    @action(methods=('GET',), detail=False,
+            url_path=r'categories/(?P<slug>[-a-zA-Z0-9_]+)')
+    def category(self, request: HttpRequest, slug=None) -> HttpResponse:
+        return self.cached(self.get_leaderboard, request,
+                           TitleRank.CATEGORY, Category, slug)
+
+    @action(methods=('GET',), detail=False,
+            url_path=r'genres/(?P<slug>[-a-zA-Z0-9_]+)')
+    def genre(self, request: HttpRequest, slug=None) -> HttpResponse:
+        return self.cached(self.get_leaderboard, request,
+                           TitleRank.GENRE, Genre, slug)
+
+    def get_leaderboard(self, request: HttpRequest, scope: str, model=None,
+                        slug=None) -> HttpResponse:
+        """
+        Места рейтинга из индекса TitleRank: один запрос, и ещё один -
+        id категории или жанра по slug.
+        """
+        params = LeaderboardQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        scope_id = 0
+        if model is not None:
+            scope_id = get_object_or_404(
+                hide_deleted(model.objects.all()).values_list(
+                    'pk', flat=True
+                ),
+                slug=slug
+            )
+        rows = leaderboard(scope, scope_id, **params.validated_data)
+        return Response([
+            {
+                'position': position,
+                'id': title_id,
+                'name': name,
+                'rating': rating / TitleRank.RATING_SCALE,
+                'review_count': review_count,
+            }
+            for position, (title_id, name, rating, review_count)
+            in enumerate(rows, start=1)
+        ])
+
+
+class CompactMixin:
+    """
+    Компактное представление: ?compact=true.
+
+    Родительский объект (произведение отзыва, отзыв комментария)
+    выводится по id, без его названия или текста, и не загружается
+    из БД. Без параметра формат ответа прежний.
+    """
+    compact_serializer_class = None
+
+    def is_compact(self) -> bool:
+        return (
+            self.action in ('list', 'retrieve')
+            and self.request.query_params.get('compact', '').lower()
+            in ('1', 'true')
+        )
+
+    def get_serializer_class(self) -> ModelSerializer:
+        if self.is_compact():
+            return self.compact_serializer_class
+        return super().get_serializer_class()
+
+
+class ReviewViewSet(CompactMixin, CachedListMixin, CachedRetrieveMixin,
+                    FastListMixin, ModelViewSet):
     """
     Отзывы.
 
@@ -252,22 +558,49 @@ class ReviewViewSet(ModelViewSet):
         DELETE: /titles/{title_id}/reviews/{review_id}/
     """
     serializer_class = ReviewSerializer
+    compact_serializer_class = CompactReviewSerializer
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
+    pagination_class = PubDatePagination
+    cache_versions = {
+        'list': ('reviews:{title_id}',),
+        'retrieve': ('reviews:{title_id}',),
+    }
+
+    def get_title(self) -> Title:
+        """Произведение из URL: один запрос за весь запрос API."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title.objects.only('id', 'name'), pk=self.kwargs['title_id']
+            )
+        return self._title
 
     def get_queryset(self) -> QuerySet:
-        """Возвращает отзывы."""
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        return title.reviews.all()
+        """
+        Возвращает отзывы.
+
+        Отзыв по id ищется сразу с фильтром по произведению:
+        отдельная проверка произведения нужна только списку.
+        """
+        if self.action == 'list':
+            self.get_title()
+        queryset = Review.objects.filter(
+            title_id=self.kwargs['title_id']
+        ).select_related('author')
+        fields = ('id', 'text', 'pub_date', 'score', 'title', 'author',
+                  'author__username')
+        if self.is_compact():
+            return queryset.only(*fields)
+        return queryset.select_related('title').only(*fields, 'title__name')
 
     def perform_create(self, serializer: ModelSerializer) -> None:
         """Создаёт отзыв в БД."""
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(
+            author=get_request_user(self.request), title=self.get_title()
+        )
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(CompactMixin, CachedListMixin, CachedRetrieveMixin,
+                     FastListMixin, ModelViewSet):
     """
     Комментарии к отзывам
 
@@ -284,16 +617,42 @@ class CommentViewSet(ModelViewSet):
         DELETE: /titles/{title_id}/reviews/{review_id}/comments/{comment_id}/
     """
     serializer_class = CommentSerializer
+    compact_serializer_class = CompactCommentSerializer
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
+    pagination_class = PubDatePagination
+    cache_versions = {
+        'list': ('comments:{review_id}',),
+        'retrieve': ('comments:{review_id}',),
+    }
+
+    def get_review(self) -> Review:
+        """Отзыв из URL, принадлежащий произведению из URL."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.only('id', 'text'),
+                pk=self.kwargs['review_id'],
+                title_id=self.kwargs['title_id'],
+            )
+        return self._review
 
     def get_queryset(self) -> QuerySet:
-        """Возвращает комментарий."""
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id)
-        return review.comments.all()
+        """Возвращает комментарии."""
+        if self.action == 'list':
+            self.get_review()
+        queryset = Comment.objects.filter(
+            review_id=self.kwargs['review_id'],
+            review__title_id=self.kwargs['title_id'],
+        ).select_related('author')
+        fields = ('id', 'text', 'pub_date', 'review', 'author',
+                  'author__username')
+        if self.is_compact():
+            return queryset.only(*fields)
+        return queryset.select_related('review').only(
+            *fields, 'review__text'
+        )
 
     def perform_create(self, serializer: ModelSerializer) -> None:
         """Создаёт комментарий в БД."""
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, pk=review_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(
+            author=get_request_user(self.request), review=self.get_review()
+        )
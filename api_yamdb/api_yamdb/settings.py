@@ -41,10 +41,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -91,13 +93,90 @@ POSTGRES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.environ.get('POSTGRES_HOST', default='db'),
         'PORT': os.environ.get('POSTGRES_PORT', default='5432'),
+        # Соединение живёт между запросами CONN_MAX_AGE секунд
+        # (0 - закрывается после каждого запроса).
+        'CONN_MAX_AGE': int(
+            os.environ.get('POSTGRES_CONN_MAX_AGE', default=60)
+        ),
+        'OPTIONS': {
+            'connect_timeout': int(
+                os.environ.get('POSTGRES_CONNECT_TIMEOUT', default=5)
+            ),
+        },
     }
 }
 
+# PgBouncer в режиме pool_mode=transaction: серверные курсоры
+# (iterator()) не переживают транзакцию. psycopg2 не использует
+# подготовленные операторы, а часовой пояс соединения задаётся
+# на стороне БД: ALTER ROLE ... SET timezone TO 'UTC'.
+if int(os.environ.get('POSTGRES_PGBOUNCER', default=0)):
+    POSTGRES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Реплики только для чтения: POSTGRES_REPLICA_HOSTS=host1:5432,host2.
+# Запросы направляет core.routers.ReplicaRouter, метки записи
+# api.middleware.ReplicaRoutingMiddleware требуют общего кэша.
+for number, address in enumerate(filter(None, (
+    address.strip() for address in
+    os.environ.get('POSTGRES_REPLICA_HOSTS', default='').split(',')
+)), 1):
+    host, _, port = address.partition(':')
+    POSTGRES[f'replica{number}'] = dict(
+        POSTGRES['default'],
+        HOST=host,
+        PORT=port or POSTGRES['default']['PORT'],
+        TEST={'MIRROR': 'default'},
+    )
+
 DATABASES = SQLITE if DEBUG else POSTGRES
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Секунды после записи, когда чтения идут в основную БД: для автора
+# записи и для ответов по изменённым ресурсам (отставание реплик).
+DATABASE_REPLICA_LAG = int(os.environ.get('DATABASE_REPLICA_LAG', default=5))
+# Проверка постоянного соединения перед первым запросом к БД в запросе
+# HTTP: core.metrics.check_connection. В Django 2.2 нет ключа
+# CONN_HEALTH_CHECKS в DATABASES, поэтому это настройка проекта.
+DATABASE_HEALTH_CHECKS = int(
+    os.environ.get('POSTGRES_CONN_HEALTH_CHECKS', default=1)
+)
+# Заголовок X-DB-Connections со счётчиками подключений запроса.
+DATABASE_METRICS_HEADER = int(
+    os.environ.get('POSTGRES_METRICS_HEADER', default=DEBUG)
+)
+# Показатели запросов по view (api.middleware.MetricsMiddleware):
+# заголовок Server-Timing и /api/v1/metrics/ для Prometheus.
+REQUEST_METRICS = int(os.environ.get('REQUEST_METRICS', default=1))
+# Журнал запросов к БД дольше порога в мс (core.slowlog), 0 - выключен.
+SLOW_QUERY_THRESHOLD = float(
+    os.environ.get('SLOW_QUERY_THRESHOLD', default=0)
+)
+# План запроса: EXPLAIN ANALYZE на PostgreSQL повторно выполняет SELECT.
+SLOW_QUERY_EXPLAIN = int(os.environ.get('SLOW_QUERY_EXPLAIN', default=1))
+SLOW_QUERY_BUFFER_SIZE = int(
+    os.environ.get('SLOW_QUERY_BUFFER_SIZE', default=100)
+)
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
+# Cache
+# LocMemCache хранит данные в памяти процесса: при нескольких воркерах
+# gunicorn и с сервисом deleter версии ресурсов не общие, нужен общий
+# кэш - MemcachedCache (docker-compose) или FileBasedCache.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', default=300))
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -147,13 +226,17 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        'api.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.renderers.FastJSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
@@ -167,8 +250,49 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Списки API из строк values_list() без объектов моделей (api.fastlist).
+FAST_LIST_SERIALIZATION = bool(int(
+    os.environ.get('FAST_LIST_SERIALIZATION', default=1)
+))
+
+# Наибольшее число произведений в POST /api/v1/titles/batch/.
+TITLE_BATCH_MAX_SIZE = 1000
+
+# Лучшие произведения (reviews.ranking): в рейтинги попадают
+# произведения не меньше чем с LEADERBOARD_MIN_REVIEWS отзывами.
+# После изменения - команда rebuild_leaderboards.
+LEADERBOARD_MIN_REVIEWS = int(
+    os.environ.get('LEADERBOARD_MIN_REVIEWS', default=3)
+)
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX_SIZE = 100
+
+# Фоновое удаление (core.deletion, команда run_deletions): строк
+# в пачке и секунд без отчёта, после которых задача перезапускается.
+DELETION_BATCH_SIZE = int(os.environ.get('DELETION_BATCH_SIZE', default=1000))
+DELETION_JOB_TIMEOUT = 600
+
+# Кэш пользователей для JWT в памяти процесса (api.authentication):
+# только для чтения, запись всегда сверяет роль и is_active с БД.
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_USER_CACHE_TTL = 60
+
 # email settings
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 EMAIL_HOST_USER = 'yamdb@gmail.com'
+
+# Очередь писем: отправляет команда send_emails.
+EMAIL_OUTBOX_BATCH_SIZE = int(
+    os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', default=100)
+)
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(
+    os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5)
+)
+# Задержка перед повторной попыткой (с), удваивается с каждой попыткой.
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+# Секунды аренды письма воркером: после них неотправленное письмо
+# снова берётся в работу.
+EMAIL_OUTBOX_LEASE = 300
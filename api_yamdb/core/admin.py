@@ -0,0 +1,34 @@
+from django.contrib import admin
+
+from .models import DeletionJob, EmailOutbox, SlowQuery
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts',
+                    'created', 'sent')
+    search_fields = ('recipients',)
+    list_filter = ('status',)
+    readonly_fields = ('created', 'sent', 'last_error')
+    empty_value_display = '-пусто-'
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('model', 'object_repr', 'status', 'rows_deleted',
+                    'rows_updated', 'created', 'finished')
+    search_fields = ('object_repr',)
+    list_filter = ('status', 'model')
+    readonly_fields = ('created', 'started', 'finished', 'heartbeat',
+                       'last_error')
+    empty_value_display = '-пусто-'
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('view', 'duration', 'database', 'created', 'sql')
+    search_fields = ('sql', 'view')
+    list_filter = ('view', 'database')
+    readonly_fields = ('created', 'view', 'database', 'fingerprint', 'sql',
+                       'params', 'duration', 'explain')
+    empty_value_display = '-пусто-'
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .metrics import connection_opened, ensure_connection
+
+        connection_created.connect(connection_opened)
+        BaseDatabaseWrapper.ensure_connection = ensure_connection
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+def is_process_local(alias: str = None) -> bool:
+    """Кэш в памяти процесса: другие процессы и воркеры его не видят."""
+    return isinstance(
+        caches[alias or settings.RESPONSE_CACHE_ALIAS], LocMemCache
+    )
+
+
+def require_shared_cache(feature: str, alias: str = None) -> None:
+    """
+    Кэш, общий для всех процессов (memcached, файловый): версии
+    ресурсов и метки, записанные одним процессом, должны видеть
+    воркеры web.
+    """
+    if is_process_local(alias):
+        raise ImproperlyConfigured(
+            f'{feature}: нужен общий для процессов кэш, LocMemCache '
+            f'хранит данные в памяти одного процесса (CACHE_BACKEND)'
+        )
@@ -0,0 +1,173 @@
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from .models import DeletionJob
+
+# Шаг удаления: обрабатывает одну пачку и возвращает
+# (удалено строк, изменено строк); (0, 0) - шаг завершён.
+Step = Callable[[int], Tuple[int, int]]
+
+# Шаги удаления по моделям: {модель: функция(объект) -> шаги}.
+_plans = {}
+
+
+class JobResult(NamedTuple):
+    job: DeletionJob
+    elapsed: float
+
+
+def register(model: models.Model) -> Callable:
+    """
+    Декоратор плана удаления модели.
+
+    План - функция объекта, возвращающая шаги (:obj:`Step`). Шаги
+    выполняются по порядку, каждый - пока не вернёт (0, 0); после
+    них объект удаляется обычным delete(), которому уже нечего
+    собирать по каскаду.
+    """
+    def decorator(plan: Callable[[models.Model], Iterable[Step]]):
+        _plans[model] = plan
+        return plan
+    return decorator
+
+
+def model_label(model: models.Model) -> str:
+    return model._meta.label_lower
+
+
+def hide_deleted(queryset: QuerySet) -> QuerySet:
+    """Запрос без объектов, поставленных в очередь на удаление."""
+    return queryset.exclude(pk__in=DeletionJob.objects.filter(
+        model=model_label(queryset.model), status__in=DeletionJob.ACTIVE,
+    ).values('object_id'))
+
+
+def pending_ids(*models: models.Model) -> Dict[models.Model, set]:
+    """id объектов моделей в очереди на удаление, одним запросом."""
+    labels = {model_label(model): model for model in models}
+    ids = {model: set() for model in models}
+    for label, object_id in DeletionJob.objects.filter(
+        model__in=labels, status__in=DeletionJob.ACTIVE,
+    ).values_list('model', 'object_id'):
+        ids[labels[label]].add(object_id)
+    return ids
+
+
+def schedule_deletion(obj: models.Model) -> DeletionJob:
+    """Ставит объект в очередь на удаление."""
+    if type(obj) not in _plans:
+        raise TypeError(f'Нет плана удаления {type(obj).__name__}')
+    return DeletionJob.objects.create(
+        model=model_label(type(obj)),
+        object_id=obj.pk,
+        object_repr=str(obj)[:200],
+    )
+
+
+def delete_chunk(queryset: QuerySet, batch_size: int) -> Tuple[int, int]:
+    """
+    Удаляет пачку строк запроса.
+
+    delete() по списку id: каскад и сигналы отрабатывают, но в памяти
+    не больше batch_size объектов (и их зависимых строк).
+    """
+    ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0, 0
+    deleted, _ = queryset.model._base_manager.filter(pk__in=ids).delete()
+    return deleted, 0
+
+
+def update_chunk(queryset: QuerySet, batch_size: int, **values) -> list:
+    """Обновляет пачку строк запроса, возвращает их id."""
+    ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+    if ids:
+        queryset.model._base_manager.filter(pk__in=ids).update(**values)
+    return ids
+
+
+def claim_job() -> Optional[DeletionJob]:
+    """
+    Берёт задачу из очереди.
+
+    Задача, воркер которой не отчитывался DELETION_JOB_TIMEOUT
+    секунд, считается брошенной и выполняется заново: шаги заново
+    выбирают оставшиеся строки, поэтому повтор безопасен.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.DELETION_JOB_TIMEOUT)
+    with transaction.atomic():
+        job = DeletionJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status=DeletionJob.PENDING)
+            | Q(status=DeletionJob.RUNNING, heartbeat__lt=stale)
+        ).order_by('created', 'id').first()
+        if job is None:
+            return None
+        job.status = DeletionJob.RUNNING
+        job.started = job.started or timezone.now()
+        job.save(update_fields=('status', 'started', 'heartbeat'))
+    return job
+
+
+def get_job_model(job: DeletionJob) -> models.Model:
+    for model in _plans:
+        if model_label(model) == job.model:
+            return model
+    raise LookupError(f'Нет плана удаления {job.model}')
+
+
+def report_progress(job: DeletionJob, deleted: int, updated: int) -> None:
+    DeletionJob.objects.filter(pk=job.pk).update(
+        rows_deleted=F('rows_deleted') + deleted,
+        rows_updated=F('rows_updated') + updated,
+        heartbeat=timezone.now(),
+    )
+
+
+def run_job(job: DeletionJob, batch_size: int = None) -> None:
+    """
+    Выполняет задачу: каждая пачка - отдельная транзакция,
+    поэтому блокировки держатся недолго.
+    """
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    model = get_job_model(job)
+    obj = model._base_manager.filter(pk=job.object_id).first()
+    if obj is not None:
+        for step in _plans[model](obj):
+            while True:
+                with transaction.atomic():
+                    deleted, updated = step(batch_size)
+                    report_progress(job, deleted, updated)
+                if not deleted and not updated:
+                    break
+        with transaction.atomic():
+            deleted, _ = obj.delete()
+            report_progress(job, deleted, 0)
+    DeletionJob.objects.filter(pk=job.pk).update(
+        status=DeletionJob.DONE, finished=timezone.now(), last_error=''
+    )
+
+
+def run_next_job(batch_size: int = None) -> Optional[JobResult]:
+    """Выполняет следующую задачу очереди; None, если очередь пуста."""
+    job = claim_job()
+    if job is None:
+        return None
+    started = time.monotonic()
+    try:
+        run_job(job, batch_size)
+    except Exception as error:
+        # save(), а не update(): по post_save объект снова
+        # показывается в API (см. api.signals).
+        job.refresh_from_db()
+        job.status = DeletionJob.FAILED
+        job.last_error = f'{type(error).__name__}: {error}'
+        job.save(update_fields=('status', 'last_error'))
+    job.refresh_from_db()
+    return JobResult(job, time.monotonic() - started)
@@ -0,0 +1,66 @@
+import time
+
+from core.caches import require_shared_cache
+from core.deletion import run_next_job
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Выполнение задач фонового удаления DeletionJob'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.DELETION_BATCH_SIZE,
+            help='Количество строк, удаляемых одной транзакцией',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить поставленные задачи и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше 0')
+        try:
+            # Шаги удаления обновляют версии кэша ответов web.
+            require_shared_cache('run_deletions')
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        while True:
+            try:
+                result = run_next_job(options['batch_size'])
+            except Exception as error:
+                if options['once']:
+                    raise CommandError(error)
+                self.stderr.write(f'Очередь удаления недоступна: {error}')
+                time.sleep(options['interval'])
+                continue
+            if result is not None:
+                self.report(result.job, result.elapsed)
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def report(self, job, elapsed: float) -> None:
+        message = (
+            f'{job.model} {job.object_repr}: {job.get_status_display()}, '
+            f'удалено {job.rows_deleted}, изменено {job.rows_updated} '
+            f'строк за {elapsed:.2f} с'
+        )
+        if job.last_error:
+            message = f'{message} ({job.last_error})'
+            self.stderr.write(message)
+            return
+        self.stdout.write(message)
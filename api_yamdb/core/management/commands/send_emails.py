@@ -0,0 +1,60 @@
+import time
+
+from core.outbox import send_batch
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди EmailOutbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Количество писем, отправляемых через одно соединение',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить письма, срок которых наступил, и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше 0')
+        sent = failed = 0
+        started = time.monotonic()
+        while True:
+            try:
+                result = send_batch(options['batch_size'])
+            except Exception as error:
+                if options['once']:
+                    raise CommandError(error)
+                self.stderr.write(f'Почтовый сервер недоступен: {error}')
+                time.sleep(options['interval'])
+                continue
+            if result.sent or result.failed:
+                sent += result.sent
+                failed += result.failed
+                self.report(result.sent, result.failed, result.elapsed)
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.report(sent, failed, time.monotonic() - started, 'Итого: ')
+
+    def report(self, sent: int, failed: int, elapsed: float,
+               prefix: str = '') -> None:
+        rate = sent / elapsed if elapsed else sent
+        self.stdout.write(
+            f'{prefix}отправлено {sent}, ошибок {failed} '
+            f'за {elapsed:.2f} с ({rate:.1f} писем/с)'
+        )
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from core.models import SlowQuery
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Медленные запросы к БД с наибольшим суммарным временем'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Количество запросов в отчёте',
+        )
+        parser.add_argument(
+            '--hours',
+            type=float,
+            help='Только запросы за последние часы',
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Вывести план последнего выполнения запроса',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Очистить журнал медленных запросов',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(f'Удалено записей: {deleted}')
+            return
+        if options['limit'] < 1:
+            raise CommandError('--limit должен быть больше 0')
+        queries = SlowQuery.objects.all()
+        if options['hours'] is not None:
+            queries = queries.filter(
+                created__gte=timezone.now() - timedelta(
+                    hours=options['hours']
+                )
+            )
+        offenders = queries.values('fingerprint').annotate(
+            total=Sum('duration'), count=Count('id'),
+            average=Avg('duration'), longest=Max('duration'),
+        ).order_by('-total', 'fingerprint')[:options['limit']]
+        if not offenders:
+            self.stdout.write('Журнал медленных запросов пуст')
+            return
+        for number, offender in enumerate(offenders, 1):
+            self.report(number, offender, queries, options['explain'])
+
+    def report(self, number: int, offender: dict, queries,
+               explain: bool) -> None:
+        sample = queries.filter(
+            fingerprint=offender['fingerprint']
+        ).order_by('-created', '-id').first()
+        views = ', '.join(sorted(set(queries.filter(
+            fingerprint=offender['fingerprint']
+        ).values_list('view', flat=True)))) or '-'
+        self.stdout.write(
+            f'{number}. {offender["total"]:.1f} мс всего, '
+            f'{offender["count"]} раз, в среднем '
+            f'{offender["average"]:.1f} мс, максимум '
+            f'{offender["longest"]:.1f} мс; view: {views}'
+        )
+        self.stdout.write(f'   {sample.sql}')
+        if explain and sample.explain:
+            for line in sample.explain.splitlines():
+                self.stdout.write(f'   | {line}')
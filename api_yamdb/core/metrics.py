@@ -0,0 +1,286 @@
+import bisect
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+from . import slowlog
+
+# Счётчики текущего запроса: см. start_request.
+_request_stats = ContextVar('request_stats', default=None)
+_lock = threading.Lock()
+
+# Границы корзин гистограммы длительности запросов, секунды.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Имя, тип и описание показателей export().
+METRICS = (
+    ('request_duration_seconds', 'histogram', 'Длительность запросов.'),
+    ('responses_total', 'counter', 'Ответы по классам статуса.'),
+    ('db_queries_total', 'counter', 'Запросы к БД.'),
+    ('db_seconds_total', 'counter', 'Время запросов к БД.'),
+    ('serialize_seconds_total', 'counter',
+     'Время сериализации и рендеринга ответов.'),
+    ('response_bytes_total', 'counter', 'Размер тел ответов.'),
+    ('db_connections_opened_total', 'counter', 'Новые соединения с БД.'),
+    ('db_connections_reused_total', 'counter',
+     'Переиспользованные постоянные соединения с БД.'),
+    ('db_connection_wait_seconds_total', 'counter',
+     'Время проверки и переподключения соединений с БД.'),
+)
+
+
+class RequestStats:
+    """
+    Счётчики запроса. Подключения к БД: открыто новых, переиспользовано
+    открытых с прошлых запросов и ожидание (секунды) на их проверку
+    и переподключение. Запросы к БД и их время, время сериализации.
+    Медленные запросы (см. :obj:`core.slowlog`) копятся в slow_queries,
+    если задан slow_threshold (секунды).
+    """
+    COUNTERS = (
+        'opened', 'reused', 'wait', 'queries', 'db_time', 'serialize_time'
+    )
+    __slots__ = COUNTERS + ('view', 'slow_threshold', 'slow_queries')
+
+    def __init__(self, slow_threshold: Optional[float] = None):
+        self.opened = 0
+        self.reused = 0
+        self.wait = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.view = ''
+        self.slow_threshold = slow_threshold
+        self.slow_queries = []
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.COUNTERS}
+
+
+class ViewStats:
+    """Накопленные показатели одного view и метода HTTP."""
+    __slots__ = (
+        'buckets', 'count', 'duration', 'queries', 'db_time',
+        'serialize_time', 'response_bytes', 'statuses',
+    )
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.response_bytes = 0
+        self.statuses = defaultdict(int)
+
+
+# Итог процесса с момента запуска.
+_totals = RequestStats()
+_views = defaultdict(ViewStats)
+
+
+def start_request(slow_threshold: Optional[float] = None) -> Token:
+    """Новые счётчики для запроса; сброс - :obj:`finish_request`."""
+    return _request_stats.set(RequestStats(slow_threshold))
+
+
+def finish_request(token: Token) -> None:
+    _request_stats.reset(token)
+
+
+def get_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def get_totals() -> dict:
+    with _lock:
+        return _totals.as_dict()
+
+
+def record(opened: int = 0, reused: int = 0, wait: float = 0.0) -> None:
+    request_stats = _request_stats.get()
+    with _lock:
+        for stats in (_totals, request_stats):
+            if stats is not None:
+                stats.opened += opened
+                stats.reused += reused
+                stats.wait += wait
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    execute_wrapper: число и время запросов к БД текущего запроса,
+    медленные запросы.
+    """
+    started = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += duration
+    if (stats is not None and stats.slow_threshold is not None
+            and duration >= stats.slow_threshold):
+        stats.slow_queries.append(slowlog.capture(
+            context['connection'], sql, params, duration, stats.view, many
+        ))
+    return result
+
+
+@contextmanager
+def time_serialization():
+    """Время блока без запросов к БД - сериализация текущего запроса."""
+    stats = _request_stats.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    db_time = stats.db_time
+    try:
+        yield
+    finally:
+        stats.serialize_time += (
+            time.perf_counter() - started - (stats.db_time - db_time)
+        )
+
+
+def observe(view: str, method: str, status: int, duration: float,
+            stats: RequestStats, response_bytes: int) -> None:
+    """Учёт завершённого запроса в показателях view."""
+    bucket = bisect.bisect_left(LATENCY_BUCKETS, duration)
+    with _lock:
+        view_stats = _views[view, method]
+        view_stats.buckets[bucket] += 1
+        view_stats.count += 1
+        view_stats.duration += duration
+        view_stats.queries += stats.queries
+        view_stats.db_time += stats.db_time
+        view_stats.serialize_time += stats.serialize_time
+        view_stats.response_bytes += response_bytes
+        view_stats.statuses[f'{status // 100}xx'] += 1
+        _totals.queries += stats.queries
+        _totals.db_time += stats.db_time
+        _totals.serialize_time += stats.serialize_time
+
+
+def reset() -> None:
+    """Сброс накопленных показателей процесса."""
+    with _lock:
+        _totals.__init__()
+        _views.clear()
+
+
+def view_series(series: dict, labels: str, stats: ViewStats) -> None:
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+        cumulative += count
+        series['request_duration_seconds'].append(
+            f'_bucket{{{labels},le="{bound}"}} {cumulative}'
+        )
+    series['request_duration_seconds'].extend((
+        f'_bucket{{{labels},le="+Inf"}} {stats.count}',
+        f'_sum{{{labels}}} {stats.duration}',
+        f'_count{{{labels}}} {stats.count}',
+    ))
+    for status, count in sorted(stats.statuses.items()):
+        series['responses_total'].append(
+            f'{{{labels},status="{status}"}} {count}'
+        )
+    for name, value in (('db_queries_total', stats.queries),
+                        ('db_seconds_total', stats.db_time),
+                        ('serialize_seconds_total', stats.serialize_time),
+                        ('response_bytes_total', stats.response_bytes)):
+        series[name].append(f'{{{labels}}} {value}')
+
+
+def export() -> str:
+    """
+    Показатели процесса в текстовом формате Prometheus 0.0.4.
+
+    Каждый воркер gunicorn считает свои запросы: метка pid различает
+    воркеры, суммирование - на стороне Prometheus.
+    """
+    pid = os.getpid()
+    series = defaultdict(list)
+    with _lock:
+        for (view, method), stats in sorted(_views.items()):
+            view_series(
+                series, f'pid="{pid}",view="{view}",method="{method}"',
+                stats
+            )
+        for name, key in (('db_connections_opened_total', 'opened'),
+                          ('db_connections_reused_total', 'reused'),
+                          ('db_connection_wait_seconds_total', 'wait')):
+            series[name].append(
+                f'{{pid="{pid}"}} {getattr(_totals, key)}'
+            )
+    lines = []
+    for name, kind, description in METRICS:
+        lines.append(f'# HELP yamdb_{name} {description}')
+        lines.append(f'# TYPE yamdb_{name} {kind}')
+        lines.extend(f'yamdb_{name}{sample}' for sample in series[name])
+    return '\n'.join(lines) + '\n'
+
+
+def connection_opened(sender, connection, **kwargs) -> None:
+    """Сигнал connection_created: новое соединение с БД."""
+    record(opened=1)
+
+
+def check_connections() -> None:
+    """
+    Отмечает соединения, оставшиеся открытыми с прошлых запросов
+    (CONN_MAX_AGE), для проверки при первом обращении в этом запросе
+    (см. :obj:`ensure_connection`). Без обращений к БД: соединения,
+    которые запрос не использует (например, реплики), не проверяются.
+    """
+    for connection in connections.all():
+        connection.health_check_pending = connection.connection is not None
+
+
+def check_connection(connection: BaseDatabaseWrapper) -> None:
+    """
+    Проверка открытого соединения перед первым запросом к БД.
+
+    Устаревшие соединения к этому моменту закрыл close_old_connections
+    Django (сигнал request_started). Оборванное соединение (перезапуск БД,
+    PgBouncer закрыл клиента) закрывается, и вместо ошибки в ответе
+    открывается новое. Проверку отключает DATABASE_HEALTH_CHECKS.
+    """
+    started = time.perf_counter()
+    if (settings.DATABASE_HEALTH_CHECKS
+            and not connection.in_atomic_block
+            and not connection.is_usable()):
+        connection.close()
+        record(wait=time.perf_counter() - started)
+        return
+    record(reused=1, wait=time.perf_counter() - started)
+
+
+_ensure_connection = BaseDatabaseWrapper.ensure_connection
+
+
+def ensure_connection(self: BaseDatabaseWrapper) -> None:
+    """
+    BaseDatabaseWrapper.ensure_connection с проверкой соединения,
+    отмеченного :obj:`check_connections` (как CONN_HEALTH_CHECKS
+    в Django 4.1). Подключается в :obj:`core.apps.CoreConfig`.
+    """
+    if getattr(self, 'health_check_pending', False):
+        self.health_check_pending = False
+        if self.connection is not None:
+            check_connection(self)
+    _ensure_connection(self)
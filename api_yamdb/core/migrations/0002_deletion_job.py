@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(help_text='app_label.model_name', max_length=100, verbose_name='Модель')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('object_repr', models.CharField(max_length=200, verbose_name='Объект')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('running', 'Выполняется'), ('done', 'Выполнено'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('rows_deleted', models.PositiveIntegerField(default=0, verbose_name='Удалено строк')),
+                ('rows_updated', models.PositiveIntegerField(default=0, verbose_name='Изменено строк')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Начало выполнения')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Окончание выполнения')),
+                ('heartbeat', models.DateTimeField(auto_now=True, verbose_name='Последняя активность')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+            ],
+            options={
+                'verbose_name': 'Задача удаления',
+                'verbose_name_plural': 'Задачи удаления',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='deletionjob',
+            index=models.Index(fields=['model', 'status', 'object_id'], name='deletion_job_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletionjob',
+            index=models.Index(fields=['status', 'created', 'id'], name='deletion_job_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_deletion_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='View')),
+                ('database', models.CharField(max_length=100, verbose_name='БД')),
+                ('fingerprint', models.CharField(db_index=True, max_length=32, verbose_name='Отпечаток SQL')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('params', models.TextField(blank=True, verbose_name='Параметры')),
+                ('duration', models.FloatField(verbose_name='Длительность, мс')),
+                ('explain', models.TextField(blank=True, verbose_name='План запроса')),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CommonFieldsModel(models.Model):
@@ -18,3 +19,217 @@ class CommonFieldsModel(models.Model):
 
     def __str__(self):
         return self.text
+
+
+class EmailOutbox(models.Model):
+    """
+    Исходящее письмо.
+
+    Письма сохраняются в таблицу в транзакции запроса и отправляются
+    командой send_emails, поэтому ответ API не ждёт SMTP-сервер.
+    Письмо в статусе sending занято воркером до send_after (аренда):
+    если воркер не записал результат, письмо снова берётся в работу.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+    QUEUED = (PENDING, SENDING)
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=255,
+    )
+    body = models.TextField(
+        verbose_name='Текст',
+    )
+    from_email = models.CharField(
+        verbose_name='Отправитель',
+        max_length=254,
+        blank=True,
+    )
+    recipients = models.TextField(
+        verbose_name='Получатели',
+        help_text='По одному адресу в строке',
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попытки отправки',
+        default=0,
+    )
+    send_after = models.DateTimeField(
+        verbose_name='Отправить не раньше',
+        default=timezone.now,
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+    sent = models.DateTimeField(
+        verbose_name='Дата отправки',
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (models.Index(
+            fields=('status', 'send_after', 'id'),
+            name='email_outbox_queue_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.subject}: {self.recipients}'
+
+
+class DeletionJob(models.Model):
+    """
+    Фоновое удаление объекта с большим каскадом.
+
+    Запрос API только ставит задачу, объект сразу скрывается из API
+    (см. :obj:`core.deletion.hide_deleted`). Команда run_deletions
+    удаляет зависимые строки пачками и затем сам объект. Задача
+    с ошибкой снова открывает объект в API: удаление можно повторить,
+    шаги выбирают оставшиеся строки заново.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнено'),
+        (FAILED, 'Ошибка'),
+    )
+    # Объект таких задач ещё существует, но скрыт из API.
+    ACTIVE = (PENDING, RUNNING)
+    model = models.CharField(
+        verbose_name='Модель',
+        max_length=100,
+        help_text='app_label.model_name',
+    )
+    object_id = models.PositiveIntegerField(
+        verbose_name='id объекта',
+    )
+    object_repr = models.CharField(
+        verbose_name='Объект',
+        max_length=200,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    rows_deleted = models.PositiveIntegerField(
+        verbose_name='Удалено строк',
+        default=0,
+    )
+    rows_updated = models.PositiveIntegerField(
+        verbose_name='Изменено строк',
+        default=0,
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+    started = models.DateTimeField(
+        verbose_name='Начало выполнения',
+        null=True,
+        blank=True,
+    )
+    finished = models.DateTimeField(
+        verbose_name='Окончание выполнения',
+        null=True,
+        blank=True,
+    )
+    heartbeat = models.DateTimeField(
+        verbose_name='Последняя активность',
+        auto_now=True,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Задача удаления'
+        verbose_name_plural = 'Задачи удаления'
+        indexes = (
+            models.Index(
+                fields=('model', 'status', 'object_id'),
+                name='deletion_job_object_idx'),
+            models.Index(
+                fields=('status', 'created', 'id'),
+                name='deletion_job_queue_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.model} {self.object_repr}: {self.status}'
+
+
+class SlowQuery(models.Model):
+    """
+    Запрос к БД дольше SLOW_QUERY_THRESHOLD (см. :obj:`core.slowlog`).
+
+    Запросы с одинаковым текстом SQL (с точностью до длины списков
+    IN) имеют одинаковый fingerprint: по нему команда slow_queries
+    суммирует время.
+    """
+    created = models.DateTimeField(
+        verbose_name='Дата',
+        auto_now_add=True,
+        db_index=True,
+    )
+    view = models.CharField(
+        verbose_name='View',
+        max_length=200,
+        blank=True,
+    )
+    database = models.CharField(
+        verbose_name='БД',
+        max_length=100,
+    )
+    fingerprint = models.CharField(
+        verbose_name='Отпечаток SQL',
+        max_length=32,
+        db_index=True,
+    )
+    sql = models.TextField(
+        verbose_name='SQL',
+    )
+    params = models.TextField(
+        verbose_name='Параметры',
+        blank=True,
+    )
+    duration = models.FloatField(
+        verbose_name='Длительность, мс',
+    )
+    explain = models.TextField(
+        verbose_name='План запроса',
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        ordering = ('-created',)
+
+    def __str__(self):
+        return f'{self.view}: {self.duration:.1f} мс'
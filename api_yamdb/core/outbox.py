@@ -0,0 +1,136 @@
+import time
+from datetime import timedelta
+from typing import NamedTuple, Sequence
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+
+class BatchResult(NamedTuple):
+    sent: int
+    failed: int
+    elapsed: float
+
+
+def enqueue_mail(subject: str, message: str, from_email: str,
+                 recipient_list: Sequence[str]) -> EmailOutbox:
+    """Ставит письмо в очередь; аргументы как у send_mail."""
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or '',
+        recipients='\n'.join(recipient_list),
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Экспоненциальная задержка перед следующей попыткой."""
+    seconds = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(
+        seconds=min(seconds, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY)
+    )
+
+
+def build_message(email: EmailOutbox, connection) -> EmailMessage:
+    return EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or None,
+        to=email.recipients.splitlines(),
+        connection=connection,
+    )
+
+
+def mark_failed(email: EmailOutbox, error: Exception) -> None:
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = EmailOutbox.FAILED
+    else:
+        email.status = EmailOutbox.PENDING
+        email.send_after = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=(
+        'attempts', 'last_error', 'status', 'send_after'
+    ))
+
+
+def claim_batch(batch_size: int) -> list:
+    """
+    Берёт в работу пачку писем, срок отправки которых наступил, и
+    письма с истёкшей арендой (воркер завершился, не записав
+    результат).
+
+    Короткая транзакция: строки блокируются (SKIP LOCKED) только на
+    время смены статуса на sending и продления send_after на
+    EMAIL_OUTBOX_LEASE секунд, поэтому несколько воркеров не возьмут
+    одно письмо, а блокировки не держатся во время SMTP.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+                status__in=EmailOutbox.QUEUED, send_after__lte=now
+            ).order_by('send_after', 'id')[:batch_size]
+        )
+        EmailOutbox.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(
+            status=EmailOutbox.SENDING,
+            send_after=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE),
+        )
+    return emails
+
+
+def send_batch(batch_size: int = None) -> BatchResult:
+    """
+    Отправляет пачку писем, срок отправки которых наступил.
+
+    Письма занимаются :obj:`claim_batch`, отправляются вне транзакции
+    через одно соединение почтового бэкенда, результат записывается
+    после отправки. Неотправленное письмо откладывается
+    с экспоненциальной задержкой, после EMAIL_OUTBOX_MAX_ATTEMPTS
+    попыток помечается как failed.
+    """
+    started = time.monotonic()
+    emails = claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not emails:
+        return BatchResult(0, 0, time.monotonic() - started)
+    sent_ids = []
+    failed_ids = []
+    try:
+        with get_connection() as connection:
+            for email in emails:
+                try:
+                    connection.send_messages(
+                        [build_message(email, connection)]
+                    )
+                except Exception as error:
+                    mark_failed(email, error)
+                    failed_ids.append(email.pk)
+                else:
+                    sent_ids.append(email.pk)
+    except Exception:
+        # Почтовый сервер недоступен: остальные письма - снова в очередь.
+        EmailOutbox.objects.filter(
+            pk__in=[email.pk for email in emails],
+            status=EmailOutbox.SENDING,
+        ).exclude(pk__in=sent_ids + failed_ids).update(
+            status=EmailOutbox.PENDING, send_after=timezone.now()
+        )
+        raise
+    finally:
+        # Отправленные до ошибки соединения не уйдут повторно.
+        EmailOutbox.objects.filter(pk__in=sent_ids).update(
+            status=EmailOutbox.SENT,
+            sent=timezone.now(),
+            attempts=F('attempts') + 1,
+            last_error='',
+        )
+    return BatchResult(
+        len(sent_ids), len(failed_ids), time.monotonic() - started
+    )
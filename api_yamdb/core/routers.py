@@ -0,0 +1,55 @@
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Реплика для чтений текущего запроса; None - основная БД.
+_replica = ContextVar('replica', default=None)
+
+
+def set_replica(alias: Optional[str]) -> Token:
+    """Направляет чтения текущего контекста в реплику alias."""
+    return _replica.set(alias)
+
+
+def reset_replica(token: Token) -> None:
+    _replica.reset(token)
+
+
+def use_primary() -> None:
+    """Оставшиеся чтения текущего запроса - из основной БД."""
+    _replica.set(None)
+
+
+def get_replica() -> Optional[str]:
+    return _replica.get()
+
+
+class ReplicaRouter:
+    """
+    Чтение из реплик, запись в основную БД.
+
+    В реплику идут только чтения контекста, для которого реплику
+    выбрал :obj:`api.middleware.ReplicaRoutingMiddleware` (безопасные
+    методы без недавних записей), и только вне транзакции. Команды
+    управления, shell и миграции работают с основной БД.
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        replica = _replica.get()
+        if (replica is None
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints) -> str:
+        # Явно: иначе объект, прочитанный из реплики, сохранялся бы в неё.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        return {obj1._state.db, obj2._state.db} <= databases
+
+    def allow_migrate(self, db: str, app_label: str, **hints) -> bool:
+        return db == DEFAULT_DB_ALIAS
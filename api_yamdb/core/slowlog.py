@@ -0,0 +1,102 @@
+import hashlib
+import re
+import threading
+from collections import deque
+from typing import List
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import SlowQuery
+
+# Списки IN разной длины - один и тот же запрос.
+IN_LIST_RE = re.compile(r'\((?:%s, )+%s\)')
+SAVEPOINT = 'yamdb_explain'
+
+# Последние медленные запросы процесса.
+_buffer = deque(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
+_lock = threading.Lock()
+
+
+def fingerprint(sql: str) -> str:
+    return hashlib.md5(
+        IN_LIST_RE.sub('(%s, ...)', sql).encode('utf-8')
+    ).hexdigest()
+
+
+def run_explain(connection, sql: str, params) -> str:
+    cursor = connection.create_cursor()
+    # Ошибка EXPLAIN в транзакции PostgreSQL прервала бы транзакцию
+    # запроса: выполняем его в точке сохранения.
+    savepoint = (connection.vendor == 'postgresql'
+                 and not connection.get_autocommit())
+    options = {'analyze': True} if connection.vendor == 'postgresql' else {}
+    try:
+        if savepoint:
+            cursor.execute(f'SAVEPOINT {SAVEPOINT}')
+        try:
+            cursor.execute(
+                f'{connection.ops.explain_query_prefix(**options)} {sql}',
+                params
+            )
+            plan = '\n'.join(str(row[-1]) for row in cursor.fetchall())
+        except connection.Database.DatabaseError as error:
+            if savepoint:
+                cursor.execute(f'ROLLBACK TO SAVEPOINT {SAVEPOINT}')
+            return f'EXPLAIN: {error}'
+        if savepoint:
+            cursor.execute(f'RELEASE SAVEPOINT {SAVEPOINT}')
+        return plan
+    finally:
+        cursor.close()
+
+
+def explain(connection, sql: str, params) -> str:
+    """
+    План запроса: EXPLAIN ANALYZE на PostgreSQL, EXPLAIN QUERY PLAN
+    на SQLite.
+
+    Только для SELECT: ANALYZE выполняет запрос повторно. EXPLAIN
+    выполняется курсором без execute_wrapper и не попадает
+    в показатели запроса.
+    """
+    if (not settings.SLOW_QUERY_EXPLAIN
+            or not sql.lstrip()[:6].upper() == 'SELECT'):
+        return ''
+    return run_explain(connection, sql, params)
+
+
+def capture(connection, sql: str, params, duration: float,
+            view: str, many: bool = False) -> dict:
+    """Образец медленного запроса; добавляется в кольцевой буфер."""
+    sample = {
+        'created': timezone.now(),
+        'view': view,
+        'database': connection.alias,
+        'fingerprint': fingerprint(sql),
+        'sql': sql,
+        'params': repr(params),
+        'duration': duration * 1000,
+        'explain': '' if many else explain(connection, sql, params),
+    }
+    with _lock:
+        _buffer.append(sample)
+    return sample
+
+
+def get_recent() -> List[dict]:
+    """Медленные запросы процесса, новые первыми."""
+    with _lock:
+        return list(reversed(_buffer))
+
+
+def clear_recent() -> None:
+    with _lock:
+        _buffer.clear()
+
+
+def save(samples: List[dict]) -> None:
+    """Журнал медленных запросов для админки и команды slow_queries."""
+    SlowQuery.objects.bulk_create(
+        SlowQuery(**sample) for sample in samples
+    )
@@ -32,9 +32,10 @@ class GenreAdmin(admin.ModelAdmin):
 
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
-    list_display = ('name', 'year', 'category')
+    list_display = ('name', 'year', 'category', 'rating')
     search_fields = ('name',)
     list_filter = ('category',)
+    readonly_fields = Title.RATING_FIELDS
     empty_value_display = '-пусто-'
 
 
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     name = 'reviews'
+
+    def ready(self):
+        from . import signals
+
+        post_migrate.connect(signals.restore_search_triggers, sender=self)
@@ -1,10 +1,26 @@
 import csv
+import gzip
+import io
+import json
+import os
+import time
+from itertools import islice
 
 from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connections, transaction
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, User)
 
+from ._ratings import rebuild_ratings
+
 PROJECT_DIR = settings.BASE_DIR
+DATA_DIR = f'{PROJECT_DIR}/static/data'
+BATCH_SIZE = 1000
+# NULL в CSV: пустая строка в текстовом поле остаётся пустой строкой.
+CSV_NULL = '\\N'
+# Форматы файлов в порядке поиска при загрузке.
+FORMATS = ('csv', 'jsonl')
 
 MODEL_DICT = {
     User: 'user.csv',
@@ -17,11 +33,168 @@ MODEL_DICT = {
 }
 
 
-def cvs_to_dj_model():
-    """Функция конвертора данных cvs to db.sqlite3 средствами Django"""
+def data_file_name(csv_name: str, fmt: str = 'csv',
+                   compress: bool = False) -> str:
+    """Имя файла модели в формате fmt: review.csv -> review.jsonl.gz."""
+    name = f'{os.path.splitext(csv_name)[0]}.{fmt}'
+    return f'{name}.gz' if compress else name
+
+
+def find_data_file(data_dir: str, csv_name: str) -> str:
+    """Первый найденный файл модели: CSV или JSONL, в т.ч. сжатый gzip."""
+    candidates = [
+        os.path.join(data_dir, data_file_name(csv_name, fmt, compress))
+        for fmt in FORMATS for compress in (False, True)
+    ]
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f'Нет файла данных для {csv_name} в {data_dir}')
+
+
+def open_data_file(path: str, mode: str = 'r',
+                   buffering: int = io.DEFAULT_BUFFER_SIZE):
+    """Открывает файл данных в текстовом режиме, *.gz - через gzip."""
+    if not path.endswith('.gz'):
+        return open(path, mode, buffering=buffering, newline='',
+                    encoding='utf-8')
+    binary = gzip.open(path, f'{mode}b')
+    if mode == 'w':
+        binary = io.BufferedWriter(binary, buffering)
+    return io.TextIOWrapper(binary, encoding='utf-8', newline='')
+
+
+def read_rows(file, path: str):
+    """Строки файла данных как словари: CSV с заголовком или JSONL."""
+    if '.jsonl' in os.path.basename(path):
+        return (json.loads(line) for line in file if line.strip())
+    return (
+        {key: None if value == CSV_NULL else value
+         for key, value in row.items()}
+        for row in csv.DictReader(file)
+    )
+
+
+def read_batches(rows, model, batch_size: int):
+    """Отдаёт объекты модели пачками по batch_size."""
+    while True:
+        batch = [model(**data) for data in islice(rows, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def prepare_row(obj, fields, connection) -> list:
+    """
+    Значения полей объекта для записи в БД.
+
+    Даты из CSV сохраняются как есть: auto_now_add подставляет
+    текущее время только в пустые поля. Пустая строка CSV в
+    nullable-поле, не допускающем пустых строк (внешний ключ,
+    число, дата), означает NULL.
+    """
+    row = []
+    for field in fields:
+        value = getattr(obj, field.attname)
+        if value == '' and field.null and not field.empty_strings_allowed:
+            value = None
+        if value is None and getattr(field, 'auto_now_add', False):
+            value = field.pre_save(obj, add=True)
+        row.append(field.get_db_prep_save(value, connection))
+    return row
+
+
+def insert_rows(model, fields, rows, connection) -> None:
+    """Вставка подготовленных строк одним executemany."""
+    columns = ', '.join(
+        connection.ops.quote_name(field.column) for field in fields
+    )
+    placeholders = ', '.join(['%s'] * len(fields))
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} ({columns}) VALUES ({placeholders})',
+            rows
+        )
+
+
+def copy_rows(model, fields, rows, connection) -> None:
+    """Вставка подготовленных строк через COPY FROM STDIN (PostgreSQL)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            CSV_NULL if value is None else value for value in row
+        )
+    buffer.seek(0)
+    columns = ', '.join(
+        connection.ops.quote_name(field.column) for field in fields
+    )
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {table} ({columns}) FROM STDIN '
+            f"WITH (FORMAT csv, NULL '{CSV_NULL}')",
+            buffer
+        )
+
+
+def insert_batch(batch, model, fields, connection) -> None:
+    """Вставка пачки строк одним executemany."""
+    insert_rows(model, fields, [
+        prepare_row(obj, fields, connection) for obj in batch
+    ], connection)
+
+
+def copy_batch(batch, model, fields, connection) -> None:
+    """Вставка пачки строк через COPY FROM STDIN (PostgreSQL)."""
+    copy_rows(model, fields, (
+        prepare_row(obj, fields, connection) for obj in batch
+    ), connection)
+
+
+def reset_sequences(model, connection) -> None:
+    """Сдвигает последовательность id за максимальный загруженный id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def import_model(model, path: str, batch_size: int = BATCH_SIZE,
+                 use_copy: bool = True, using: str = 'default') -> int:
+    """
+    Загружает файл данных в таблицу модели в одной транзакции.
+
+    Файл читается пачками по batch_size строк, поэтому расход памяти
+    не зависит от размера файла. На PostgreSQL пачки передаются
+    через COPY, на остальных СУБД - через executemany.
+    """
+    connection = connections[using]
+    fields = model._meta.concrete_fields
+    if use_copy and connection.vendor == 'postgresql':
+        write_batch = copy_batch
+    else:
+        write_batch = insert_batch
+    rows = 0
+    with transaction.atomic(using=using):
+        with open_data_file(path) as file:
+            records = read_rows(file, path)
+            for batch in read_batches(records, model, batch_size):
+                write_batch(batch, model, fields, connection)
+                rows += len(batch)
+        reset_sequences(model, connection)
+    return rows
+
+
+def cvs_to_dj_model(batch_size: int = BATCH_SIZE, use_copy: bool = True,
+                    data_dir: str = DATA_DIR, report=None) -> None:
+    """Функция конвертора данных cvs в БД средствами Django"""
     for model, cvs_file in MODEL_DICT.items():
-        file = f'{PROJECT_DIR}/static/data/{cvs_file}'
-        with open(file, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            objs = tuple(model(**data) for data in reader)
-            model.objects.bulk_create(objs)
+        started = time.monotonic()
+        rows = import_model(
+            model, find_data_file(data_dir, cvs_file), batch_size, use_copy
+        )
+        if report is not None:
+            report(model, rows, time.monotonic() - started)
+    rebuild_ratings()
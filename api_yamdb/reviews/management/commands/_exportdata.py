@@ -0,0 +1,81 @@
+import csv
+import json
+import os
+import time
+
+from ._convertcsv import (CSV_NULL, MODEL_DICT, data_file_name,
+                          open_data_file)
+
+CHUNK_SIZE = 2000
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def fetch_rows(model, chunk_size: int = CHUNK_SIZE, using: str = 'default'):
+    """
+    Строки таблицы модели кортежами значений полей.
+
+    iterator() на PostgreSQL читает через серверный курсор пачками
+    по chunk_size, поэтому в памяти не накапливается вся таблица.
+    """
+    fields = [field.attname for field in model._meta.concrete_fields]
+    rows = model._default_manager.using(using).order_by('pk').values_list(
+        *fields
+    ).iterator(chunk_size=chunk_size)
+    return fields, rows
+
+
+def write_csv(file, fields: list, rows) -> int:
+    writer = csv.writer(file)
+    writer.writerow(fields)
+    count = 0
+    for row in rows:
+        writer.writerow(CSV_NULL if value is None else value for value in row)
+        count += 1
+    return count
+
+
+def write_jsonl(file, fields: list, rows) -> int:
+    count = 0
+    for row in rows:
+        file.write(json.dumps(
+            dict(zip(fields, row)), ensure_ascii=False, default=str
+        ))
+        file.write('\n')
+        count += 1
+    return count
+
+
+WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+}
+
+
+def export_model(model, path: str, fmt: str = 'csv',
+                 chunk_size: int = CHUNK_SIZE, using: str = 'default') -> int:
+    """Выгружает таблицу модели в файл, *.gz сжимается gzip."""
+    fields, rows = fetch_rows(model, chunk_size, using)
+    with open_data_file(path, 'w', WRITE_BUFFER_SIZE) as file:
+        return WRITERS[fmt](file, fields, rows)
+
+
+def dj_model_to_files(data_dir: str, fmt: str = 'csv',
+                      compress: bool = False, chunk_size: int = CHUNK_SIZE,
+                      report=None) -> None:
+    """
+    Выгрузка всех моделей MODEL_DICT в каталог data_dir.
+
+    Имена файлов совпадают с файлами convertcsv, поэтому выгрузку
+    можно загрузить обратно: convertcsv --data-dir <data_dir>.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    for model, cvs_file in MODEL_DICT.items():
+        started = time.monotonic()
+        rows = export_model(
+            model,
+            os.path.join(data_dir, data_file_name(cvs_file, fmt, compress)),
+            fmt,
+            chunk_size,
+        )
+        if report is not None:
+            report(model, rows, time.monotonic() - started)
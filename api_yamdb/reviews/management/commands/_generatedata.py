@@ -0,0 +1,460 @@
+import heapq
+import math
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+from multiprocessing import get_context
+from typing import Dict, Iterable, List, NamedTuple
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+from ._convertcsv import BATCH_SIZE, copy_rows, insert_rows, reset_sequences
+from ._ratings import rebuild_ratings
+
+# Строк в единице генерации: своё зерно случайных чисел и своя
+# транзакция. Результат не зависит от числа процессов и --batch-size.
+CHUNK_SIZE = 10000
+# Показатель Zipf для отзывов на произведение; для авторов отзывов
+# и комментариев, категорий и жанров - свои, более пологие.
+ZIPF_EXPONENT = 1.1
+AUTHOR_EXPONENT = 0.9
+CATALOG_EXPONENT = 0.8
+# Комментарии: индекс отзыва = число отзывов * random() ** COMMENT_SKEW.
+COMMENT_SKEW = 3
+# Отзывов на произведение больше users / SPARSE_RATIO: авторы выбираются
+# без возвращения (см. review_authors).
+SPARSE_RATIO = 20
+SCORES = range(1, 11)
+SCORE_WEIGHTS = tuple(accumulate((2, 1, 2, 3, 5, 8, 14, 20, 22, 23)))
+# Вероятности 1..4 жанров у произведения.
+GENRE_COUNTS = range(1, 5)
+GENRE_COUNT_WEIGHTS = tuple(accumulate((45, 30, 17, 8)))
+MAX_GENRES = len(GENRE_COUNTS)
+YEARS = (1900, 2021)
+DATES_START = datetime(2012, 1, 1, tzinfo=timezone.utc)
+DATES_SPAN = 10 * 365 * 24 * 3600
+WORDS = (
+    'фильм', 'книга', 'песня', 'сюжет', 'герой', 'автор', 'финал',
+    'история', 'музыка', 'роль', 'режиссёр', 'сцена', 'глава', 'образ',
+    'очень', 'совсем', 'не', 'слишком', 'удивительно', 'местами',
+    'понравился', 'затянут', 'прекрасный', 'скучный', 'яркий', 'сильный',
+    'слабый', 'неожиданный', 'добрый', 'мрачный', 'смешной', 'живой',
+    'и', 'но', 'а', 'хотя', 'в', 'на', 'с', 'про', 'как', 'ещё',
+)
+
+COLUMNS = {
+    User: ('id', 'password', 'is_superuser', 'username', 'first_name',
+           'last_name', 'email', 'is_staff', 'is_active', 'date_joined',
+           'role'),
+    Category: ('id', 'name', 'slug'),
+    Genre: ('id', 'name', 'slug'),
+    Title: ('id', 'name', 'year', 'category', 'description',
+            *Title.RATING_FIELDS),
+    GenreTitle: ('id', 'title', 'genre'),
+    Review: ('id', 'text', 'pub_date', 'title', 'author', 'score'),
+    Comment: ('id', 'text', 'pub_date', 'review', 'author'),
+}
+# Рейтинг и гистограмма новых произведений, считаются после отзывов.
+RATING_ZEROS = (0,) * len(Title.RATING_FIELDS)
+
+# Накопленные веса Zipf: вычисляются до запуска процессов и достаются
+# им при fork.
+_cum_weights = {}
+# План генерации текущего процесса (set_plan): задачи пула несут
+# только (kind, часть), план с review_counts передаётся процессу
+# один раз.
+_plan = None
+
+
+class Volumes(NamedTuple):
+    users: int
+    categories: int
+    genres: int
+    titles: int
+    reviews: int
+    comments: int
+
+
+class Plan(NamedTuple):
+    """
+    Параметры генерации. first_ids - первый id каждой модели (после
+    уже загруженных), review_counts - число отзывов каждого произведения.
+    """
+    volumes: Volumes
+    seed: int
+    first_ids: Dict[str, int]
+    review_counts: List[int]
+    batch_size: int
+    use_copy: bool
+
+
+def zipf_cum_weights(size: int, exponent: float) -> List[float]:
+    """Накопленные веса ранга r: 1 / (r + 1) ** exponent."""
+    key = (size, exponent)
+    if key not in _cum_weights:
+        _cum_weights[key] = list(accumulate(
+            1 / rank ** exponent for rank in range(1, size + 1)
+        ))
+    return _cum_weights[key]
+
+
+def allocate(total: int, size: int, exponent: float, cap: int) -> List[int]:
+    """
+    Раскладывает total по size рангам пропорционально Zipf, не больше
+    cap на ранг: остаток от округления и превышения cap раскладывается
+    заново по незаполненным рангам, пока не кончится.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    counts = [0] * size
+    remaining = total
+    ranks = list(range(size))
+    while remaining:
+        weight = sum(weights[rank] for rank in ranks)
+        assigned = 0
+        for rank in ranks:
+            add = min(cap - counts[rank],
+                      int(remaining * weights[rank] / weight))
+            counts[rank] += add
+            assigned += add
+        if not assigned:
+            for rank in ranks[:remaining]:
+                counts[rank] += 1
+            assigned = min(remaining, len(ranks))
+        remaining -= assigned
+        ranks = [rank for rank in ranks if counts[rank] < cap]
+    return counts
+
+
+def review_counts(volumes: Volumes, seed: int, exponent: float) -> List[int]:
+    """
+    Число отзывов каждого произведения: Zipf по рангам популярности,
+    ранги перемешаны по произведениям. Не больше числа пользователей -
+    один отзыв автора на произведение.
+    """
+    if not volumes.reviews:
+        return [0] * volumes.titles
+    by_rank = allocate(
+        volumes.reviews, volumes.titles, exponent, volumes.users
+    )
+    titles = list(range(volumes.titles))
+    random.Random(f'{seed}:titles').shuffle(titles)
+    counts = [0] * volumes.titles
+    for rank, title in enumerate(titles):
+        counts[title] = by_rank[rank]
+    return counts
+
+
+def chunk_rng(plan: Plan, kind: str, chunk: int) -> random.Random:
+    return random.Random(f'{plan.seed}:{kind}:{chunk}')
+
+
+def chunk_range(chunk: int, total: int) -> range:
+    return range(chunk * CHUNK_SIZE, min((chunk + 1) * CHUNK_SIZE, total))
+
+
+def random_date(rng: random.Random):
+    return connection.ops.adapt_datetimefield_value(
+        DATES_START + timedelta(seconds=rng.randrange(DATES_SPAN))
+    )
+
+
+def sentence(rng: random.Random, low: int, high: int) -> str:
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return ' '.join(words).capitalize()
+
+
+def pick(rng: random.Random, size: int, exponent: float) -> int:
+    """Случайный ранг 0..size-1 с распределением Zipf."""
+    return rng.choices(
+        range(size), cum_weights=zipf_cum_weights(size, exponent)
+    )[0]
+
+
+def user_rows(plan: Plan, chunk: int):
+    rng = chunk_rng(plan, 'users', chunk)
+    for index in chunk_range(chunk, plan.volumes.users):
+        pk = plan.first_ids['User'] + index
+        yield (
+            pk, UNUSABLE_PASSWORD_PREFIX, False, f'synthetic_{pk}', '', '',
+            f'synthetic_{pk}@yamdb.fake', False, True, random_date(rng),
+            User.USER,
+        )
+
+
+def catalog_rows(plan: Plan, model, total: int):
+    first = plan.first_ids[model.__name__]
+    kind = model.__name__.lower()
+    for pk in range(first, first + total):
+        yield pk, f'{kind.capitalize()} {pk}', f'synthetic-{kind}-{pk}'
+
+
+def title_rows(plan: Plan, chunk: int):
+    rng = chunk_rng(plan, 'titles', chunk)
+    categories = plan.volumes.categories
+    for index in chunk_range(chunk, plan.volumes.titles):
+        category = None
+        if categories:
+            category = plan.first_ids['Category'] + pick(
+                rng, categories, CATALOG_EXPONENT
+            )
+        yield (
+            plan.first_ids['Title'] + index, sentence(rng, 1, 4),
+            rng.randint(*YEARS), category, sentence(rng, 5, 20),
+            *RATING_ZEROS,
+        )
+
+
+def genre_title_rows(plan: Plan, chunk: int):
+    """
+    1-4 жанра на произведение, популярные жанры чаще. id по номеру
+    произведения: first + номер * MAX_GENRES + j.
+    """
+    rng = chunk_rng(plan, 'genre_titles', chunk)
+    genres = plan.volumes.genres
+    for index in chunk_range(chunk, plan.volumes.titles):
+        count = min(genres, rng.choices(
+            GENRE_COUNTS, cum_weights=GENRE_COUNT_WEIGHTS
+        )[0])
+        chosen = []
+        while len(chosen) < count:
+            genre = pick(rng, genres, CATALOG_EXPONENT)
+            if genre not in chosen:
+                chosen.append(genre)
+        for j, genre in enumerate(chosen):
+            yield (
+                plan.first_ids['GenreTitle'] + index * MAX_GENRES + j,
+                plan.first_ids['Title'] + index,
+                plan.first_ids['Genre'] + genre,
+            )
+
+
+def review_authors(rng: random.Random, count: int,
+                   users: int) -> Iterable[int]:
+    """
+    count разных авторов с длинным хвостом - unique_together.
+
+    Для немногих отзывов - выбор по весам Zipf с заменой повтора
+    следующим свободным рангом. Для популярных произведений повторов
+    слишком много: выборка без возвращения по ключам
+    log(u) * (r + 1) ** s (Efraimidis-Spirakis) за O(users).
+    """
+    if count * SPARSE_RATIO > users:
+        return heapq.nlargest(count, range(users), key=lambda rank: (
+            math.log(1 - rng.random()) * (rank + 1) ** AUTHOR_EXPONENT
+        ))
+    authors = {}
+    ranks = rng.choices(
+        range(users), cum_weights=zipf_cum_weights(users, AUTHOR_EXPONENT),
+        k=count
+    )
+    for rank in ranks:
+        while rank in authors:
+            rank = (rank + 1) % users
+        authors[rank] = None
+    return authors
+
+
+def review_rows(plan: Plan, chunk: tuple):
+    """
+    Отзывы произведений start..stop-1; id идут подряд с first_review.
+    Зерно - по произведению, поэтому разбиение на части не влияет
+    на результат.
+    """
+    start, stop, pk = chunk
+    for index in range(start, stop):
+        rng = random.Random(f'{plan.seed}:reviews:{index}')
+        title = plan.first_ids['Title'] + index
+        authors = review_authors(
+            rng, plan.review_counts[index], plan.volumes.users
+        )
+        for author in authors:
+            yield (
+                pk, sentence(rng, 5, 40), random_date(rng), title,
+                plan.first_ids['User'] + author,
+                rng.choices(SCORES, cum_weights=SCORE_WEIGHTS)[0],
+            )
+            pk += 1
+
+
+def comment_rows(plan: Plan, chunk: int):
+    rng = chunk_rng(plan, 'comments', chunk)
+    users = plan.volumes.users
+    for index in chunk_range(chunk, plan.volumes.comments):
+        review = int(plan.volumes.reviews * rng.random() ** COMMENT_SKEW)
+        yield (
+            plan.first_ids['Comment'] + index, sentence(rng, 3, 20),
+            random_date(rng), plan.first_ids['Review'] + review,
+            plan.first_ids['User'] + pick(rng, users, AUTHOR_EXPONENT),
+        )
+
+
+def chunk_tables(plan: Plan, kind: str, chunk):
+    """Таблицы и генераторы строк одной части."""
+    if kind == 'catalog':
+        return ((Category, catalog_rows(plan, Category,
+                                        plan.volumes.categories)),
+                (Genre, catalog_rows(plan, Genre, plan.volumes.genres)))
+    if kind == 'titles':
+        tables = [(Title, title_rows(plan, chunk))]
+        if plan.volumes.genres:
+            tables.append((GenreTitle, genre_title_rows(plan, chunk)))
+        return tables
+    model, rows = {
+        'users': (User, user_rows),
+        'reviews': (Review, review_rows),
+        'comments': (Comment, comment_rows),
+    }[kind]
+    return ((model, rows(plan, chunk)),)
+
+
+def write_rows(plan: Plan, model, rows) -> int:
+    """Запись строк пачками по batch_size: COPY на PostgreSQL."""
+    fields = [model._meta.get_field(name) for name in COLUMNS[model]]
+    if plan.use_copy and connection.vendor == 'postgresql':
+        write = copy_rows
+    else:
+        write = insert_rows
+    count = 0
+    while True:
+        batch = list(islice(rows, plan.batch_size))
+        if not batch:
+            return count
+        write(model, fields, batch, connection)
+        count += len(batch)
+
+
+def set_plan(plan: Plan) -> None:
+    """План для load_chunk: initializer процессов пула."""
+    global _plan
+    _plan = plan
+
+
+def load_chunk(task: tuple) -> Counter:
+    """
+    Генерация и запись части (kind, chunk) плана set_plan в своей
+    транзакции; строк по моделям.
+    """
+    kind, chunk = task
+    loaded = Counter()
+    with transaction.atomic():
+        for model, rows in chunk_tables(_plan, kind, chunk):
+            loaded[model] += write_rows(_plan, model, rows)
+    return loaded
+
+
+def review_chunks(plan: Plan) -> List[tuple]:
+    """Части отзывов: подряд идущие произведения, ~CHUNK_SIZE отзывов."""
+    chunks = []
+    start = rows = 0
+    pk = plan.first_ids['Review']
+    for index, count in enumerate(plan.review_counts):
+        rows += count
+        if rows >= CHUNK_SIZE or index == len(plan.review_counts) - 1:
+            chunks.append((start, index + 1, pk))
+            start, pk, rows = index + 1, pk + rows, 0
+    return chunks
+
+
+def phases(plan: Plan):
+    """Этапы в порядке внешних ключей: (kind, части)."""
+    volumes = plan.volumes
+    return (
+        ('users', range(-(-volumes.users // CHUNK_SIZE))),
+        ('catalog', (0,)),
+        ('titles', range(-(-volumes.titles // CHUNK_SIZE))),
+        ('reviews', review_chunks(plan)),
+        ('comments', range(-(-volumes.comments // CHUNK_SIZE))),
+    )
+
+
+def run_phase(plan: Plan, tasks: List[tuple], workers: int) -> Counter:
+    loaded = Counter()
+    if workers == 1:
+        set_plan(plan)
+        for task in tasks:
+            loaded += load_chunk(task)
+        return loaded
+    # Процессы наследуют соединение родителя при fork: закрываем его,
+    # каждый процесс откроет своё.
+    connections.close_all()
+    pool = get_context('fork').Pool(
+        workers, initializer=set_plan, initargs=(plan,)
+    )
+    try:
+        for chunk_loaded in pool.imap_unordered(load_chunk, tasks):
+            loaded += chunk_loaded
+    finally:
+        pool.close()
+        pool.join()
+    return loaded
+
+
+def check_volumes(volumes: Volumes) -> None:
+    if min(volumes) < 0:
+        raise ValueError('Объёмы данных не могут быть отрицательными')
+    if volumes.reviews > volumes.titles * volumes.users:
+        raise ValueError(
+            'Отзывов больше, чем пар произведение-автор: '
+            'у автора один отзыв на произведение'
+        )
+    if volumes.comments and not volumes.reviews:
+        raise ValueError('Комментариям нужны отзывы')
+    if volumes.comments and not volumes.users:
+        raise ValueError('Комментариям нужны пользователи')
+
+
+def next_ids() -> Dict[str, int]:
+    """Первые свободные id: генерируемые данные идут после имеющихся."""
+    return {
+        model.__name__: (
+            model._base_manager.aggregate(last=Max('id'))['last'] or 0
+        ) + 1
+        for model in COLUMNS
+    }
+
+
+def generate(volumes: Volumes, seed: int = 0,
+             exponent: float = ZIPF_EXPONENT, workers: int = 1,
+             batch_size: int = BATCH_SIZE, use_copy: bool = True,
+             report=None) -> None:
+    """
+    Синтетические данные с перекосом реальных: число отзывов
+    на произведение по Zipf, длинный хвост активности авторов,
+    1-4 жанра на произведение.
+
+    При одинаковом seed и исходных данных результат одинаков.
+    Части генерируются параллельно в workers процессах (на SQLite -
+    в одном: запись блокирует всю базу) и пишутся пачками
+    по batch_size: через COPY на PostgreSQL, иначе executemany.
+    """
+    check_volumes(volumes)
+    if connection.vendor == 'sqlite':
+        workers = 1
+    plan = Plan(
+        volumes, seed, next_ids(),
+        review_counts(volumes, seed, exponent), batch_size, use_copy,
+    )
+    if volumes.users:
+        zipf_cum_weights(volumes.users, AUTHOR_EXPONENT)
+    for size in (volumes.categories, volumes.genres):
+        if size:
+            zipf_cum_weights(size, CATALOG_EXPONENT)
+    for kind, chunks in phases(plan):
+        started = time.monotonic()
+        loaded = run_phase(
+            plan, [(kind, chunk) for chunk in chunks], workers
+        )
+        if report is not None:
+            for model, rows in loaded.items():
+                report(model, rows, time.monotonic() - started)
+    with transaction.atomic():
+        for model in COLUMNS:
+            reset_sequences(model, connection)
+    rebuild_ratings()
@@ -0,0 +1,106 @@
+from functools import reduce
+from operator import or_
+from typing import Tuple
+
+from django.db import connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from reviews.models import SCORES, Review, Title
+from reviews.ranking import rebuild_rankings
+
+
+def _review_totals():
+    """
+    Подзапросы суммы, количества и гистограммы оценок для каждого
+    произведения: actual_<поле рейтинга>.
+    """
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    totals = {
+        'rating_sum': reviews.annotate(total=Sum('score')),
+        'rating_count': reviews.annotate(total=Count('id')),
+    }
+    for score, field in zip(SCORES, Title.HISTOGRAM_FIELDS):
+        totals[field] = reviews.filter(score=score).annotate(
+            total=Count('id')
+        )
+    return {
+        f'actual_{field}': Coalesce(Subquery(
+            queryset.values('total'), output_field=IntegerField()
+        ), 0)
+        for field, queryset in totals.items()
+    }
+
+
+def _grouped_totals() -> tuple:
+    """
+    Рейтинг и гистограмма всех произведений с отзывами одним проходом
+    по отзывам: GROUP BY с условными COUNT. SQL и параметры.
+    """
+    queryset = Review.objects.order_by().values('title').annotate(
+        rating_sum=Sum('score'),
+        rating_count=Count('id'),
+        **{field: Count('id', filter=Q(score=score))
+           for score, field in zip(SCORES, Title.HISTOGRAM_FIELDS)},
+    ).values_list('title', *Title.RATING_FIELDS)
+    return queryset.query.sql_with_params()
+
+
+def _update_from_totals() -> int:
+    """UPDATE ... FROM по сгруппированным отзывам (PostgreSQL)."""
+    sql, params = _grouped_totals()
+    quote = connection.ops.quote_name
+    columns = ('title_id', *Title.RATING_FIELDS)
+    assignments = ', '.join(
+        f'{quote(field)} = totals.{quote(field)}'
+        for field in Title.RATING_FIELDS
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {quote(Title._meta.db_table)} SET {assignments} '
+            f'FROM ({sql}) AS totals '
+            f'({", ".join(quote(column) for column in columns)}) '
+            f'WHERE {quote(Title._meta.db_table)}.id = totals.title_id',
+            params
+        )
+        updated = cursor.rowcount
+    updated += Title.objects.filter(reviews__isnull=True).update(
+        **{field: 0 for field in Title.RATING_FIELDS}
+    )
+    return updated
+
+
+def _update_titles() -> int:
+    """
+    На PostgreSQL отзывы агрегируются одним проходом с GROUP BY,
+    и произведения обновляются одним UPDATE ... FROM; на остальных
+    СУБД - коррелированными подзапросами по каждому произведению.
+    """
+    if connection.vendor == 'postgresql':
+        return _update_from_totals()
+    totals = _review_totals()
+    return Title.objects.update(**{
+        field: totals[f'actual_{field}'] for field in Title.RATING_FIELDS
+    })
+
+
+def rebuild_ratings() -> Tuple[int, int]:
+    """
+    Пересчитывает рейтинги и гистограммы оценок всех произведений
+    с нуля, затем рейтинги лучших. Число произведений и строк
+    рейтингов лучших.
+    """
+    with transaction.atomic():
+        updated = _update_titles()
+        return updated, rebuild_rankings()
+
+
+def find_rating_mismatches():
+    """
+    Произведения, у которых хранимый рейтинг или гистограмма оценок
+    расходится с отзывами.
+    """
+    return Title.objects.annotate(**_review_totals()).filter(reduce(or_, (
+        ~Q(**{field: F(f'actual_{field}')}) for field in Title.RATING_FIELDS
+    ))).order_by('pk')
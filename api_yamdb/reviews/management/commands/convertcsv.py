@@ -1,16 +1,48 @@
 from django.core.management.base import BaseCommand, CommandError
 
-from ._convertcsv import cvs_to_dj_model
+from ._convertcsv import BATCH_SIZE, DATA_DIR, cvs_to_dj_model
 
 
 class Command(BaseCommand):
-    help = 'Конвертор данных cvs to db.sqlite3'
+    help = 'Конвертор данных cvs в БД'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество строк CSV, загружаемых за один раз',
+        )
+        parser.add_argument(
+            '--data-dir',
+            default=DATA_DIR,
+            help='Каталог с CSV-файлами',
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Не использовать COPY FROM STDIN на PostgreSQL',
+        )
 
     def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше 0')
         try:
-            cvs_to_dj_model()
+            cvs_to_dj_model(
+                batch_size=options['batch_size'],
+                use_copy=not options['no_copy'],
+                data_dir=options['data_dir'],
+                report=self.report,
+            )
         except Exception as error:
             raise CommandError(error)
         self.stdout.write(self.style.SUCCESS(
             'Операция конвертирования завершена успешно'
         ))
+
+    def report(self, model, rows: int, elapsed: float) -> None:
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(
+            f'{model.__name__}: {rows} строк за {elapsed:.2f} с '
+            f'({rate:.0f} строк/с)'
+        )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ._exportdata import CHUNK_SIZE, WRITERS, dj_model_to_files
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка данных из БД в CSV или JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'data_dir',
+            help='Каталог для файлов выгрузки',
+        )
+        parser.add_argument(
+            '--format',
+            choices=sorted(WRITERS),
+            default='csv',
+            help='Формат файлов',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за один раз',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть больше 0')
+        try:
+            dj_model_to_files(
+                options['data_dir'],
+                fmt=options['format'],
+                compress=options['gzip'],
+                chunk_size=options['chunk_size'],
+                report=self.report,
+            )
+        except OSError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            'Операция выгрузки завершена успешно'
+        ))
+
+    def report(self, model, rows: int, elapsed: float) -> None:
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(
+            f'{model.__name__}: {rows} строк за {elapsed:.2f} с '
+            f'({rate:.0f} строк/с)'
+        )
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ._convertcsv import BATCH_SIZE
+from ._generatedata import ZIPF_EXPONENT, Volumes, generate
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических данных для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ('users', 10000, 'Количество пользователей'),
+            ('categories', 10, 'Количество категорий'),
+            ('genres', 30, 'Количество жанров'),
+            ('titles', 2000, 'Количество произведений'),
+            ('reviews', 100000, 'Количество отзывов'),
+            ('comments', 200000, 'Количество комментариев'),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default, help=help_text
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора: одинаковое зерно - одинаковые данные',
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=ZIPF_EXPONENT,
+            help='Показатель Zipf числа отзывов на произведение',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов генерации (на SQLite всегда 1)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество строк, записываемых за один раз',
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Не использовать COPY FROM STDIN на PostgreSQL',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше 0')
+        if options['workers'] < 1:
+            raise CommandError('--workers должен быть больше 0')
+        if options['zipf'] <= 0:
+            raise CommandError('--zipf должен быть больше 0')
+        volumes = Volumes(*(options[name] for name in Volumes._fields))
+        try:
+            generate(
+                volumes,
+                seed=options['seed'],
+                exponent=options['zipf'],
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                use_copy=not options['no_copy'],
+                report=self.report,
+            )
+        except Exception as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы'))
+
+    def report(self, model, rows: int, elapsed: float) -> None:
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(
+            f'{model.__name__}: {rows} строк за {elapsed:.2f} с '
+            f'({rate:.0f} строк/с)'
+        )
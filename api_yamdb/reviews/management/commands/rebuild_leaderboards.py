@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from reviews.ranking import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересборка рейтингов лучших произведений: общего, по категориям '
+        'и жанрам (например, по расписанию cron)'
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_rankings()
+        self.stdout.write(self.style.SUCCESS(f'Строк рейтингов: {rows}'))
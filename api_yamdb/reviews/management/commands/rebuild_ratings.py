@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from reviews.models import Title
+
+from ._ratings import find_rating_mismatches, rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт и проверка рейтингов и гистограмм оценок произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить рейтинги, не изменяя их',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            updated, ranks = rebuild_ratings()
+            self.stdout.write(
+                f'Пересчитано произведений: {updated}, '
+                f'строк рейтингов лучших: {ranks}'
+            )
+        mismatches = find_rating_mismatches()
+        if mismatches.exists():
+            for title in mismatches[:20]:
+                expected = [
+                    getattr(title, f'actual_{field}')
+                    for field in Title.HISTOGRAM_FIELDS
+                ]
+                self.stderr.write(
+                    f'{title.pk}: сумма {title.rating_sum} '
+                    f'(ожидалось {title.actual_rating_sum}), '
+                    f'количество {title.rating_count} '
+                    f'(ожидалось {title.actual_rating_count}), '
+                    f'гистограмма {title.rating_histogram} '
+                    f'(ожидалось {expected})'
+                )
+            raise CommandError(
+                f'Рейтинг расходится у {mismatches.count()} произведений'
+            )
+        self.stdout.write(self.style.SUCCESS('Рейтинги согласованы'))
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:30
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_ratings(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    Title.objects.update(
+        rating_sum=Coalesce(Subquery(
+            reviews.annotate(total=Sum('score')).values('total'),
+            output_field=IntegerField()
+        ), 0),
+        rating_count=Coalesce(Subquery(
+            reviews.annotate(total=Count('id')).values('total'),
+            output_field=IntegerField()
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_auto_20230217_1035'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.IntegerField(validators=[django.core.validators.MaxValueValidator(2026, message='Проверьте дату')], verbose_name='Год выпуска'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
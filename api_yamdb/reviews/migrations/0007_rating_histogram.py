@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:31
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_histograms(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    Title.objects.update(**{
+        f'score_{score}': Coalesce(Subquery(
+            reviews.filter(score=score).annotate(
+                total=Count('id')
+            ).values('total'),
+            output_field=IntegerField()
+        ), 0)
+        for score in range(1, 11)
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_1',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 1'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_10',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 10'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 2'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 3'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 4'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 5'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 6'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 7'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 8'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок 9'),
+        ),
+        migrations.RunPython(fill_histograms, migrations.RunPython.noop),
+    ]
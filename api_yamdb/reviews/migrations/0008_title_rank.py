@@ -0,0 +1,71 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:38
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_ranks(apps, schema_editor):
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    Title = apps.get_model('reviews', 'Title')
+    TitleRank = apps.get_model('reviews', 'TitleRank')
+    min_reviews = max(1, settings.LEADERBOARD_MIN_REVIEWS)
+    genres = defaultdict(list)
+    for title_id, genre_id in GenreTitle.objects.filter(
+        title__rating_count__gte=min_reviews
+    ).values_list('title_id', 'genre_id'):
+        genres[title_id].append(genre_id)
+    ranks = []
+    for pk, category_id, rating_sum, rating_count in Title.objects.filter(
+        rating_count__gte=min_reviews
+    ).values_list('id', 'category_id', 'rating_sum', 'rating_count'):
+        scopes = [('all', 0)] + [('genre', genre) for genre in genres[pk]]
+        if category_id is not None:
+            scopes.append(('category', category_id))
+        ranks.extend(
+            TitleRank(scope=scope, scope_id=scope_id, title_id=pk,
+                      rating=rating_sum * 10000 // rating_count,
+                      review_count=rating_count)
+            for scope, scope_id in scopes
+        )
+    TitleRank.objects.bulk_create(ranks, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRank',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'Все произведения'), ('category', 'Категория'), ('genre', 'Жанр')], max_length=8, verbose_name='Рейтинг')),
+                ('scope_id', models.PositiveIntegerField(default=0, verbose_name='id категории или жанра')),
+                ('rating', models.PositiveIntegerField(verbose_name='Средняя оценка x 10000')),
+                ('review_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='reviews.Title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтингах',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titlerank',
+            index=models.Index(fields=['scope', 'scope_id', '-rating', '-review_count', 'title'], name='title_rank_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlerank',
+            index=models.Index(fields=['scope', 'scope_id', '-review_count', '-rating', 'title'], name='title_rank_reviews_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titlerank',
+            constraint=models.UniqueConstraint(fields=('scope', 'scope_id', 'title'), name='unique_title_rank'),
+        ),
+        migrations.RunPython(fill_ranks, migrations.RunPython.noop),
+    ]
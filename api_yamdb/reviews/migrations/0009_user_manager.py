@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:00
+
+from django.db import migrations
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_rank'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', reviews.models.UserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:10
+
+from django.db import migrations
+
+FTS_TABLE = 'reviews_title_fts'
+
+POSTGRES_SQL = (
+    'CREATE INDEX IF NOT EXISTS reviews_title_name_search_idx '
+    'ON reviews_title USING GIN '
+    "(to_tsvector('russian'::regconfig, name))",
+)
+POSTGRES_REVERSE_SQL = (
+    'DROP INDEX IF EXISTS reviews_title_name_search_idx',
+)
+
+# FTS5-таблица с внешним содержимым, её синхронизируют триггеры.
+# SQLite теряет триггеры, когда пересоздаёт reviews_title при
+# изменении её схемы: после каждой миграции их восстанавливает
+# reviews.search.restore_sqlite_triggers (post_migrate).
+SQLITE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "name, content='reviews_title', content_rowid='id', "
+    "tokenize='unicode61')",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert '
+    'AFTER INSERT ON reviews_title BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, name) '
+    'VALUES (new.id, new.name); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete '
+    'AFTER DELETE ON reviews_title BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) '
+    "VALUES ('delete', old.id, old.name); END",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update '
+    'AFTER UPDATE OF name ON reviews_title BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) '
+    "VALUES ('delete', old.id, old.name); "
+    f'INSERT INTO {FTS_TABLE}(rowid, name) '
+    'VALUES (new.id, new.name); END',
+    # Индекс заполняется один раз, дальше его ведут триггеры.
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+SQLITE_REVERSE_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+class VendorRunSQL(migrations.RunSQL):
+    """RunSQL только для СУБД vendor, на остальных ничего не делает."""
+
+    def __init__(self, vendor, *args, **kwargs):
+        self.vendor = vendor
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        return name, (self.vendor, *args), kwargs
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(app_label, schema_editor,
+                                      from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(app_label, schema_editor,
+                                       from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_user_manager'),
+    ]
+
+    operations = [
+        VendorRunSQL('postgresql', POSTGRES_SQL, POSTGRES_REVERSE_SQL),
+        VendorRunSQL('sqlite', SQLITE_SQL, SQLITE_REVERSE_SQL),
+    ]
@@ -1,13 +1,53 @@
+import math
 from datetime import datetime
+from typing import Sequence
 
 from core.models import CommonFieldsModel
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as DjangoUserManager
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.dispatch import Signal
 from django.utils.translation import gettext_lazy as _
 
 from .validators import validate_username
 
+# Шкала оценок отзывов.
+SCORES = range(1, 11)
+# Перцентили статистики оценок произведения.
+RATING_PERCENTILES = (10, 25, 75, 90)
+
+# queryset.update() полей User.AUTH_FIELDS: post_save не отправляется.
+users_updated = Signal(providing_args=('user_ids', 'fields', 'using'))
+
+
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs) -> int:
+        """
+        Массовое изменение полей из утверждений JWT (роль, is_active и
+        др.) отправляет :obj:`users_updated` с id изменённых
+        пользователей: иначе их токены сохранили бы прежние права.
+        """
+        fields = set(kwargs) & set(self.model.AUTH_FIELDS)
+        if not fields:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            user_ids = list(
+                self.select_for_update().values_list('pk', flat=True)
+            )
+            # Строки заблокированы: обновятся ровно user_ids.
+            self.model._base_manager.using(self.db).filter(
+                pk__in=user_ids
+            ).update(**kwargs)
+        users_updated.send(sender=self.model, user_ids=user_ids,
+                           fields=fields, using=self.db)
+        return len(user_ids)
+
+
+class UserManager(DjangoUserManager.from_queryset(UserQuerySet)):
+    pass
+
 
 class User(AbstractUser):
     ADMIN = 'admin'
@@ -18,6 +58,9 @@ class User(AbstractUser):
         (MODERATOR, 'Модератор'),
         (USER, 'Пользователь'),
     )
+    AUTH_FIELDS = (
+        'username', 'role', 'is_staff', 'is_superuser', 'is_active'
+    )
     username = models.CharField(
         _('username'),
         max_length=150,
@@ -48,6 +91,8 @@ class User(AbstractUser):
         blank=True
     )
 
+    objects = UserManager()
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
@@ -55,6 +100,19 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные из БД поля, входящие в JWT."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_auth = instance.auth_state()
+        return instance
+
+    def auth_state(self) -> tuple:
+        """Значения полей, которые передаются в утверждениях JWT."""
+        return tuple(
+            self.__dict__.get(field) for field in self.AUTH_FIELDS
+        )
+
     @property
     def is_admin(self):
         return (
@@ -105,6 +163,10 @@ class Category(models.Model):
 
 
 class Title(models.Model):
+    # Гистограмма оценок score_1..score_10: число оценок 1..10.
+    # Ведётся сигналами отзывов вместе с rating_sum и rating_count.
+    HISTOGRAM_FIELDS = tuple(f'score_{score}' for score in SCORES)
+    RATING_FIELDS = ('rating_sum', 'rating_count', *HISTOGRAM_FIELDS)
     name = models.TextField(
         verbose_name='Название'
     )
@@ -136,6 +198,66 @@ class Title(models.Model):
         through='GenreTitle',
         related_name='titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
+    score_1 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 1',
+        default=0,
+        editable=False
+    )
+    score_2 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 2',
+        default=0,
+        editable=False
+    )
+    score_3 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 3',
+        default=0,
+        editable=False
+    )
+    score_4 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 4',
+        default=0,
+        editable=False
+    )
+    score_5 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 5',
+        default=0,
+        editable=False
+    )
+    score_6 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 6',
+        default=0,
+        editable=False
+    )
+    score_7 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 7',
+        default=0,
+        editable=False
+    )
+    score_8 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 8',
+        default=0,
+        editable=False
+    )
+    score_9 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 9',
+        default=0,
+        editable=False
+    )
+    score_10 = models.PositiveIntegerField(
+        verbose_name='Количество оценок 10',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Произведение'
@@ -144,6 +266,91 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Изменение произведения не записывает RATING_FIELDS: их ведут
+        сигналы отзывов атомарными UPDATE, а значения в экземпляре
+        могли устареть с момента загрузки.
+        """
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def rating(self):
+        """Средняя оценка по хранимым сумме и количеству оценок."""
+        return self.average_rating(self.rating_sum, self.rating_count)
+
+    @staticmethod
+    def average_rating(rating_sum: int, rating_count: int):
+        """Средняя оценка; None, пока оценок нет."""
+        if not rating_count:
+            return None
+        return rating_sum / rating_count
+
+    @classmethod
+    def histogram_field(cls, score: int) -> str:
+        """Поле гистограммы с числом оценок score."""
+        if score not in SCORES:
+            raise ValueError(
+                f'Оценка {score} вне диапазона '
+                f'{SCORES.start}..{SCORES.stop - 1}'
+            )
+        return cls.HISTOGRAM_FIELDS[score - SCORES.start]
+
+    @property
+    def rating_histogram(self) -> list:
+        """Число оценок 1..10 по хранимой гистограмме."""
+        return [getattr(self, field) for field in self.HISTOGRAM_FIELDS]
+
+    @staticmethod
+    def score_at(histogram: Sequence[int], rank: int) -> int:
+        """Оценка с порядковым номером rank (с 1) среди отсортированных."""
+        seen = 0
+        for score, count in zip(SCORES, histogram):
+            seen += count
+            if seen >= rank:
+                return score
+        raise ValueError(f'Оценок меньше {rank}')
+
+    @classmethod
+    def rating_stats(cls, histogram: Sequence[int],
+                     percentiles: Sequence[int] = RATING_PERCENTILES
+                     ) -> dict:
+        """
+        Статистика оценок по гистограмме, без чтения отзывов: среднее,
+        медиана и перцентили (по методу ближайшего ранга).
+        """
+        count = sum(histogram)
+        stats = {
+            'count': count,
+            'mean': None,
+            'median': None,
+            'percentiles': {str(percent): None for percent in percentiles},
+            'histogram': {
+                str(score): total for score, total in zip(SCORES, histogram)
+            },
+        }
+        if not count:
+            return stats
+        stats['mean'] = round(sum(
+            score * total for score, total in zip(SCORES, histogram)
+        ) / count, 2)
+        stats['median'] = (
+            cls.score_at(histogram, (count + 1) // 2)
+            + cls.score_at(histogram, count // 2 + 1)
+        ) / 2
+        for percent in percentiles:
+            stats['percentiles'][str(percent)] = cls.score_at(
+                histogram, max(1, math.ceil(count * percent / 100))
+            )
+        return stats
+
 
 class GenreTitle(models.Model):
     title = models.ForeignKey(
@@ -195,6 +402,33 @@ class Review(CommonFieldsModel):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         unique_together = ('title', 'author')
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает загруженные из БД title и score для пересчёта."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = (
+            instance.__dict__.get('title_id'),
+            instance.__dict__.get('score'),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет отзыв и рейтинг произведения в одной транзакции.
+
+        Внутри внешней транзакции точка сохранения не создаётся:
+        ошибку обрабатывает вызывающий код (см. ReviewSerializer).
+        """
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+        self._loaded_rating = (self.title_id, self.score)
 
 
 class Comment(CommonFieldsModel):
@@ -214,3 +448,82 @@ class Comment(CommonFieldsModel):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
+
+
+class TitleRank(models.Model):
+    """
+    Строка рейтинга лучших произведений: общего, категории или жанра.
+
+    Строки есть только у произведений с LEADERBOARD_MIN_REVIEWS
+    отзывами и больше, поэтому рейтинг читается из индекса без
+    фильтра. Ведётся сигналами отзывов и произведений
+    (см. :obj:`reviews.ranking`).
+    """
+    GLOBAL = 'all'
+    CATEGORY = 'category'
+    GENRE = 'genre'
+    SCOPES = (
+        (GLOBAL, 'Все произведения'),
+        (CATEGORY, 'Категория'),
+        (GENRE, 'Жанр'),
+    )
+    # Средняя оценка хранится целым: rating_sum * RATING_SCALE //
+    # rating_count одинаково считается в Python и в SQL.
+    RATING_SCALE = 10000
+
+    scope = models.CharField(
+        verbose_name='Рейтинг',
+        max_length=8,
+        choices=SCOPES
+    )
+    scope_id = models.PositiveIntegerField(
+        verbose_name='id категории или жанра',
+        default=0
+    )
+    title = models.ForeignKey(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        related_name='ranks'
+    )
+    rating = models.PositiveIntegerField(
+        verbose_name='Средняя оценка x 10000'
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        constraints = (models.UniqueConstraint(
+            fields=('scope', 'scope_id', 'title'),
+            name='unique_title_rank'),
+        )
+        # Порядки рейтингов (см. ranking.ORDERINGS) с id произведения
+        # для однозначного порядка при равенстве.
+        indexes = (
+            models.Index(
+                fields=('scope', 'scope_id', '-rating', '-review_count',
+                        'title'),
+                name='title_rank_rating_idx'
+            ),
+            models.Index(
+                fields=('scope', 'scope_id', '-review_count', '-rating',
+                        'title'),
+                name='title_rank_reviews_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.scope} {self.scope_id}: {self.title_id}'
+
+    @classmethod
+    def scaled_rating(cls, rating_sum: int, rating_count: int) -> int:
+        return rating_sum * cls.RATING_SCALE // rating_count
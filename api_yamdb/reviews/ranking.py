@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import (BigIntegerField, CharField, ExpressionWrapper, F,
+                              IntegerField, Value)
+from django.db.models.functions import Cast
+
+from .models import GenreTitle, Title, TitleRank
+
+# Порядки рейтингов - как в индексах TitleRank: при равенстве оценки
+# и числа отзывов выше произведение с меньшим id.
+ORDERINGS = {
+    'rating': ('-rating', '-review_count', 'title_id'),
+    'reviews': ('-review_count', '-rating', 'title_id'),
+}
+COLUMNS = ('scope', 'scope_id', 'title_id', 'rating', 'review_count')
+
+
+def min_reviews() -> int:
+    """Наименьшее число отзывов произведения в рейтингах."""
+    return max(1, settings.LEADERBOARD_MIN_REVIEWS)
+
+
+def leaderboard(scope: str, scope_id: int = 0, order: str = 'rating',
+                limit: int = 10, using: str = None) -> list:
+    """
+    Первые limit мест рейтинга: (id, название, оценка x RATING_SCALE,
+    число отзывов). Диапазон индекса рейтинга и limit строк
+    произведений по первичному ключу - стоимость не зависит от числа
+    произведений и отзывов.
+    """
+    return list(TitleRank.objects.using(using).filter(
+        scope=scope, scope_id=scope_id
+    ).order_by(*ORDERINGS[order]).values_list(
+        'title_id', 'title__name', 'rating', 'review_count'
+    )[:limit])
+
+
+def rank_title(title_id: int, using: str) -> None:
+    """
+    Строки рейтингов произведения заново: после смены категории или
+    жанров и пересчёта рейтинга.
+    """
+    TitleRank.objects.using(using).filter(title_id=title_id).delete()
+    title = Title.objects.using(using).filter(
+        pk=title_id, rating_count__gte=min_reviews()
+    ).values('category_id', 'rating_sum', 'rating_count').first()
+    if title is None:
+        return
+    scopes = [(TitleRank.GLOBAL, 0)]
+    if title['category_id'] is not None:
+        scopes.append((TitleRank.CATEGORY, title['category_id']))
+    scopes.extend(
+        (TitleRank.GENRE, genre_id)
+        for genre_id in GenreTitle.objects.using(using).filter(
+            title_id=title_id
+        ).values_list('genre_id', flat=True)
+    )
+    rating = TitleRank.scaled_rating(title['rating_sum'],
+                                     title['rating_count'])
+    TitleRank.objects.using(using).bulk_create(
+        TitleRank(scope=scope, scope_id=scope_id, title_id=title_id,
+                  rating=rating, review_count=title['rating_count'])
+        for scope, scope_id in scopes
+    )
+
+
+def update_title_rank(title_id: int, using: str,
+                      insert: bool = True) -> None:
+    """
+    Оценка и число отзывов произведения во всех его рейтингах после
+    изменения отзывов. Произведение, набравшее LEADERBOARD_MIN_REVIEWS
+    отзывов, добавляется в рейтинги, потерявшее - исключается.
+    insert=False - отзывы удалены: число отзывов не выросло, добавлять
+    нечего; иначе оно не уменьшилось, и исключать нечего.
+    """
+    title = Title.objects.using(using).filter(pk=title_id).values(
+        'rating_sum', 'rating_count'
+    ).first()
+    if title is None:
+        return
+    ranks = TitleRank.objects.using(using).filter(title_id=title_id)
+    if title['rating_count'] < min_reviews():
+        if not insert:
+            ranks.delete()
+        return
+    updated = ranks.update(
+        rating=TitleRank.scaled_rating(title['rating_sum'],
+                                       title['rating_count']),
+        review_count=title['rating_count'],
+    )
+    if not updated and insert:
+        rank_title(title_id, using)
+
+
+def rank_sources(using: str) -> tuple:
+    """Запросы строк общего рейтинга, рейтингов категорий и жанров."""
+    eligible = {'rating_count__gte': min_reviews()}
+
+    def columns(scope, scope_id, prefix=''):
+        # Только аннотации: в SELECT они идут в порядке объявления.
+        return {
+            'rank_scope': Value(scope, output_field=CharField()),
+            'rank_scope_id': scope_id,
+            'rank_title_id': F(f'{prefix}id'),
+            'rank_rating': ExpressionWrapper(
+                Cast(f'{prefix}rating_sum', BigIntegerField())
+                * TitleRank.RATING_SCALE / F(f'{prefix}rating_count'),
+                output_field=BigIntegerField()
+            ),
+            'rank_review_count': F(f'{prefix}rating_count'),
+        }
+
+    titles = Title.objects.using(using).filter(**eligible)
+    return (
+        titles.annotate(**columns(
+            TitleRank.GLOBAL, Value(0, output_field=IntegerField())
+        )),
+        titles.filter(category__isnull=False).annotate(**columns(
+            TitleRank.CATEGORY, F('category_id')
+        )),
+        GenreTitle.objects.using(using).filter(**{
+            f'title__{key}': value for key, value in eligible.items()
+        }).annotate(**columns(TitleRank.GENRE, F('genre_id'), 'title__')),
+    )
+
+
+def rebuild_rankings(using: str = 'default') -> int:
+    """
+    Все рейтинги заново: INSERT ... SELECT по произведениям
+    для каждого вида рейтинга в одной транзакции.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(TitleRank._meta.db_table)
+    columns = ', '.join(quote(column) for column in COLUMNS)
+    rows = 0
+    with transaction.atomic(using=using):
+        TitleRank.objects.using(using).all().delete()
+        with connection.cursor() as cursor:
+            for queryset in rank_sources(using):
+                sql, params = queryset.values_list(
+                    *(f'rank_{column}' for column in COLUMNS)
+                ).query.sql_with_params()
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) {sql}', params
+                )
+                rows += cursor.rowcount
+    return rows
@@ -0,0 +1,151 @@
+import re
+
+from django.db import connections
+from django.db.models import F, Func
+from django.db.models.expressions import RawSQL
+from django.db.models.query import QuerySet
+
+SEARCH_CONFIG = 'russian'
+SEARCH_MAX_TERMS = 10
+# FTS5-таблица SQLite и GIN-индекс PostgreSQL создаются миграцией
+# 0010_title_search_index.
+SQLITE_FTS_TABLE = 'reviews_title_fts'
+# Триггеры синхронизации FTS5-таблицы. SQLite теряет их, когда
+# миграция пересоздаёт reviews_title (AlterField и др.): их заново
+# создаёт restore_sqlite_triggers после каждой миграции.
+SQLITE_TRIGGERS = {
+    f'{SQLITE_FTS_TABLE}_insert': (
+        'AFTER INSERT ON reviews_title BEGIN '
+        f'INSERT INTO {SQLITE_FTS_TABLE}(rowid, name) '
+        'VALUES (new.id, new.name); END'
+    ),
+    f'{SQLITE_FTS_TABLE}_delete': (
+        'AFTER DELETE ON reviews_title BEGIN '
+        f'INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name) '
+        "VALUES ('delete', old.id, old.name); END"
+    ),
+    f'{SQLITE_FTS_TABLE}_update': (
+        'AFTER UPDATE OF name ON reviews_title BEGIN '
+        f'INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name) '
+        "VALUES ('delete', old.id, old.name); "
+        f'INSERT INTO {SQLITE_FTS_TABLE}(rowid, name) '
+        'VALUES (new.id, new.name); END'
+    ),
+}
+
+
+class TitleSearchVector(Func):
+    """
+    tsvector названия произведения.
+
+    Выражение совпадает с выражением GIN-индекса, поэтому
+    PostgreSQL выполняет поиск по индексу.
+    """
+    function = 'to_tsvector'
+    template = f"%(function)s('{SEARCH_CONFIG}'::regconfig, %(expressions)s)"
+
+    def __init__(self, **extra):
+        from django.contrib.postgres.search import SearchVectorField
+
+        super().__init__(F('name'), output_field=SearchVectorField(), **extra)
+
+
+class SubquerySQL(RawSQL):
+    """
+    Сырой подзапрос для правой части __in.
+
+    Lookup сам заключает выражение в скобки; лишняя пара скобок
+    превратила бы подзапрос в скалярное значение.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def restore_sqlite_triggers(using: str = 'default') -> bool:
+    """
+    Создаёт недостающие триггеры FTS5-таблицы SQLite и перестраивает
+    её: пока триггеров не было, изменения названий в неё не попадали.
+    Без потерянных триггеров ничего не делает. Возвращает True, если
+    триггеры создавались.
+    """
+    connection = connections[using]
+    if (connection.vendor != 'sqlite' or SQLITE_FTS_TABLE
+            not in connection.introspection.table_names()):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'reviews_title'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {name} {SQLITE_TRIGGERS[name]}'
+            )
+        if missing:
+            cursor.execute(
+                f'INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) '
+                "VALUES ('rebuild')"
+            )
+    return bool(missing)
+
+
+def search_terms(text: str) -> list:
+    """Слова поискового запроса без операторов и спецсимволов."""
+    return re.findall(r'\w+', text.lower())[:SEARCH_MAX_TERMS]
+
+
+def search_titles(queryset: QuerySet, text: str) -> QuerySet:
+    """
+    Полнотекстовый поиск произведений по названию.
+
+    Каждое слово запроса ищется как префикс, результаты
+    упорядочены по релевантности (search_rank).
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, terms)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, terms)
+    for term in terms:
+        queryset = queryset.filter(name__icontains=term)
+    return queryset
+
+
+def _search_postgres(queryset: QuerySet, terms: list) -> QuerySet:
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    query = SearchQuery(
+        ' & '.join(f'{term}:*' for term in terms),
+        config=SEARCH_CONFIG,
+        search_type='raw',
+    )
+    return queryset.annotate(
+        search_vector=TitleSearchVector()
+    ).filter(search_vector=query).annotate(
+        search_rank=SearchRank(TitleSearchVector(), query)
+    ).order_by('-search_rank', 'id')
+
+
+def _search_sqlite(queryset: QuerySet, terms: list) -> QuerySet:
+    query = ' '.join(f'"{term}"*' for term in terms)
+    matches = SubquerySQL(
+        f'SELECT rowid FROM {SQLITE_FTS_TABLE} '
+        f'WHERE {SQLITE_FTS_TABLE} MATCH %s',
+        (query,)
+    )
+    # bm25 в FTS5 тем меньше, чем выше релевантность.
+    rank = RawSQL(
+        f'SELECT -bm25({SQLITE_FTS_TABLE}) FROM {SQLITE_FTS_TABLE} '
+        f'WHERE {SQLITE_FTS_TABLE} MATCH %s '
+        f'AND rowid = {queryset.model._meta.db_table}.id',
+        (query,)
+    )
+    return queryset.filter(pk__in=matches).annotate(
+        search_rank=rank
+    ).order_by('-search_rank', 'id')
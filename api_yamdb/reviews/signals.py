@@ -0,0 +1,134 @@
+from typing import Optional
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import SCORES, GenreTitle, Review, Title, TitleRank
+from .ranking import rank_title, update_title_rank
+from .search import restore_sqlite_triggers
+
+
+def change_rating(title_id: int, using: str, added: Optional[int] = None,
+                  removed: Optional[int] = None) -> None:
+    """
+    Атомарно учитывает добавленную и исключает удалённую оценку
+    в сумме, количестве и гистограмме оценок произведения.
+    """
+    changes = {}
+    for score, sign in ((added, 1), (removed, -1)):
+        if score is None:
+            continue
+        for field, delta in (('rating_sum', sign * score),
+                             ('rating_count', sign),
+                             (Title.histogram_field(score), sign)):
+            changes[field] = changes.get(field, F(field)) + delta
+    Title.objects.using(using).filter(pk=title_id).update(**changes)
+
+
+def recount_rating(title_id: int, using: str) -> None:
+    """Пересчитывает рейтинг и гистограмму произведения по его отзывам."""
+    totals = Review.objects.using(using).filter(
+        title_id=title_id
+    ).aggregate(
+        rating_sum=Sum('score'),
+        rating_count=Count('id'),
+        **{field: Count('id', filter=Q(score=score))
+           for score, field in zip(SCORES, Title.HISTOGRAM_FIELDS)},
+    )
+    totals['rating_sum'] = totals['rating_sum'] or 0
+    Title.objects.using(using).filter(pk=title_id).update(**totals)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance: Review, created: bool, raw: bool,
+                 using: str, **kwargs) -> None:
+    """Учитывает в рейтингах новый или изменённый отзыв."""
+    if raw:
+        return
+    if created:
+        change_rating(instance.title_id, using, added=instance.score)
+        update_title_rank(instance.title_id, using)
+        return
+    old_title_id, old_score = getattr(
+        instance, '_loaded_rating', (None, None)
+    )
+    if old_title_id is None or old_score is None:
+        recount_rating(instance.title_id, using)
+        rank_title(instance.title_id, using)
+        return
+    if old_title_id != instance.title_id:
+        change_rating(old_title_id, using, removed=old_score)
+        change_rating(instance.title_id, using, added=instance.score)
+        update_title_rank(old_title_id, using, insert=False)
+        update_title_rank(instance.title_id, using)
+    elif old_score != instance.score:
+        change_rating(instance.title_id, using, added=instance.score,
+                      removed=old_score)
+        update_title_rank(instance.title_id, using)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance: Review, using: str, **kwargs) -> None:
+    """Исключает удалённый отзыв из рейтинга."""
+    change_rating(instance.title_id, using, removed=instance.score)
+    update_title_rank(instance.title_id, using, insert=False)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance: Title, created: bool, raw: bool,
+                using: str, **kwargs) -> None:
+    """
+    Рейтинги лучших после изменения произведения: могла смениться
+    категория. У нового произведения отзывов ещё нет. Число отзывов
+    в экземпляре могло устареть - rank_title читает его из БД.
+    """
+    if not (created or raw):
+        rank_title(instance.pk, using)
+
+
+@receiver(post_save, sender=GenreTitle)
+def genre_title_saved(sender, instance: GenreTitle, raw: bool, using: str,
+                      **kwargs) -> None:
+    """Рейтинги жанров после изменения жанров произведения."""
+    if not raw:
+        rank_title(instance.title_id, using)
+
+
+@receiver(post_delete, sender=GenreTitle)
+def genre_title_deleted(sender, instance: GenreTitle, using: str,
+                        **kwargs) -> None:
+    """Исключает произведение из рейтинга жанра."""
+    TitleRank.objects.using(using).filter(
+        scope=TitleRank.GENRE, scope_id=instance.genre_id,
+        title_id=instance.title_id
+    ).delete()
+
+
+@receiver(m2m_changed, sender=GenreTitle)
+def genres_changed(sender, instance, action: str, reverse: bool,
+                   pk_set: set, using: str, **kwargs) -> None:
+    """
+    Рейтинги жанров после add/remove/set/clear связи произведений
+    и жанров: со стороны произведения (reverse=False) или жанра.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        rank_title(instance.pk, using)
+    elif action == 'post_clear':
+        TitleRank.objects.using(using).filter(
+            scope=TitleRank.GENRE, scope_id=instance.pk
+        ).delete()
+    else:
+        for title_id in pk_set:
+            rank_title(title_id, using)
+
+
+def restore_search_triggers(sender, using: str = 'default',
+                            **kwargs) -> None:
+    """
+    post_migrate: триггеры поиска SQLite, потерянные при пересоздании
+    reviews_title миграцией.
+    """
+    restore_sqlite_triggers(using)
@@ -1,9 +1,80 @@
 import sys
+import threading
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--run-benchmarks', action='store_true',
+        help='Запускать замеры времени (@pytest.mark.benchmark)',
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Замеры времени зависят от нагрузки машины и по умолчанию
+    пропускаются: запуск с --run-benchmarks.
+    """
+    if config.getoption('--run-benchmarks'):
+        return
+    skip = pytest.mark.skip(reason='замер времени: --run-benchmarks')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings():
+    """
+    Тесты с БД выполняются на SQLite в памяти:
+    PostgreSQL в окружении тестов не поднимается.
+    Реплики по умолчанию выключены (settings.DATABASE_REPLICAS).
+    """
+    from django.conf import settings
+    from django.db import connections
+
+    settings.DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+            'TIME_ZONE': 'UTC',
+        },
+        # Вторая SQLite-БД вместо реплики: в тестах - зеркало default.
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+            'TIME_ZONE': 'UTC',
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+    settings.DATABASE_REPLICAS = []
+    connections.__dict__.pop('databases', None)
+    connections._databases = None
+    connections._connections = threading.local()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш ответов API и кэш пользователей не переходят между тестами."""
+    from api.authentication import user_cache
+    from django.core.cache import caches
+
+    for cache in caches.all():
+        cache.clear()
+    user_cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    from rest_framework.test import APIClient
+
+    return APIClient()
@@ -0,0 +1,241 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from api.authentication import access_token_for
+from core.deletion import run_next_job, schedule_deletion
+from core.models import DeletionJob
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+TITLES_COUNT = 30
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings, tmp_path):
+    """run_deletions работает только с общим для процессов кэшем."""
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path),
+    }}
+
+
+@pytest.fixture
+def admin_client(api_client, db):
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+    api_client.force_authenticate(user=admin)
+    return api_client
+
+
+@pytest.fixture
+def catalog(db):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category)
+        for i in range(TITLES_COUNT)
+    )
+    titles = list(Title.objects.order_by('pk'))
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genre) for title in titles
+    )
+    return category, genre, titles
+
+
+def run_deletions(batch_size=7):
+    call_command('run_deletions', '--once', f'--batch-size={batch_size}',
+                 stdout=StringIO(), stderr=StringIO())
+
+
+def slugs(client, url):
+    return [item['slug'] for item in client.get(url).json()['results']]
+
+
+class TestBackgroundDeletion:
+
+    def test_category(self, admin_client, catalog):
+        category, _, titles = catalog
+        assert slugs(admin_client, '/api/v1/categories/') == ['movie']
+        response = admin_client.delete('/api/v1/categories/movie/')
+        assert response.status_code == 204
+        assert slugs(admin_client, '/api/v1/categories/') == []
+        assert admin_client.delete(
+            '/api/v1/categories/movie/'
+        ).status_code == 404
+        response = admin_client.post('/api/v1/titles/', {
+            'name': 'Новое', 'year': 2000, 'category': 'movie',
+            'genre': ['drama'],
+        }, format='json')
+        assert response.status_code == 400
+        job = DeletionJob.objects.get()
+        job_url = f'/api/v1/deletions/{job.pk}/'
+        assert admin_client.get(job_url).json()['status'] == 'pending'
+        assert Title.objects.filter(category=category).count() == (
+            TITLES_COUNT
+        )
+        run_deletions()
+        assert not Category.objects.exists()
+        assert not Title.objects.filter(category__isnull=False).exists()
+        status = admin_client.get(job_url).json()
+        assert status['status'] == 'done'
+        assert status['rows_updated'] == TITLES_COUNT
+        assert status['rows_deleted'] == 1
+        title = admin_client.get(f'/api/v1/titles/{titles[0].pk}/').json()
+        assert title['category'] is None
+
+    def test_hidden_in_titles(self, admin_client, catalog):
+        _, _, titles = catalog
+        url = f'/api/v1/titles/{titles[0].pk}/'
+        assert admin_client.get(url).json()['category']['slug'] == 'movie'
+        admin_client.delete('/api/v1/categories/movie/')
+        admin_client.delete('/api/v1/genres/drama/')
+        title = admin_client.get(url).json()
+        assert (title['category'], title['genre']) == (None, [])
+        results = admin_client.get('/api/v1/titles/').json()['results']
+        assert {item['category'] for item in results} == {None}
+        for query in ('category=movie', 'category__icontains=mov',
+                      'genre=drama', 'genre__all=drama',
+                      'genre__icontains=dra'):
+            response = admin_client.get(f'/api/v1/titles/?{query}')
+            assert response.json()['results'] == [], query
+
+    def test_local_cache(self, catalog, settings):
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        with pytest.raises(CommandError, match='общий для процессов кэш'):
+            run_deletions()
+
+    def test_location(self, admin_client, catalog):
+        response = admin_client.delete('/api/v1/genres/drama/')
+        assert response.status_code == 204
+        job = DeletionJob.objects.get()
+        assert response['Location'].endswith(f'/api/v1/deletions/{job.pk}/')
+        assert slugs(admin_client, '/api/v1/genres/') == []
+
+    def test_genre(self, admin_client, catalog):
+        _, genre, titles = catalog
+        admin_client.delete('/api/v1/genres/drama/')
+        assert GenreTitle.objects.count() == TITLES_COUNT
+        run_deletions()
+        assert not Genre.objects.exists()
+        assert not GenreTitle.objects.exists()
+        assert DeletionJob.objects.get().rows_deleted == TITLES_COUNT + 1
+        title = admin_client.get(f'/api/v1/titles/{titles[0].pk}/').json()
+        assert title['genre'] == []
+
+    def test_user(self, admin_client, catalog):
+        _, _, titles = catalog
+        author, other = (
+            User.objects.create(username=name, email=f'{name}@yamdb.fake')
+            for name in ('author', 'other')
+        )
+        for title in titles[:10]:
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=2
+            )
+            Comment.objects.create(review=review, author=other, text='1')
+            Comment.objects.create(review=review, author=author, text='2')
+        kept = Review.objects.create(
+            title=titles[0], author=other, text='Отзыв', score=8
+        )
+        Comment.objects.create(review=kept, author=author, text='3')
+        assert Title.objects.get(pk=titles[0].pk).rating == 5
+        response = admin_client.delete('/api/v1/users/author/')
+        assert response.status_code == 204
+        assert admin_client.get('/api/v1/users/author/').status_code == 404
+        assert 'author' not in [
+            user['username']
+            for user in admin_client.get('/api/v1/users/').json()['results']
+        ]
+        assert not User.objects.get(pk=author.pk).is_active
+        run_deletions(batch_size=3)
+        assert not User.objects.filter(username='author').exists()
+        assert list(Review.objects.all()) == [kept]
+        assert not Comment.objects.exists()
+        assert Title.objects.get(pk=titles[0].pk).rating == 8
+        assert Title.objects.get(pk=titles[1].pk).rating is None
+        job = DeletionJob.objects.get()
+        assert job.status == DeletionJob.DONE
+        assert job.rows_deleted == 10 + 10 + 1 + 10 + 1
+
+    @pytest.mark.parametrize('count', (1, TITLES_COUNT))
+    def test_request_queries(self, admin_client, db, count,
+                             django_assert_num_queries):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        Title.objects.bulk_create(
+            Title(name=f'{i}', year=2000, category=category)
+            for i in range(count)
+        )
+        # Объект, задача, SAVEPOINT/RELEASE.
+        with django_assert_num_queries(4):
+            response = admin_client.delete('/api/v1/categories/movie/')
+        assert response.status_code == 204
+
+    def test_stale_job(self, admin_client, catalog, settings):
+        admin_client.delete('/api/v1/genres/drama/')
+        DeletionJob.objects.update(status=DeletionJob.RUNNING)
+        assert run_next_job() is None
+        settings.DELETION_JOB_TIMEOUT = 0
+        DeletionJob.objects.update(
+            heartbeat=DeletionJob.objects.get().heartbeat - timedelta(1)
+        )
+        result = run_next_job()
+        assert result.job.status == DeletionJob.DONE
+        assert not Genre.objects.exists()
+
+    def test_failed_job(self, admin_client, catalog, monkeypatch):
+        def get_job_model(job):
+            raise LookupError('нет плана')
+
+        api_client = APIClient()
+
+        assert slugs(api_client, '/api/v1/genres/') == ['drama']
+        admin_client.delete('/api/v1/genres/drama/')
+        assert slugs(api_client, '/api/v1/genres/') == []
+        with monkeypatch.context() as patch:
+            patch.setattr('core.deletion.get_job_model', get_job_model)
+            result = run_next_job()
+        assert result.job.status == DeletionJob.FAILED
+        assert 'нет плана' in result.job.last_error
+        # Объект снова виден (и в кэше ответов), удаление повторяется.
+        assert slugs(api_client, '/api/v1/genres/') == ['drama']
+        assert admin_client.delete(
+            '/api/v1/genres/drama/'
+        ).status_code == 204
+        run_deletions()
+        assert not Genre.objects.exists()
+
+    def test_failed_user_job(self, admin_client, db, monkeypatch):
+        def get_job_model(job):
+            raise LookupError('нет плана')
+
+        author = User.objects.create(username='author',
+                                     email='author@yamdb.fake')
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(author)}'
+        )
+        assert client.get('/api/v1/users/me/').status_code == 200
+        admin_client.delete('/api/v1/users/author/')
+        assert client.get('/api/v1/users/me/').status_code == 401
+        with monkeypatch.context() as patch:
+            patch.setattr('core.deletion.get_job_model', get_job_model)
+            result = run_next_job()
+        assert result.job.status == DeletionJob.FAILED
+        assert User.objects.get(pk=author.pk).is_active
+        assert admin_client.get('/api/v1/users/author/').status_code == 200
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+    def test_unsupported_model(self, catalog):
+        with pytest.raises(TypeError, match='Нет плана удаления Title'):
+            schedule_deletion(catalog[2][0])
+        assert not DeletionJob.objects.exists()
+
+    def test_status_permissions(self, api_client, catalog):
+        assert api_client.get('/api/v1/deletions/').status_code == 401
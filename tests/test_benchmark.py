@@ -0,0 +1,117 @@
+import json
+from io import StringIO
+
+import pytest
+from api.benchmark import ENDPOINTS, percentile, render
+from core.models import DeletionJob
+from django.core.management import CommandError, call_command
+from django.urls import URLPattern, get_resolver, resolve
+from reviews.models import Category, Title, User
+
+SKIPPED_METHODS = {'DELETE', 'HEAD', 'OPTIONS'}
+
+
+def url_methods(patterns) -> set:
+    """Пары (имя маршрута, метод) из дерева url_patterns."""
+    methods = set()
+    for pattern in patterns:
+        if not isinstance(pattern, URLPattern):
+            methods |= url_methods(pattern.url_patterns)
+            continue
+        callback = pattern.callback
+        if hasattr(callback, 'actions'):
+            allowed = callback.actions
+        else:
+            view = callback.view_class
+            allowed = [method for method in view.http_method_names
+                       if hasattr(view, method)]
+        methods |= {
+            (pattern.name, method.upper()) for method in allowed
+        } - {(pattern.name, method) for method in SKIPPED_METHODS}
+    return methods
+
+
+def run_benchmark(*args):
+    out, err = StringIO(), StringIO()
+    call_command('benchmark', *args, stdout=out, stderr=err)
+    return out.getvalue(), err.getvalue()
+
+
+class TestBenchmark:
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile([7.0], 99) == 7.0
+        assert percentile([1, 2, 3], 50) == 2
+
+    def test_render(self):
+        context = {'title': 5, 'run': 'abc', 'write_titles': [10, 11]}
+        assert render('/titles/{title}/', context, 0) == '/titles/5/'
+        assert render('/titles/{write_title}/', context, 3) == '/titles/11/'
+        assert render(
+            {'name': 'bench_{run}_{i}', 'genre': ['{run}'], 'year': 2000},
+            context, 2
+        ) == {'name': 'bench_abc_2', 'genre': ['abc'], 'year': 2000}
+
+    def test_endpoints_cover_urls(self):
+        """Маршруты и методы api/urls.py, кроме DELETE, есть в тесте."""
+        context = {
+            'run': 'abc', 'category': 'slug', 'genre': 'slug', 'title': 1,
+            'write_titles': [2], 'review': 3, 'comment': 4, 'deletion': 5,
+            'username': 'user', 'email': 'user@yamdb.fake',
+        }
+        covered = {
+            (resolve(render(endpoint.path.split('?')[0], context, 0))
+             .url_name, endpoint.method)
+            for endpoint in ENDPOINTS
+        }
+        assert url_methods(get_resolver('api.urls').url_patterns) == covered
+
+    @pytest.mark.django_db(transaction=True)
+    def test_run(self, tmp_path, settings):
+        settings.REQUEST_METRICS = True
+        output = tmp_path / 'bench.json'
+        # SQLite в памяти с общим кэшем блокирует таблицы при
+        # одновременной записи: записи - в один поток.
+        _, progress = run_benchmark(
+            '--requests=4', '--concurrency=1', f'--output={output}'
+        )
+        report = json.loads(output.read_text(encoding='utf-8'))
+        assert report['meta']['database'] == 'sqlite'
+        assert report['meta']['concurrency'] == 1
+        assert list(report['endpoints']) == [
+            endpoint.name for endpoint in ENDPOINTS
+        ]
+        for name, summary in report['endpoints'].items():
+            assert summary['requests'] == 4
+            assert summary['errors'] == 0, (name, summary['statuses'])
+            latency = summary['latency_ms']
+            assert latency['p50'] <= latency['p95'] <= latency['p99'] <= (
+                latency['max']
+            )
+            assert summary['throughput'] > 0
+            assert summary['queries']['max'] >= summary['queries']['mean']
+        assert report['endpoints']['reviews-create']['statuses'] == {
+            '201': 4
+        }
+        assert 'titles-list:' in progress
+        # Объекты теста удалены.
+        assert not Category.objects.exists()
+        assert not Title.objects.exists()
+        assert not User.objects.exists()
+        assert not DeletionJob.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_endpoints_option(self):
+        output, _ = run_benchmark(
+            '--requests=8', '--concurrency=4',
+            '--endpoints=titles-list,genres-list',
+        )
+        endpoints = json.loads(output)['endpoints']
+        assert list(endpoints) == ['titles-list', 'genres-list']
+        assert endpoints['titles-list']['statuses'] == {'200': 8}
+        with pytest.raises(CommandError):
+            run_benchmark('--endpoints=unknown')
@@ -0,0 +1,129 @@
+import pytest
+from api import cache
+from django.utils.http import http_date
+from reviews.models import Comment, Review, Title, User
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """Часы api.cache: now - текущее время в мс."""
+    class Clock:
+        now = (cache.now_ms() // 1000 - 10) * 1000 + 100
+
+        def advance(self, ms: int) -> None:
+            self.now += ms
+    clock = Clock()
+    monkeypatch.setattr(cache, 'now_ms', lambda: clock.now)
+    return clock
+
+
+@pytest.fixture
+def review(db):
+    author = User.objects.create(username='author', email='a@yamdb.fake')
+    title = Title.objects.create(name='Произведение', year=2000)
+    return Review.objects.create(title=title, author=author, text='Отзыв',
+                                 score=8)
+
+
+@pytest.fixture
+def urls(review):
+    title_url = f'/api/v1/titles/{review.title_id}/'
+    return (
+        title_url,
+        f'{title_url}reviews/',
+        f'{title_url}reviews/{review.pk}/',
+        f'{title_url}reviews/{review.pk}/comments/',
+    )
+
+
+class TestConditionalGet:
+
+    def test_validators(self, api_client, urls, clock):
+        for url in urls:
+            api_client.get(url)
+        clock.advance(1000)
+        for url in urls:
+            response = api_client.get(url)
+            assert response.status_code == 200
+            assert response['ETag'].startswith('"')
+            assert response['Last-Modified'].endswith('GMT')
+
+    def test_not_modified_without_queries(self, api_client, urls, clock,
+                                          django_assert_num_queries):
+        for url in urls:
+            api_client.get(url)
+        clock.advance(1000)
+        for url in urls:
+            response = api_client.get(url)
+            with django_assert_num_queries(0):
+                not_modified = api_client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+            assert not_modified.status_code == 304
+            assert not not_modified.content
+            assert not_modified['ETag'] == response['ETag']
+            with django_assert_num_queries(0):
+                not_modified = api_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+            assert not_modified.status_code == 304
+
+    def test_write_changes_etag(self, api_client, urls, review):
+        etags = {url: api_client.get(url)['ETag'] for url in urls}
+        Comment.objects.create(review=review, author=review.author,
+                               text='Комментарий')
+        comments_url = urls[-1]
+        response = api_client.get(
+            comments_url, HTTP_IF_NONE_MATCH=etags[comments_url]
+        )
+        assert response.status_code == 200
+        assert response.json()['count'] == 1
+        assert api_client.get(
+            urls[0], HTTP_IF_NONE_MATCH=etags[urls[0]]
+        ).status_code == 304
+
+        review.score = 2
+        review.save()
+        for url in urls:
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == 200, url
+
+    def test_same_second_change(self, api_client, urls, review, clock):
+        """Изменение в ту же секунду не даёт устаревшего 304."""
+        url = urls[-1]
+        response = api_client.get(url)
+        assert 'Last-Modified' not in response
+        since = http_date(clock.now // 1000)
+        clock.advance(700)
+        Comment.objects.create(review=review, author=review.author,
+                               text='Комментарий')
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        assert response.status_code == 200
+        assert response.json()['count'] == 1
+        clock.advance(1000)
+        response = api_client.get(url)
+        assert response['Last-Modified'] == since
+        assert api_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=since
+        ).status_code == 304
+
+    def test_concurrent_bumps(self, clock):
+        """Изменения в одну миллисекунду дают разные версии."""
+        versions = {cache.get_versions(('title',))[0]}
+        for _ in range(3):
+            cache.bump_versions('title')
+            versions.add(cache.get_versions(('title',))[0])
+        assert len(versions) == 4
+
+    def test_etag_depends_on_query(self, api_client, urls):
+        url = urls[1]
+        assert (
+            api_client.get(url)['ETag']
+            != api_client.get(f'{url}?limit=1')['ETag']
+        )
+
+    def test_authenticated_user(self, api_client, urls, review):
+        api_client.force_authenticate(user=review.author)
+        etag = api_client.get(urls[1])['ETag']
+        response = api_client.get(urls[1], HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
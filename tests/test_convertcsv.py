@@ -0,0 +1,85 @@
+import csv
+
+import pytest
+from reviews.management.commands._convertcsv import (MODEL_DICT,
+                                                     cvs_to_dj_model,
+                                                     import_model)
+from reviews.management.commands._exportdata import dj_model_to_files
+from reviews.models import Category, Review, Title, User
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImportModel:
+
+    def test_batches_and_sequence(self, tmp_path):
+        path = write_csv(tmp_path / 'category.csv', [
+            {'id': i, 'name': f'Категория {i}', 'slug': f'category-{i}'}
+            for i in range(1, 6)
+        ])
+        assert import_model(Category, path, batch_size=2) == 5
+        assert Category.objects.count() == 5
+        # SQLite не сбрасывает счётчик AUTOINCREMENT между тестами.
+        category = Category.objects.create(name='Новая', slug='new')
+        assert category.pk > 5
+
+    def test_keeps_pub_date(self, tmp_path):
+        user = User.objects.create(username='author', email='a@yamdb.fake')
+        title = Title.objects.create(name='Произведение', year=2000)
+        path = write_csv(tmp_path / 'review.csv', [{
+            'id': 1, 'title_id': title.pk, 'text': 'Отзыв',
+            'author_id': user.pk, 'score': 7,
+            'pub_date': '2019-09-24T21:08:21.567Z',
+        }])
+        import_model(Review, path)
+        assert Review.objects.get().pub_date.year == 2019
+
+    def test_rollback_on_bad_row(self, tmp_path):
+        path = write_csv(tmp_path / 'category.csv', [
+            {'id': 1, 'name': 'Фильм', 'slug': 'movie'},
+            {'id': 2, 'name': 'Книга', 'slug': 'book'},
+            {'id': 3, 'name': 'Дубль', 'slug': 'movie'},
+        ])
+        with pytest.raises(Exception):
+            import_model(Category, path, batch_size=2)
+        assert not Category.objects.exists()
+
+
+@pytest.fixture
+def catalog(db):
+    user = User.objects.create(username='author', email='a@yamdb.fake',
+                               bio='')
+    category = Category.objects.create(name='Фильм', slug='movie')
+    Title.objects.create(name='Без категории', year=1999)
+    title = Title.objects.create(name='Фильм, "в кавычках"\nи с переносом',
+                                 year=2000, category=category)
+    Review.objects.create(title=title, author=user, text='Отзыв', score=7)
+
+
+def snapshot():
+    return {
+        model: list(model.objects.order_by('pk').values())
+        for model in MODEL_DICT
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('fmt, compress', (
+    ('csv', False), ('csv', True), ('jsonl', False), ('jsonl', True),
+))
+def test_export_round_trip(catalog, tmp_path, fmt, compress):
+    before = snapshot()
+    dj_model_to_files(str(tmp_path), fmt, compress, chunk_size=1)
+    for model in reversed(list(MODEL_DICT)):
+        model.objects.all().delete()
+
+    cvs_to_dj_model(batch_size=2, data_dir=str(tmp_path))
+
+    assert snapshot() == before
@@ -0,0 +1,100 @@
+import re
+
+import pytest
+from core.metrics import (check_connections, finish_request, get_request_stats,
+                          get_totals, start_request)
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+HEADER_RE = re.compile(r'opened=(\d+); reused=(\d+); wait=\d+\.\d{2}')
+
+
+@pytest.fixture
+def request_stats():
+    token = start_request()
+    yield get_request_stats()
+    finish_request(token)
+
+
+@pytest.fixture
+def health_checks(monkeypatch, settings):
+    settings.DATABASE_HEALTH_CHECKS = True
+    connection = connections['default']
+    closed = []
+    monkeypatch.setattr(connection, 'close', lambda: closed.append(True))
+    return connection, closed
+
+
+class TestConnectionMetrics:
+
+    def test_header(self, api_client, db, settings):
+        settings.DATABASE_METRICS_HEADER = True
+        response = api_client.get('/api/v1/titles/')
+        opened, reused = HEADER_RE.fullmatch(
+            response['X-DB-Connections']
+        ).groups()
+        assert (int(opened), int(reused)) == (0, 1)
+        settings.DATABASE_METRICS_HEADER = False
+        assert 'X-DB-Connections' not in api_client.get('/api/v1/titles/')
+
+    def test_opened(self, db, request_stats):
+        totals = get_totals()
+        wrapper = DatabaseWrapper(
+            dict(connections['default'].settings_dict, NAME=':memory:'),
+            'metrics',
+        )
+        wrapper.ensure_connection()
+        wrapper.close()
+        assert request_stats.opened == 1
+        assert get_totals()['opened'] == totals['opened'] + 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_usable_connection_reused(self, health_checks, request_stats):
+        connection, closed = health_checks
+        connection.ensure_connection()
+        check_connections()
+        assert request_stats.reused == 0
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connection.ensure_connection()
+        assert not closed
+        assert request_stats.reused == 1
+        assert request_stats.wait > 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_broken_connection_closed(self, health_checks, request_stats,
+                                      monkeypatch):
+        connection, closed = health_checks
+        connection.ensure_connection()
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        check_connections()
+        assert not closed
+        connection.ensure_connection()
+        assert closed
+        assert request_stats.reused == 0
+
+    @pytest.mark.django_db(transaction=True,
+                           databases=('default', 'replica'))
+    def test_unused_connection_not_checked(self, health_checks,
+                                           request_stats, monkeypatch):
+        checked = []
+        replica = connections['replica']
+        replica.ensure_connection()
+        monkeypatch.setattr(replica, 'is_usable',
+                            lambda: checked.append(True))
+        check_connections()
+        connections['default'].ensure_connection()
+        assert not checked
+        assert request_stats.reused == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_health_checks_disabled(self, request_stats, monkeypatch,
+                                    settings):
+        settings.DATABASE_HEALTH_CHECKS = False
+        connection = connections['default']
+        connection.ensure_connection()
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        check_connections()
+        connection.ensure_connection()
+        assert connection.connection is not None
+        assert request_stats.reused == 1
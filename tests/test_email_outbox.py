@@ -0,0 +1,131 @@
+import os
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from core import outbox
+from core.models import EmailOutbox
+from core.outbox import enqueue_mail, send_batch
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+
+@pytest.fixture
+def mailbox(settings, tmp_path):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+    settings.EMAIL_FILE_PATH = str(tmp_path)
+    return tmp_path
+
+
+def sent_files(mailbox):
+    return [
+        (mailbox / name).read_text(encoding='utf-8')
+        for name in os.listdir(mailbox)
+    ]
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_enqueues(self, api_client, mailbox):
+        response = api_client.post('/api/v1/auth/signup/', {
+            'username': 'reader', 'email': 'reader@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert sent_files(mailbox) == []
+        email = EmailOutbox.objects.get()
+        assert email.recipients == 'reader@yamdb.fake'
+        assert email.status == EmailOutbox.PENDING
+
+        call_command('send_emails', '--once', stdout=StringIO())
+
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == (EmailOutbox.SENT, 1)
+        files = sent_files(mailbox)
+        assert len(files) == 1
+        assert 'confirmation_code' in files[0]
+
+    def test_batches_and_retry(self, mailbox, settings):
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        for i in range(5):
+            enqueue_mail('Тема', 'Текст', 'yamdb@yamdb.fake',
+                         [f'user{i}@yamdb.fake'])
+        broken = enqueue_mail('Тема\nс переводом строки', 'Текст',
+                              'yamdb@yamdb.fake', ['broken@yamdb.fake'])
+
+        call_command('send_emails', '--once', '--batch-size', '2',
+                     stdout=StringIO())
+
+        assert EmailOutbox.objects.filter(
+            status=EmailOutbox.SENT
+        ).count() == 5
+        broken.refresh_from_db()
+        assert broken.status == EmailOutbox.PENDING
+        assert broken.attempts == 1
+        assert broken.send_after > timezone.now()
+        assert 'BadHeaderError' in broken.last_error
+
+        EmailOutbox.objects.filter(pk=broken.pk).update(
+            send_after=timezone.now()
+        )
+        call_command('send_emails', '--once', stdout=StringIO())
+        broken.refresh_from_db()
+        assert (broken.status, broken.attempts) == (EmailOutbox.FAILED, 2)
+
+    def test_expired_lease(self, settings):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        now = timezone.now()
+        stale, busy = (
+            enqueue_mail('Тема', 'Текст', '', [f'{name}@yamdb.fake'])
+            for name in ('stale', 'busy')
+        )
+        EmailOutbox.objects.filter(pk=stale.pk).update(
+            status=EmailOutbox.SENDING, send_after=now - timedelta(seconds=1)
+        )
+        EmailOutbox.objects.filter(pk=busy.pk).update(
+            status=EmailOutbox.SENDING, send_after=now + timedelta(minutes=5)
+        )
+        result = send_batch()
+        assert (result.sent, result.failed) == (1, 0)
+        assert [message.to for message in mail.outbox] == [
+            ['stale@yamdb.fake']
+        ]
+        busy.refresh_from_db()
+        assert busy.status == EmailOutbox.SENDING
+
+    def test_connection_error_releases(self, settings, monkeypatch):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        email = enqueue_mail('Тема', 'Текст', '', ['user@yamdb.fake'])
+
+        def get_connection():
+            raise ConnectionRefusedError('SMTP недоступен')
+        monkeypatch.setattr(outbox, 'get_connection', get_connection)
+        with pytest.raises(ConnectionRefusedError):
+            send_batch()
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == (EmailOutbox.PENDING, 0)
+        assert email.send_after <= timezone.now()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sent_outside_transaction(settings, monkeypatch):
+    """SMTP не выполняется в транзакции с заблокированными строками."""
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    email = enqueue_mail('Тема', 'Текст', '', ['user@yamdb.fake'])
+    seen = []
+    send_messages = mail.backends.locmem.EmailBackend.send_messages
+
+    def checked_send(self, messages):
+        seen.append((
+            connection.in_atomic_block,
+            EmailOutbox.objects.get(pk=email.pk).status,
+        ))
+        return send_messages(self, messages)
+    monkeypatch.setattr(mail.backends.locmem.EmailBackend, 'send_messages',
+                        checked_send)
+    assert send_batch().sent == 1
+    assert seen == [(False, EmailOutbox.SENDING)]
+    email.refresh_from_db()
+    assert email.status == EmailOutbox.SENT
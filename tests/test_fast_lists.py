@@ -0,0 +1,146 @@
+import time
+
+import pytest
+from api.fastlist import ValuesRepresentation
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+TITLES_COUNT = 200
+
+
+@pytest.fixture
+def catalog(db):
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i} " "', year=2000 + i % 20,
+              category=movie if i % 4 else None,
+              description='' if i % 3 else None,
+              rating_sum=i * 7 % 30, rating_count=i % 4)
+        for i in range(TITLES_COUNT)
+    )
+    titles = list(Title.objects.order_by('pk'))
+    for i, title in enumerate(titles[:50]):
+        title.genre.set(genres[:i % 4])
+    User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(20)
+    )
+    authors = list(User.objects.order_by('pk'))
+    Review.objects.bulk_create(
+        Review(title=titles[0], author=author, text=f'Отзыв {i}',
+               score=i % 10 + 1)
+        for i, author in enumerate(authors)
+    )
+    review = Review.objects.order_by('pk').first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text=f'Комментарий {i}')
+        for i, author in enumerate(authors)
+    )
+    return titles[0], review
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+
+
+def get_both(client, settings, url):
+    """Ответы сериалайзера и быстрого списка."""
+    content = {}
+    for fast in (False, True):
+        settings.FAST_LIST_SERIALIZATION = fast
+        response = client.get(url)
+        assert response.status_code == 200
+        content[fast] = response.content
+    return content[False], content[True]
+
+
+class TestFastLists:
+
+    @pytest.mark.parametrize('query', (
+        '', '?limit=500', '?offset=190', '?cursor=', '?limit=3&cursor=',
+        '?category=movie', '?genre=genre-1', '?genre__all=genre-1,genre-2',
+        '?year=2005', '?name=Произведение 1', '?search=произведение 15',
+    ))
+    def test_titles(self, api_client, settings, catalog, query):
+        expected, content = get_both(
+            api_client, settings, f'/api/v1/titles/{query}'
+        )
+        assert content == expected
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/categories/', '/api/v1/genres/?search=Жанр',
+        '/api/v1/genres/?limit=1&offset=1',
+    ))
+    def test_categories_and_genres(self, api_client, settings, catalog,
+                                   url):
+        expected, content = get_both(api_client, settings, url)
+        assert content == expected
+
+    @pytest.mark.parametrize('query', (
+        '', '?limit=100', '?compact=true', '?limit=5&cursor=',
+        '?compact=1&cursor=',
+    ))
+    def test_reviews_and_comments(self, api_client, settings, catalog,
+                                  query):
+        title, review = catalog
+        reviews = f'/api/v1/titles/{title.pk}/reviews/'
+        for url in (reviews, f'{reviews}{review.pk}/comments/'):
+            expected, content = get_both(api_client, settings, url + query)
+            assert content == expected
+
+    def test_next_cursor(self, api_client, settings, catalog):
+        title, _ = catalog
+        url = f'/api/v1/titles/{title.pk}/reviews/?limit=5&cursor='
+        next_url = api_client.get(url).json()['next']
+        assert next_url
+        expected, content = get_both(api_client, settings, next_url)
+        assert content == expected
+
+    def test_boolean_fields(self, catalog):
+        class UserFlagsSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = User
+                fields = ('id', 'username', 'is_active', 'is_staff')
+
+        User.objects.filter(username='user1').update(is_active=False)
+        queryset = User.objects.order_by('pk')[:3]
+        representation = ValuesRepresentation(UserFlagsSerializer)
+        data = representation.render(representation.values(queryset))
+        assert data == UserFlagsSerializer(queryset, many=True).data
+        assert [
+            (item['is_active'], item['is_staff']) for item in data
+        ] == [(True, False), (False, False), (True, False)]
+        assert all(type(item['is_active']) is bool for item in data)
+
+    def test_same_queries(self, api_client, settings, catalog):
+        """Быстрый список не добавляет запросов к БД."""
+        url = f'/api/v1/titles/?limit={TITLES_COUNT}'
+        queries = {}
+        for fast in (False, True):
+            settings.FAST_LIST_SERIALIZATION = fast
+            with CaptureQueriesContext(connection) as context:
+                assert api_client.get(url).status_code == 200
+            queries[fast] = len(context)
+        assert queries[True] == queries[False]
+
+    @pytest.mark.benchmark
+    def test_list_benchmark(self, api_client, settings, catalog):
+        url = f'/api/v1/titles/?limit={TITLES_COUNT}'
+        results = {}
+        for fast in (False, True):
+            settings.FAST_LIST_SERIALIZATION = fast
+            started = time.perf_counter()
+            for _ in range(5):
+                assert api_client.get(url).status_code == 200
+            results[fast] = (time.perf_counter() - started) / 5
+        assert results[True] < results[False], (
+            f'Список {TITLES_COUNT} произведений, с (values(): True): '
+            f'{results}'
+        )
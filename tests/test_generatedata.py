@@ -0,0 +1,139 @@
+from collections import Counter
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from reviews.management.commands import _generatedata
+from reviews.management.commands._generatedata import (CHUNK_SIZE, Plan,
+                                                       Volumes, allocate,
+                                                       comment_rows, generate,
+                                                       next_ids, review_chunks,
+                                                       review_counts,
+                                                       review_rows)
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+VOLUMES = Volumes(users=60, categories=3, genres=8, titles=40, reviews=600,
+                  comments=300)
+
+
+def plan(seed=1, volumes=VOLUMES):
+    return Plan(volumes, seed, next_ids(),
+                review_counts(volumes, seed, 1.1), 100, True)
+
+
+class TestDistribution:
+
+    def test_allocate(self):
+        counts = allocate(1000, 50, 1.1, 1000)
+        assert sum(counts) == 1000
+        assert counts == sorted(counts, reverse=True)
+        assert counts[0] > 10 * counts[-1]
+
+    def test_allocate_cap(self):
+        counts = allocate(95, 10, 2, 10)
+        assert sum(counts) == 95
+        assert max(counts) == 10
+
+    @pytest.mark.django_db
+    def test_deterministic(self):
+        first, second, other = plan(), plan(), plan(seed=2)
+        assert first.review_counts == second.review_counts
+        assert first.review_counts != other.review_counts
+        chunk = review_chunks(first)[0]
+        assert list(review_rows(first, chunk)) == list(
+            review_rows(second, chunk)
+        )
+        assert list(comment_rows(first, 0)) != list(comment_rows(other, 0))
+
+    @pytest.mark.django_db
+    def test_review_chunks(self):
+        volumes = VOLUMES._replace(users=1000, titles=3000,
+                                   reviews=3 * CHUNK_SIZE)
+        current = plan(volumes=volumes)
+        chunks = review_chunks(current)
+        assert chunks[0][0] == 0
+        assert chunks[-1][1] == volumes.titles
+        assert [start for start, _, _ in chunks[1:]] == [
+            stop for _, stop, _ in chunks[:-1]
+        ]
+        assert chunks[-1][2] + sum(
+            current.review_counts[chunks[-1][0]:]
+        ) == volumes.reviews + 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestGenerate:
+
+    def test_volumes(self):
+        generate(VOLUMES, seed=1, batch_size=70)
+        assert User.objects.count() == VOLUMES.users
+        assert Category.objects.count() == VOLUMES.categories
+        assert Genre.objects.count() == VOLUMES.genres
+        assert Title.objects.count() == VOLUMES.titles
+        assert Review.objects.count() == VOLUMES.reviews
+        assert Comment.objects.count() == VOLUMES.comments
+        genres = Counter(GenreTitle.objects.values_list('title', flat=True))
+        assert len(genres) == VOLUMES.titles
+        assert set(genres.values()) <= {1, 2, 3, 4}
+        assert max(genres.values()) > 1
+        totals = Title.objects.aggregate(
+            count=Sum('rating_count'), sum=Sum('rating_sum'),
+        )
+        assert totals['count'] == VOLUMES.reviews
+        assert totals['sum'] == Review.objects.aggregate(
+            total=Sum('score')
+        )['total']
+        per_title = sorted(Title.objects.annotate(
+            review_total=Count('reviews')
+        ).values_list('review_total', flat=True), reverse=True)
+        assert per_title[0] <= VOLUMES.users
+        assert per_title[0] > 5 * per_title[len(per_title) // 2]
+
+    def test_same_seed_same_data(self):
+        generate(VOLUMES, seed=3)
+        fields = ('title__name', 'author__username', 'score', 'text')
+        first = list(Review.objects.order_by('pk').values_list(*fields))
+        for model in (Comment, Review, GenreTitle, Title, Genre, Category,
+                      User):
+            model.objects.all().delete()
+        generate(VOLUMES, seed=3, batch_size=7)
+        second = list(Review.objects.order_by('pk').values_list(*fields))
+        assert [row[2:] for row in first] == [row[2:] for row in second]
+
+    def test_appends_after_existing(self):
+        generate(VOLUMES._replace(comments=0), seed=1)
+        generate(VOLUMES._replace(comments=0), seed=1)
+        assert Review.objects.count() == 2 * VOLUMES.reviews
+        title = Title.objects.create(name='Новое', year=2000)
+        assert title.pk == 2 * VOLUMES.titles + 1
+
+    def test_tasks_without_plan(self, monkeypatch):
+        """План передаётся процессам один раз, не в каждой задаче."""
+        tasks = []
+        run_phase = _generatedata.run_phase
+
+        def capture(plan, phase_tasks, workers):
+            tasks.extend(phase_tasks)
+            return run_phase(plan, phase_tasks, workers)
+        monkeypatch.setattr(_generatedata, 'run_phase', capture)
+        generate(VOLUMES, seed=1)
+        assert {kind for kind, _ in tasks} == {
+            'users', 'catalog', 'titles', 'reviews', 'comments'
+        }
+        assert all(len(task) == 2 and not isinstance(task[1], Plan)
+                   for task in tasks)
+
+    def test_command(self, capsys):
+        call_command(
+            'generatedata', '--users', '5', '--titles', '3', '--reviews',
+            '15', '--comments', '4', '--genres', '2', '--categories', '1',
+        )
+        output = capsys.readouterr().out
+        assert 'Review: 15 строк' in output
+        assert Review.objects.count() == 15
+
+    def test_too_many_reviews(self):
+        with pytest.raises(ValueError):
+            generate(VOLUMES._replace(reviews=VOLUMES.users
+                                      * VOLUMES.titles + 1))
@@ -0,0 +1,135 @@
+import pytest
+from api.authentication import access_token_for
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Title, User
+
+
+@pytest.fixture
+def admin(db):
+    return User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+
+
+@pytest.fixture
+def titles(db):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    return [
+        Title.objects.create(name=f'Произведение {i}', year=2000,
+                             category=category)
+        for i in range(2)
+    ]
+
+
+def auth(client, user):
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}'
+    )
+    return client
+
+
+def user_queries(queries):
+    return [
+        query['sql'] for query in queries
+        if 'FROM "reviews_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def test_token_contains_claims(self, api_client, admin):
+        response = api_client.post('/api/v1/auth/token/', {
+            'username': admin.username,
+            'confirmation_code': default_token_generator.make_token(admin),
+        })
+        assert response.status_code == 200
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        with CaptureQueriesContext(connection) as context:
+            assert api_client.get('/api/v1/categories/').status_code == 200
+        assert user_queries(context.captured_queries) == []
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post(
+                '/api/v1/categories/', {'name': 'Книга', 'slug': 'book'}
+            )
+        assert response.status_code == 201
+        # Запись: роль и is_active читаются из БД.
+        assert len(user_queries(context.captured_queries)) == 1
+
+    def test_read_path_without_user_queries(self, api_client, admin,
+                                            titles):
+        auth(api_client, admin)
+        with CaptureQueriesContext(connection) as context:
+            for url in ('/api/v1/titles/', '/api/v1/categories/',
+                        f'/api/v1/titles/{titles[0].pk}/reviews/'):
+                assert api_client.get(url).status_code == 200
+        assert user_queries(context.captured_queries) == []
+
+    def test_write_loads_user_once(self, api_client, admin, titles):
+        auth(api_client, admin)
+        with CaptureQueriesContext(connection) as context:
+            for title in titles:
+                response = api_client.post(
+                    f'/api/v1/titles/{title.pk}/reviews/',
+                    {'text': 'Отзыв', 'score': 8}
+                )
+                assert response.status_code == 201
+                assert response.json()['author'] == 'admin'
+        assert len(user_queries(context.captured_queries)) == len(titles)
+
+    def test_write_checks_database(self, api_client, admin):
+        """Запись не зависит от версии прав в кэше другого процесса."""
+        auth(api_client, admin)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE reviews_user SET role = %s WHERE id = %s',
+                (User.USER, admin.pk)
+            )
+        response = api_client.post(
+            '/api/v1/categories/', {'name': 'Книга', 'slug': 'book'}
+        )
+        assert response.status_code == 403
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE reviews_user SET role = %s, is_active = %s '
+                'WHERE id = %s', (User.ADMIN, False, admin.pk)
+            )
+        response = api_client.post(
+            '/api/v1/categories/', {'name': 'Книга', 'slug': 'book'}
+        )
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize('changes', (
+        {'role': User.USER}, {'is_active': False}
+    ))
+    def test_bulk_update_revokes_claims(self, api_client, admin, changes):
+        auth(api_client, admin)
+        assert api_client.get('/api/v1/users/').status_code == 200
+        assert User.objects.filter(pk=admin.pk).update(**changes) == 1
+        assert api_client.get('/api/v1/users/').status_code in (401, 403)
+
+    def test_role_change_revokes_claims(self, api_client, admin):
+        auth(api_client, admin)
+        admin.role = User.USER
+        admin.save()
+        response = api_client.post(
+            '/api/v1/categories/', {'name': 'Книга', 'slug': 'book'}
+        )
+        assert response.status_code == 403
+
+        admin.bio = 'Биография'
+        admin.save()
+        auth(api_client, admin)
+        with CaptureQueriesContext(connection) as context:
+            assert api_client.get('/api/v1/titles/').status_code == 200
+        assert user_queries(context.captured_queries) == []
+
+    def test_deleted_user_rejected(self, api_client, admin):
+        auth(api_client, admin)
+        assert api_client.get('/api/v1/users/').status_code == 200
+        admin.delete()
+        assert api_client.get('/api/v1/titles/').status_code == 401
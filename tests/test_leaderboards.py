@@ -0,0 +1,183 @@
+import pytest
+from django.core.management import call_command
+from reviews.models import (Category, Genre, GenreTitle, Review, Title,
+                            TitleRank, User)
+from reviews.ranking import leaderboard
+
+GLOBAL_QUERIES = 1
+SCOPED_QUERIES = 2
+
+
+@pytest.fixture(autouse=True)
+def min_reviews(settings):
+    settings.LEADERBOARD_MIN_REVIEWS = 2
+
+
+@pytest.fixture
+def users(db):
+    return [
+        User.objects.create(username=f'user{i}', email=f'u{i}@yamdb.fake')
+        for i in range(5)
+    ]
+
+
+@pytest.fixture
+def category(db):
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genre(db):
+    return Genre.objects.create(name='Драма', slug='drama')
+
+
+def create_title(name, category=None, genres=()):
+    title = Title.objects.create(name=name, year=2000, category=category)
+    title.genre.set(genres)
+    return title
+
+
+def rate(title, users, scores):
+    return [
+        Review.objects.create(title=title, author=user, text='Отзыв',
+                              score=score)
+        for user, score in zip(users, scores)
+    ]
+
+
+def board(scope=TitleRank.GLOBAL, scope_id=0, order='rating'):
+    return [row[0] for row in leaderboard(scope, scope_id, order)]
+
+
+def ranks():
+    return list(TitleRank.objects.order_by(
+        'scope', 'scope_id', 'title_id'
+    ).values_list('scope', 'scope_id', 'title_id', 'rating', 'review_count'))
+
+
+class TestRanking:
+
+    def test_min_reviews(self, users):
+        title = create_title('Произведение')
+        reviews = rate(title, users, (8,))
+        assert board() == []
+        reviews += rate(title, users[1:], (5,))
+        assert leaderboard(TitleRank.GLOBAL) == [
+            (title.pk, 'Произведение', 65000, 2)
+        ]
+        reviews[0].score = 6
+        reviews[0].save()
+        assert leaderboard(TitleRank.GLOBAL)[0][2:] == (55000, 2)
+        reviews[1].delete()
+        assert board() == []
+
+    def test_ties(self, users):
+        first, second, popular, best = (
+            create_title(name) for name in ('Первое', 'Второе',
+                                            'Популярное', 'Лучшее')
+        )
+        rate(second, users, (6, 8))
+        rate(first, users, (8, 6))
+        rate(popular, users, (7, 7, 7))
+        rate(best, users, (9, 9))
+        assert board() == [best.pk, popular.pk, first.pk, second.pk]
+        assert board(order='reviews') == [
+            popular.pk, best.pk, first.pk, second.pk
+        ]
+
+    def test_moved_review(self, users):
+        title, other = create_title('Первое'), create_title('Второе')
+        reviews = rate(title, users, (4, 6))
+        rate(other, users[2:], (9,))
+        reviews[0].title = other
+        reviews[0].save()
+        assert board() == [other.pk]
+        assert leaderboard(TitleRank.GLOBAL)[0][2:] == (65000, 2)
+
+    def test_category_and_genres(self, users, category, genre):
+        other = Genre.objects.create(name='Комедия', slug='comedy')
+        title = create_title('Произведение', category, (genre,))
+        rate(title, users, (7, 9))
+        assert board(TitleRank.CATEGORY, category.pk) == [title.pk]
+        assert board(TitleRank.GENRE, genre.pk) == [title.pk]
+
+        title.refresh_from_db()
+        title.category = None
+        title.save()
+        title.genre.set((other,))
+        assert board(TitleRank.CATEGORY, category.pk) == []
+        assert board(TitleRank.GENRE, genre.pk) == []
+        assert board(TitleRank.GENRE, other.pk) == [title.pk]
+
+        GenreTitle.objects.create(title=title, genre=genre)
+        assert board(TitleRank.GENRE, genre.pk) == [title.pk]
+        GenreTitle.objects.filter(genre=other).delete()
+        assert board(TitleRank.GENRE, other.pk) == []
+        genre.titles.clear()
+        assert board(TitleRank.GENRE, genre.pk) == []
+        assert board() == [title.pk]
+
+    def test_rebuild(self, users, category, genre):
+        for i, scores in enumerate(((5, 6, 7), (10,), (3, 3), (8, 8, 1))):
+            title = create_title(f'Произведение {i}',
+                                 category if i % 2 else None, (genre,))
+            rate(title, users, scores)
+        incremental = ranks()
+        assert len(incremental) == 7
+        TitleRank.objects.all().delete()
+        call_command('rebuild_leaderboards')
+        assert ranks() == incremental
+        TitleRank.objects.update(rating=1)
+        call_command('rebuild_ratings')
+        assert ranks() == incremental
+
+
+class TestLeaderboardApi:
+
+    def test_global(self, api_client, users, django_assert_num_queries):
+        title = create_title('Произведение')
+        rate(title, users, (7, 8))
+        with django_assert_num_queries(GLOBAL_QUERIES):
+            response = api_client.get('/api/v1/leaderboards/')
+        assert response.status_code == 200
+        assert response.json() == [{
+            'position': 1, 'id': title.pk, 'name': 'Произведение',
+            'rating': 7.5, 'review_count': 2,
+        }]
+
+    def test_scoped(self, api_client, users, category, genre,
+                    django_assert_num_queries):
+        titles = [create_title(f'Произведение {i}', category, (genre,))
+                  for i in range(3)]
+        for title, score in zip(titles, (5, 9, 7)):
+            rate(title, users, (score, score))
+        for path in ('categories/movie', 'genres/drama'):
+            with django_assert_num_queries(SCOPED_QUERIES):
+                response = api_client.get(
+                    f'/api/v1/leaderboards/{path}/?limit=2'
+                )
+            assert response.status_code == 200
+            assert [item['id'] for item in response.json()] == [
+                titles[1].pk, titles[2].pk
+            ]
+        response = api_client.get('/api/v1/leaderboards/genres/unknown/')
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('query', (
+        'order=name', 'limit=0', 'limit=101', 'limit=many'
+    ))
+    def test_invalid_params(self, api_client, db, query):
+        response = api_client.get(f'/api/v1/leaderboards/?{query}')
+        assert response.status_code == 400
+
+    def test_invalidation(self, api_client, users):
+        first, second = create_title('Первое'), create_title('Второе')
+        rate(first, users, (8, 8))
+        rate(second, users, (7, 7))
+        url = '/api/v1/leaderboards/'
+        assert api_client.get(url).json()[0]['id'] == first.pk
+        assert api_client.get(url)['X-Cache'] == 'HIT'
+        rate(second, users[2:], (10, 10))
+        response = api_client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()[0]['id'] == second.pk
@@ -0,0 +1,151 @@
+import time
+from datetime import timedelta
+
+import pytest
+from api.pagination import PubDatePagination
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from reviews.models import Review, Title, User
+
+REVIEWS_COUNT = 10010
+PAGE_SIZE = 10
+
+
+@pytest.fixture
+def title(db):
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+@pytest.fixture
+def reviews(title):
+    User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(REVIEWS_COUNT)
+    )
+    Review.objects.bulk_create(
+        Review(title=title, author_id=author_id, text='Отзыв', score=5)
+        for author_id in User.objects.values_list('pk', flat=True)
+    )
+    # Одинаковый pub_date у части отзывов проверяет второй ключ (id).
+    first_id = Review.objects.order_by('pk').values_list('pk', flat=True)[0]
+    Review.objects.filter(
+        pk__range=(first_id + 1000, first_id + 4000)
+    ).update(pub_date=timezone.now() - timedelta(days=1))
+    return Review.objects.filter(title=title).order_by('-pub_date', '-id')
+
+
+def walk(client, url):
+    """Обходит все страницы по ссылкам next и возвращает id записей."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' not in data
+        ids.extend(item['id'] for item in data['results'])
+        url = data['next']
+    return ids
+
+
+class TestKeysetPagination:
+
+    def test_offset_is_default(self, api_client, title):
+        response = api_client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        assert response.status_code == 200
+        assert 'count' in response.json()
+
+    def test_reviews_pages(self, api_client, title, reviews):
+        ids = walk(
+            api_client,
+            f'/api/v1/titles/{title.pk}/reviews/?cursor=&limit=1000'
+        )
+        assert ids == list(reviews.values_list('pk', flat=True))
+
+    def test_previous_link(self, api_client, title, reviews):
+        url = f'/api/v1/titles/{title.pk}/reviews/?cursor='
+        first = api_client.get(url).json()
+        assert first['previous'] is None
+        second = api_client.get(first['next']).json()
+        back = api_client.get(second['previous']).json()
+        assert back['results'] == first['results']
+
+    def test_titles_pages(self, api_client, db):
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {i}', year=2000) for i in range(25)
+        )
+        ids = walk(api_client, '/api/v1/titles/?cursor=')
+        assert ids == sorted(Title.objects.values_list('pk', flat=True))
+
+    def test_invalid_cursor(self, api_client, title):
+        response = api_client.get(
+            f'/api/v1/titles/{title.pk}/reviews/?cursor=invalid'
+        )
+        assert response.status_code == 404
+
+
+class TestKeysetBenchmark:
+
+    @staticmethod
+    def measure(client, url, repeat=20):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            assert client.get(url).status_code == 200
+        return (time.perf_counter() - started) / repeat
+
+    def test_page_1000_uses_index(self, api_client, title, reviews,
+                                  settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        # Cursor 1000-й страницы указывает на последнюю запись 999-й.
+        page_1000 = self.link_after(url, reviews[PAGE_SIZE * 999 - 1])
+        with CaptureQueriesContext(connection) as context:
+            results = api_client.get(page_1000).json()['results']
+        for query in context.captured_queries:
+            assert 'COUNT(' not in query['sql']
+            assert 'OFFSET' not in query['sql']
+        assert [item['id'] for item in results] == list(
+            reviews[PAGE_SIZE * 999:PAGE_SIZE * 1000].values_list(
+                'pk', flat=True
+            )
+        )
+        page_query = next(
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_review"' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {page_query}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        # Диапазон индекса без сортировки: стоимость не зависит от
+        # глубины страницы.
+        assert 'review_title_pub_date_idx' in plan
+        assert 'TEMP B-TREE' not in plan
+
+    @pytest.mark.benchmark
+    def test_page_1000_latency_is_flat(self, api_client, title, reviews,
+                                       settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        page_1 = f'{url}?cursor='
+        page_1000 = self.link_after(url, reviews[PAGE_SIZE * 999 - 1])
+        first = self.measure(api_client, page_1)
+        deep = self.measure(api_client, page_1000)
+        offset = self.measure(
+            api_client, f'{url}?offset={PAGE_SIZE * 999}'
+        )
+        assert deep < first * 3, (
+            'Время ответа keyset-пагинации растёт с глубиной страницы: '
+            f'страница 1 {first * 1000:.2f} мс, '
+            f'страница 1000 {deep * 1000:.2f} мс; '
+            f'offset: страница 1000 {offset * 1000:.2f} мс'
+        )
+
+    @staticmethod
+    def link_after(url, review):
+        """Ссылка на страницу, следующую за отзывом review."""
+        paginator = PubDatePagination()
+        paginator.request = Request(APIRequestFactory().get(url))
+        paginator.model = Review
+        return paginator.encode_cursor(review, reverse=False)
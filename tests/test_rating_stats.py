@@ -0,0 +1,126 @@
+import pytest
+from django.core.management import call_command
+from reviews.models import Category, Review, Title, User
+
+
+@pytest.fixture
+def users(db):
+    return [
+        User.objects.create(username=f'user{i}', email=f'u{i}@yamdb.fake')
+        for i in range(10)
+    ]
+
+
+@pytest.fixture
+def title(db):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    return Title.objects.create(name='Произведение', year=2000,
+                                category=category)
+
+
+def histogram(title):
+    title.refresh_from_db()
+    return title.rating_histogram
+
+
+def url(title):
+    return f'/api/v1/titles/{title.pk}/rating-stats/'
+
+
+class TestRatingHistogram:
+
+    def test_incremental(self, title, users):
+        other = Title.objects.create(name='Другое', year=2001)
+        reviews = [
+            Review.objects.create(title=title, author=user, text='Отзыв',
+                                  score=score)
+            for user, score in zip(users, (3, 7, 7, 10))
+        ]
+        assert histogram(title) == [0, 0, 1, 0, 0, 0, 2, 0, 0, 1]
+        reviews[0].score = 8
+        reviews[0].save()
+        assert histogram(title) == [0, 0, 0, 0, 0, 0, 2, 1, 0, 1]
+        reviews[1].title = other
+        reviews[1].save()
+        assert histogram(title) == [0, 0, 0, 0, 0, 0, 1, 1, 0, 1]
+        assert histogram(other) == [0, 0, 0, 0, 0, 0, 1, 0, 0, 0]
+        reviews[3].delete()
+        assert histogram(title) == [0, 0, 0, 0, 0, 0, 1, 1, 0, 0]
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (15, 2)
+
+    def test_queryset_update_recounts(self, title, users):
+        review = Review.objects.create(title=title, author=users[0],
+                                       text='Отзыв', score=4)
+        review = Review.objects.only('id', 'text').get(pk=review.pk)
+        Review.objects.filter(pk=review.pk).update(score=9)
+        review.save()
+        assert histogram(title) == [0, 0, 0, 0, 0, 0, 0, 0, 1, 0]
+
+    def test_histogram_field(self):
+        assert Title.histogram_field(1) == 'score_1'
+        assert Title.histogram_field(10) == 'score_10'
+        for score in (0, 11, -1):
+            with pytest.raises(ValueError):
+                Title.histogram_field(score)
+
+    def test_rebuild(self, title, users):
+        for user, score in zip(users, (1, 5, 5, 9)):
+            Review.objects.create(title=title, author=user, text='Отзыв',
+                                  score=score)
+        empty = Title.objects.create(name='Без отзывов', year=2001)
+        Title.objects.update(score_1=5, score_5=0, rating_count=3)
+        call_command('rebuild_ratings')
+        assert histogram(title) == [1, 0, 0, 0, 2, 0, 0, 0, 1, 0]
+        assert histogram(empty) == [0] * 10
+        call_command('rebuild_ratings', '--check')
+
+
+class TestRatingStats:
+
+    def test_stats(self):
+        stats = Title.rating_stats([1, 0, 0, 0, 2, 0, 0, 0, 1, 0])
+        assert stats['count'] == 4
+        assert stats['mean'] == 5
+        assert stats['median'] == 5
+        assert stats['percentiles'] == {'10': 1, '25': 1, '75': 5, '90': 9}
+        assert Title.rating_stats([0] * 9 + [3])['median'] == 10
+        assert Title.rating_stats([0, 1] + [0] * 6 + [1, 0])['median'] == 5.5
+
+    def test_empty(self):
+        stats = Title.rating_stats([0] * 10)
+        assert stats['count'] == 0
+        assert stats['mean'] is None
+        assert stats['median'] is None
+        assert set(stats['percentiles'].values()) == {None}
+
+    def test_endpoint(self, api_client, title, users,
+                      django_assert_num_queries):
+        for user, score in zip(users, (2, 8, 8, 9, 10)):
+            Review.objects.create(title=title, author=user, text='Отзыв',
+                                  score=score)
+        with django_assert_num_queries(1):
+            response = api_client.get(url(title))
+        assert response.status_code == 200
+        assert response.json() == {
+            'count': 5,
+            'mean': 7.4,
+            'median': 8,
+            'percentiles': {'10': 2, '25': 8, '75': 9, '90': 10},
+            'histogram': {'1': 0, '2': 1, '3': 0, '4': 0, '5': 0, '6': 0,
+                          '7': 0, '8': 2, '9': 1, '10': 1},
+        }
+        assert api_client.get(
+            '/api/v1/titles/0/rating-stats/'
+        ).status_code == 404
+
+    def test_cache_invalidated(self, api_client, title, users, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 300
+        assert api_client.get(url(title)).json()['count'] == 0
+        response = api_client.get(url(title))
+        assert response['X-Cache'] == 'HIT'
+        Review.objects.create(title=title, author=users[0], text='Отзыв',
+                              score=6)
+        response = api_client.get(url(title))
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['median'] == 6
@@ -0,0 +1,91 @@
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.models import Review, Title, TitleRank, User
+
+
+@pytest.fixture
+def users(db):
+    return [
+        User.objects.create(username=f'user{i}', email=f'u{i}@yamdb.fake')
+        for i in range(4)
+    ]
+
+
+@pytest.fixture
+def titles(db):
+    return [
+        Title.objects.create(name=f'Произведение {i}', year=2000)
+        for i in range(2)
+    ]
+
+
+def totals(title):
+    title = Title.objects.get(pk=title.pk)
+    return title.rating_sum, title.rating_count, title.rating
+
+
+class TestRatingMaintenance:
+
+    def test_create(self, titles, users):
+        assert totals(titles[0]) == (0, 0, None)
+        for user, score in zip(users, (4, 9)):
+            Review.objects.create(title=titles[0], author=user,
+                                  text='Отзыв', score=score)
+        assert totals(titles[0]) == (13, 2, 6.5)
+
+    def test_update(self, titles, users):
+        review = Review.objects.create(title=titles[0], author=users[0],
+                                       text='Отзыв', score=4)
+        review.score = 10
+        review.save()
+        assert totals(titles[0]) == (10, 1, 10)
+        review = Review.objects.get(pk=review.pk)
+        review.text = 'Другой отзыв'
+        review.save()
+        assert totals(titles[0]) == (10, 1, 10)
+
+    def test_move(self, titles, users):
+        review = Review.objects.create(title=titles[0], author=users[0],
+                                       text='Отзыв', score=6)
+        review.title, review.score = titles[1], 8
+        review.save()
+        assert totals(titles[0]) == (0, 0, None)
+        assert totals(titles[1]) == (8, 1, 8)
+
+    def test_delete(self, titles, users):
+        reviews = [
+            Review.objects.create(title=titles[0], author=user,
+                                  text='Отзыв', score=score)
+            for user, score in zip(users, (2, 7))
+        ]
+        reviews[0].delete()
+        assert totals(titles[0]) == (7, 1, 7)
+        Review.objects.filter(pk=reviews[1].pk).delete()
+        assert totals(titles[0]) == (0, 0, None)
+
+    def test_stale_title_save(self, titles, users, settings):
+        settings.LEADERBOARD_MIN_REVIEWS = 1
+        title = Title.objects.get(pk=titles[0].pk)
+        Review.objects.create(title=titles[0], author=users[0],
+                              text='Отзыв', score=9)
+        title.name = 'Новое название'
+        title.save()
+        assert totals(title) == (9, 1, 9)
+        assert Title.objects.get(pk=title.pk).score_9 == 1
+        assert TitleRank.objects.filter(title=title).count() == 1
+        call_command('rebuild_ratings', '--check')
+
+
+class TestRebuildRatings:
+
+    def test_check(self, titles, users):
+        Review.objects.create(title=titles[0], author=users[0],
+                              text='Отзыв', score=5)
+        call_command('rebuild_ratings', '--check')
+        Title.objects.filter(pk=titles[0].pk).update(rating_sum=1)
+        with pytest.raises(CommandError, match='1 произведений'):
+            call_command('rebuild_ratings', '--check')
+        assert totals(titles[0]) == (1, 1, 1)
+        call_command('rebuild_ratings')
+        assert totals(titles[0]) == (5, 1, 5)
+        call_command('rebuild_ratings', '--check')
@@ -0,0 +1,117 @@
+import datetime
+import io
+import json
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+import pytest
+from api import renderers
+from api.renderers import FastJSONParser, FastJSONRenderer
+from api.serializers import TitleGetSerializer
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Category, Genre, Title
+
+TITLES_COUNT = 1000
+
+DATA = OrderedDict((
+    ('id', 1),
+    ('name', 'Побег из Шоушенка \u2028\u2029 "кавычки" \\'),
+    ('rating', None),
+    ('score', 7.5),
+    ('big', 2 ** 70),
+    ('decimal', Decimal('3.14')),
+    ('created', datetime.datetime(2019, 9, 24, 21, 8, 21, 567000,
+                                  tzinfo=timezone.utc)),
+    ('naive', datetime.datetime(2019, 9, 24, 21, 8, 21)),
+    ('date', datetime.date(2019, 9, 24)),
+    ('lazy', gettext_lazy('Отзыв уже был ранее')),
+    ('genre', [{'name': 'Драма', 'slug': 'drama'}, (1, True, False)]),
+    ('nested', {1: 'нестроковый ключ'}),
+))
+
+
+@pytest.fixture
+def titles(db):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category,
+              description='Описание ' * 20)
+        for i in range(TITLES_COUNT)
+    )
+    for title in Title.objects.all()[:100]:
+        title.genre.set(genres)
+    return Title.objects.select_related('category').prefetch_related('genre')
+
+
+class TestFastJSON:
+
+    @pytest.mark.parametrize('data', (
+        DATA,
+        {key: value for key, value in DATA.items() if key != 'nested'},
+        [], {}, 'строка', None,
+    ))
+    @pytest.mark.parametrize('media_type', (
+        None, 'application/json', 'application/json; indent=4',
+    ))
+    def test_same_output(self, data, media_type):
+        assert FastJSONRenderer().render(data, media_type) == (
+            JSONRenderer().render(data, media_type)
+        )
+
+    def test_stdlib_fallback(self, monkeypatch):
+        expected = JSONRenderer().render(DATA)
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert FastJSONRenderer().render(DATA) == expected
+        stream = io.BytesIO(expected)
+        assert FastJSONParser().parse(stream)['name'] == DATA['name']
+
+    @pytest.mark.parametrize('body', (
+        b'{"name": "\xd0\x9f\xd0\xbe\xd0\xb1\xd0\xb5\xd0\xb3", "ids": [1, 2]}',
+        b'[1.5, null, true, "\\u2028"]',
+    ))
+    def test_parser(self, body):
+        assert FastJSONParser().parse(io.BytesIO(body)) == (
+            JSONParser().parse(io.BytesIO(body))
+        )
+
+    @pytest.mark.parametrize('body', (b'{"name": ', b'[NaN]'))
+    def test_parser_errors(self, body):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(body))
+
+    def test_api_response(self, api_client, titles):
+        response = api_client.get('/api/v1/titles/?limit=5')
+        assert response['Content-Type'] == 'application/json'
+        assert response.content == JSONRenderer().render(response.data)
+
+    def test_render_titles(self, titles):
+        data = TitleGetSerializer(titles, many=True).data
+        assert len(data) == TITLES_COUNT
+        assert json.loads(FastJSONRenderer().render(data)) == json.loads(
+            JSONRenderer().render(data)
+        )
+
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(renderers.orjson is None, reason='нет orjson')
+    def test_render_benchmark(self, titles):
+        data = TitleGetSerializer(titles, many=True).data
+        results = {}
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            started = time.perf_counter()
+            for _ in range(10):
+                renderer.render(data)
+            results[type(renderer).__name__] = (
+                (time.perf_counter() - started) / 10
+            )
+        assert results['FastJSONRenderer'] < results['JSONRenderer'], (
+            f'Рендеринг {TITLES_COUNT} произведений, с: {results}'
+        )
@@ -0,0 +1,154 @@
+import pytest
+from api.authentication import access_token_for
+from core.routers import ReplicaRouter, reset_replica, set_replica
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title, User
+
+pytestmark = pytest.mark.django_db(
+    transaction=True, databases=['default', 'replica']
+)
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings, tmp_path):
+    """Реплики работают только с общим для процессов кэшем."""
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path),
+    }}
+    settings.DATABASE_REPLICAS = ['replica']
+    settings.DATABASE_REPLICA_LAG = 5
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+
+
+@pytest.fixture
+def title():
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+def client_for(api_client, username):
+    user = User.objects.create(username=username,
+                               email=f'{username}@yamdb.fake')
+    api_client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}'
+    )
+    return api_client
+
+
+def count_queries(client, method, url, **kwargs):
+    """Ответ и число запросов к основной БД и к реплике."""
+    with CaptureQueriesContext(connections['default']) as primary:
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(client, method)(url, **kwargs)
+    return response, len(primary), len(replica)
+
+
+def age_versions(monkeypatch, seconds=60):
+    """Версии ресурсов изменены давно: их можно читать из реплики."""
+    from api import cache
+
+    resource_state = cache.resource_state
+
+    def aged_state(resources):
+        versions, modified = resource_state(resources)
+        return versions, modified - seconds * 1000
+    monkeypatch.setattr(cache, 'resource_state', aged_state)
+
+
+class TestReplicaRouting:
+
+    def test_safe_requests_read_replica(self, api_client, title,
+                                        monkeypatch):
+        age_versions(monkeypatch)
+        response, primary, replica = count_queries(
+            api_client, 'get', '/api/v1/titles/'
+        )
+        assert response.status_code == 200
+        assert response.json()['count'] == 1
+        assert primary == 0
+        assert replica > 0
+
+    def test_recently_changed_reads_primary(self, api_client, title):
+        _, primary, replica = count_queries(
+            api_client, 'get', '/api/v1/titles/'
+        )
+        assert primary > 0
+        assert replica == 0
+
+    def test_read_your_writes(self, api_client, title, monkeypatch,
+                              settings):
+        age_versions(monkeypatch)
+        client = client_for(api_client, 'author')
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response, primary, replica = count_queries(
+            client, 'post', url, data={'text': 'Отзыв', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert replica == 0
+        response, primary, replica = count_queries(client, 'get', url)
+        assert response.json()['count'] == 1
+        assert primary > 0
+        assert replica == 0
+        other = client_for(api_client, 'reader')
+        _, primary, replica = count_queries(other, 'get', url)
+        assert primary == 0
+        assert replica > 0
+
+    def test_failed_write_not_sticky(self, api_client, title, monkeypatch):
+        age_versions(monkeypatch)
+        client = client_for(api_client, 'author')
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = client.post(url, data={'text': 'Отзыв', 'score': 11})
+        assert response.status_code == 400
+        _, primary, replica = count_queries(client, 'get', url)
+        assert primary == 0
+        assert replica > 0
+
+    def test_local_cache(self, api_client, title, settings):
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        with pytest.raises(ImproperlyConfigured,
+                           match='общий для процессов кэш'):
+            api_client.get('/api/v1/titles/')
+
+    def test_sticky_window_expires(self, api_client, title, monkeypatch,
+                                   settings):
+        age_versions(monkeypatch)
+        settings.DATABASE_REPLICA_LAG = 0
+        client = client_for(api_client, 'author')
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        client.post(url, data={'text': 'Отзыв', 'score': 7})
+        _, primary, replica = count_queries(client, 'get', url)
+        assert primary == 0
+        assert replica > 0
+
+    def test_router(self, title):
+        router = ReplicaRouter()
+        assert router.db_for_read(Title) == 'default'
+        token = set_replica('replica')
+        try:
+            assert router.db_for_read(Title) == 'replica'
+            obj = Title.objects.get(pk=title.pk)
+            assert obj._state.db == 'replica'
+            assert router.db_for_write(Title, instance=obj) == 'default'
+            with transaction.atomic():
+                assert router.db_for_read(Title) == 'default'
+        finally:
+            reset_replica(token)
+        assert router.allow_migrate('default', 'reviews')
+        assert not router.allow_migrate('replica', 'reviews')
+
+    def test_saved_to_primary(self, title):
+        token = set_replica('replica')
+        try:
+            obj = Title.objects.get(pk=title.pk)
+            obj.name = 'Новое название'
+            with CaptureQueriesContext(connections['replica']) as replica:
+                obj.save()
+        finally:
+            reset_replica(token)
+        assert len(replica) == 0
+        assert Title.objects.get().name == 'Новое название'
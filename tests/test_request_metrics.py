@@ -0,0 +1,142 @@
+import re
+import time
+
+import pytest
+from core.metrics import LATENCY_BUCKETS, reset
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Title, User
+
+SERVER_TIMING_RE = re.compile(
+    r'db;dur=(\d+\.\d{2});desc="(\d+) queries", '
+    r'serialize;dur=(\d+\.\d{2}), total;dur=(\d+\.\d{2})'
+)
+METRICS_URL = '/api/v1/metrics/'
+
+
+@pytest.fixture(autouse=True)
+def metrics(settings):
+    settings.REQUEST_METRICS = True
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    reset()
+    yield
+    reset()
+
+
+@pytest.fixture
+def titles(db):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category)
+        for i in range(10)
+    )
+
+
+@pytest.fixture
+def admin_client(api_client, db):
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+    api_client.force_authenticate(user=admin)
+    return api_client
+
+
+def samples(text, name):
+    """{метки: значение} строк показателя name."""
+    return {
+        labels: float(value)
+        for labels, value in re.findall(
+            rf'^yamdb_{name}{{([^}}]*)}} (\S+)$', text, re.MULTILINE
+        )
+    }
+
+
+class TestRequestMetrics:
+
+    def test_server_timing(self, api_client, titles):
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get('/api/v1/titles/')
+        db_time, count, serialize, total = SERVER_TIMING_RE.fullmatch(
+            response['Server-Timing']
+        ).groups()
+        assert int(count) == len(queries)
+        assert float(serialize) > 0
+        assert float(db_time) + float(serialize) <= float(total)
+
+    def test_disabled(self, api_client, titles, settings):
+        settings.REQUEST_METRICS = False
+        assert 'Server-Timing' not in api_client.get('/api/v1/titles/')
+
+    def test_export(self, admin_client, titles):
+        for _ in range(3):
+            admin_client.get('/api/v1/titles/')
+        admin_client.get('/api/v1/titles/0/')
+        response = admin_client.get(METRICS_URL)
+        assert response.status_code == 200
+        assert response['Content-Type'] == (
+            'text/plain; version=0.0.4; charset=utf-8'
+        )
+        text = response.content.decode()
+        assert '# TYPE yamdb_request_duration_seconds histogram' in text
+        buckets = [
+            value for labels, value in samples(
+                text, 'request_duration_seconds_bucket'
+            ).items() if 'view="titles-list"' in labels
+        ]
+        assert len(buckets) == len(LATENCY_BUCKETS) + 1
+        assert buckets == sorted(buckets)
+        assert buckets[-1] == 3
+        responses = samples(text, 'responses_total')
+        assert [
+            value for labels, value in responses.items()
+            if 'view="titles-list"' in labels and 'status="2xx"' in labels
+        ] == [3]
+        assert [
+            value for labels, value in responses.items()
+            if 'view="titles-detail"' in labels
+        ] == [1]
+        queries = samples(text, 'db_queries_total')
+        assert any(
+            'view="titles-list"' in labels and value > 0
+            for labels, value in queries.items()
+        )
+        sizes = samples(text, 'response_bytes_total')
+        assert any(
+            'view="titles-list"' in labels and value > 0
+            for labels, value in sizes.items()
+        )
+
+    def test_permissions(self, api_client, db):
+        assert api_client.get(METRICS_URL).status_code == 401
+        user = User.objects.create(username='user', email='u@yamdb.fake')
+        api_client.force_authenticate(user=user)
+        assert api_client.get(METRICS_URL).status_code == 403
+
+    def test_no_extra_queries(self, api_client, titles, settings):
+        """Показатели не добавляют запросов к БД."""
+        queries = {}
+        for enabled in (False, True):
+            settings.REQUEST_METRICS = enabled
+            with CaptureQueriesContext(connection) as context:
+                assert api_client.get('/api/v1/titles/').status_code == 200
+            queries[enabled] = len(context)
+        assert queries[True] == queries[False]
+
+    @pytest.mark.benchmark
+    def test_overhead(self, api_client, titles, settings):
+        """Накладные расходы показателей - меньше 10%."""
+        def run():
+            started = time.perf_counter()
+            for _ in range(50):
+                api_client.get('/api/v1/titles/')
+            return time.perf_counter() - started
+
+        timings = {False: [], True: []}
+        for enabled in (False, True) * 3:
+            settings.REQUEST_METRICS = enabled
+            timings[enabled].append(run())
+        timings = {key: min(value) for key, value in timings.items()}
+        assert timings[True] < timings[False] * 1.1, (
+            f'50 запросов: без показателей {timings[False] * 1000:.0f} мс, '
+            f'с показателями {timings[True] * 1000:.0f} мс'
+        )
@@ -0,0 +1,127 @@
+import pytest
+from api.cache import get_stats
+from reviews.models import Category, Comment, Review, Title, User
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create(username='reader', email='reader@yamdb.fake')
+
+
+@pytest.fixture
+def titles(db):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    return [
+        Title.objects.create(name=f'Произведение {i}', year=2000,
+                             category=category)
+        for i in range(2)
+    ]
+
+
+@pytest.fixture(params=('locmem', 'filebased'))
+def cache_backend(request, settings, tmp_path):
+    backends = {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'yamdb-tests',
+        },
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }
+    settings.CACHES = {'default': backends[request.param]}
+    settings.RESPONSE_CACHE_TIMEOUT = 300
+
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response['X-Cache'], response.json()
+
+
+class TestResponseCache:
+
+    def test_hit_and_miss(self, api_client, cache_backend, titles):
+        assert get(api_client, '/api/v1/categories/')[0] == 'MISS'
+        assert get(api_client, '/api/v1/categories/')[0] == 'HIT'
+        assert get(api_client, '/api/v1/categories/?limit=1')[0] == 'MISS'
+        assert get_stats()['category-list'] == {'hit': 1, 'miss': 2}
+
+    def test_write_invalidates_dependent_keys(self, api_client,
+                                              cache_backend, titles, user):
+        first, second = titles
+        first_reviews = f'/api/v1/titles/{first.pk}/reviews/'
+        second_reviews = f'/api/v1/titles/{second.pk}/reviews/'
+        for url in (first_reviews, second_reviews, '/api/v1/titles/',
+                    f'/api/v1/titles/{first.pk}/', '/api/v1/genres/'):
+            get(api_client, url)
+
+        Review.objects.create(title=first, author=user, text='Отзыв',
+                              score=7)
+
+        status, data = get(api_client, first_reviews)
+        assert status == 'MISS'
+        assert data['count'] == 1
+        status, data = get(api_client, f'/api/v1/titles/{first.pk}/')
+        assert (status, data['rating']) == ('MISS', 7)
+        assert get(api_client, '/api/v1/titles/')[0] == 'MISS'
+        assert get(api_client, second_reviews)[0] == 'HIT'
+        assert get(api_client, '/api/v1/genres/')[0] == 'HIT'
+
+    def test_nested_resources(self, api_client, cache_backend, titles,
+                              user):
+        title = titles[0]
+        review = Review.objects.create(title=title, author=user,
+                                       text='Отзыв', score=5)
+        comments = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        get(api_client, comments)
+        get(api_client, f'/api/v1/titles/{title.pk}/')
+
+        Comment.objects.create(review=review, author=user, text='Коммент')
+        status, data = get(api_client, comments)
+        assert (status, data['count']) == ('MISS', 1)
+        assert get(api_client, f'/api/v1/titles/{title.pk}/')[0] == 'HIT'
+
+        Category.objects.update(name='Кино')
+        Category.objects.get().save()
+        status, data = get(api_client, f'/api/v1/titles/{title.pk}/')
+        assert (status, data['category']['name']) == ('MISS', 'Кино')
+
+    def test_authenticated_not_cached(self, api_client, cache_backend,
+                                      titles, user):
+        api_client.force_authenticate(user=user)
+        response = api_client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'X-Cache' not in response
+
+    def test_author_renamed(self, api_client, cache_backend, titles, user):
+        first, second = titles
+        other = User.objects.create(username='other', email='o@yamdb.fake')
+        review = Review.objects.create(title=first, author=user,
+                                       text='Отзыв', score=5)
+        Review.objects.create(title=second, author=other, text='Отзыв',
+                              score=5)
+        Comment.objects.create(review=review, author=other, text='Коммент')
+        urls = (
+            f'/api/v1/titles/{first.pk}/reviews/',
+            f'/api/v1/titles/{second.pk}/reviews/',
+            f'/api/v1/titles/{first.pk}/reviews/{review.pk}/comments/',
+        )
+        for url in urls:
+            get(api_client, url)
+
+        user.bio = 'Биография'
+        user.save()
+        assert [get(api_client, url)[0] for url in urls] == ['HIT'] * 3
+
+        user.username = 'writer'
+        user.save()
+        status, data = get(api_client, urls[0])
+        assert (status, data['results'][0]['author']) == ('MISS', 'writer')
+        assert [get(api_client, url)[0] for url in urls[1:]] == ['HIT'] * 2
+
+        User.objects.filter(pk=other.pk).update(username='critic')
+        assert [get(api_client, url)[0] for url in urls] == [
+            'HIT', 'MISS', 'MISS'
+        ]
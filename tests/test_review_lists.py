@@ -0,0 +1,75 @@
+import pytest
+from reviews.models import Comment, Review, Title, User
+
+AUTHORS_COUNT = 100
+# Проверка родителя, COUNT и выборка страницы.
+LIST_QUERIES = 3
+
+
+@pytest.fixture
+def authors(db):
+    User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(AUTHORS_COUNT)
+    )
+    return list(User.objects.order_by('pk'))
+
+
+@pytest.fixture
+def title(db):
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+@pytest.fixture
+def review(title, authors):
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text=f'Отзыв {author}', score=5)
+        for author in authors
+    )
+    review = Review.objects.order_by('pk').first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text=f'Комментарий {i}')
+        for i, author in enumerate(authors)
+    )
+    return review
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+
+
+class TestReviewLists:
+
+    @pytest.mark.parametrize('params', ('', '&compact=true', '&cursor='))
+    def test_reviews(self, api_client, title, review,
+                     django_assert_max_num_queries, params):
+        url = f'/api/v1/titles/{title.pk}/reviews/?limit={AUTHORS_COUNT}'
+        with django_assert_max_num_queries(LIST_QUERIES):
+            response = api_client.get(url + params)
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == AUTHORS_COUNT
+        expected = title.pk if 'compact' in params else title.name
+        assert {item['title'] for item in results} == {expected}
+        assert len({item['author'] for item in results}) == AUTHORS_COUNT
+
+    @pytest.mark.parametrize('params', ('', '&compact=true', '&cursor='))
+    def test_comments(self, api_client, title, review,
+                      django_assert_max_num_queries, params):
+        url = (f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+               f'?limit={AUTHORS_COUNT}')
+        with django_assert_max_num_queries(LIST_QUERIES):
+            response = api_client.get(url + params)
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == AUTHORS_COUNT
+        expected = review.pk if 'compact' in params else review.text
+        assert {item['review'] for item in results} == {expected}
+        assert len({item['author'] for item in results}) == AUTHORS_COUNT
+
+    def test_compact_shape(self, api_client, title, review):
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        full = api_client.get(url).json()
+        compact = api_client.get(url, {'compact': 'true'}).json()
+        assert compact == dict(full, title=title.pk)
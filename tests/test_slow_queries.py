@@ -0,0 +1,136 @@
+from io import StringIO
+
+import pytest
+from core.models import SlowQuery
+from core.slowlog import clear_recent, fingerprint
+from django.core.management import call_command
+from reviews.models import Category, Genre, GenreTitle, Title, User
+
+
+@pytest.fixture(autouse=True)
+def slow_log(settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    # Медленным считается любой запрос.
+    settings.SLOW_QUERY_THRESHOLD = 0.000001
+    clear_recent()
+    yield
+    clear_recent()
+
+
+@pytest.fixture
+def titles(db):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category)
+        for i in range(5)
+    )
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genre) for title in Title.objects.all()
+    )
+
+
+@pytest.fixture
+def admin_client(api_client, db):
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+    api_client.force_authenticate(user=admin)
+    return api_client
+
+
+def slow_queries(*args):
+    out = StringIO()
+    call_command('slow_queries', *args, stdout=out)
+    return out.getvalue()
+
+
+class TestSlowQueries:
+
+    def test_recorded(self, api_client, titles):
+        response = api_client.get('/api/v1/titles/?genre=drama')
+        assert response.status_code == 200
+        queries = list(SlowQuery.objects.order_by('id'))
+        assert queries
+        assert {query.view for query in queries} == {'titles-list'}
+        query = next(
+            query for query in queries if 'reviews_genretitle' in query.sql
+        )
+        assert query.sql.startswith('SELECT')
+        assert "'drama'" in query.params
+        assert query.duration > 0
+        assert query.fingerprint == fingerprint(query.sql)
+        # EXPLAIN QUERY PLAN на SQLite.
+        assert 'SCAN' in query.explain or 'SEARCH' in query.explain
+
+    def test_disabled(self, api_client, titles, settings):
+        settings.SLOW_QUERY_THRESHOLD = 0
+        api_client.get('/api/v1/titles/')
+        assert not SlowQuery.objects.exists()
+
+    def test_threshold(self, api_client, titles, settings):
+        settings.SLOW_QUERY_THRESHOLD = 60000
+        api_client.get('/api/v1/titles/')
+        assert not SlowQuery.objects.exists()
+
+    def test_no_explain_for_writes(self, admin_client, titles):
+        response = admin_client.post('/api/v1/categories/', {
+            'name': 'Книга', 'slug': 'book'
+        }, format='json')
+        assert response.status_code == 201
+        insert = SlowQuery.objects.get(sql__startswith='INSERT')
+        assert insert.view == 'category-list'
+        assert insert.explain == ''
+
+    def test_explain_disabled(self, api_client, titles, settings):
+        settings.SLOW_QUERY_EXPLAIN = False
+        api_client.get('/api/v1/titles/')
+        assert not SlowQuery.objects.exclude(explain='').exists()
+
+    def test_fingerprint(self):
+        assert fingerprint('SELECT 1 WHERE id IN (%s, %s)') == fingerprint(
+            'SELECT 1 WHERE id IN (%s, %s, %s)'
+        )
+        assert fingerprint('SELECT 1') != fingerprint('SELECT 2')
+
+    def test_recent(self, admin_client, titles):
+        admin_client.get('/api/v1/titles/')
+        response = admin_client.get('/api/v1/slow-queries/')
+        assert response.status_code == 200
+        recent = response.json()
+        assert recent
+        assert {'sql', 'params', 'duration', 'view', 'explain'} <= set(
+            recent[0]
+        )
+        # Новые первыми: последний - запрос к списку произведений.
+        assert recent[-1]['view'] == 'titles-list'
+
+    def test_recent_permissions(self, api_client, db):
+        assert api_client.get('/api/v1/slow-queries/').status_code == 401
+
+    def test_command(self, db):
+        for sql, view, durations in (
+            ('SELECT a', 'titles-list', (5, 6, 9)),
+            ('SELECT b', 'genres-list', (20,)),
+            ('SELECT c', 'titles-detail', (1,)),
+            ('SELECT a', 'titles-detail', (2,)),
+        ):
+            SlowQuery.objects.bulk_create(
+                SlowQuery(sql=sql, view=view, database='default',
+                          fingerprint=fingerprint(sql), duration=duration,
+                          explain='SCAN reviews_title')
+                for duration in durations
+            )
+        report = slow_queries('--limit=2', '--explain').splitlines()
+        assert report == [
+            '1. 22.0 мс всего, 4 раз, в среднем 5.5 мс, максимум 9.0 мс; '
+            'view: titles-detail, titles-list',
+            '   SELECT a',
+            '   | SCAN reviews_title',
+            '2. 20.0 мс всего, 1 раз, в среднем 20.0 мс, максимум 20.0 мс; '
+            'view: genres-list',
+            '   SELECT b',
+            '   | SCAN reviews_title',
+        ]
+        assert 'Удалено записей: 6' in slow_queries('--clear')
+        assert slow_queries() == 'Журнал медленных запросов пуст\n'
@@ -0,0 +1,129 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, GenreTitle, Title, User
+
+URL = '/api/v1/titles/batch/'
+BATCH_SIZE = 200
+# Категории, жанры, вставки произведений (на SQLite - по 999 параметров,
+# 4 запроса) и жанров, ответ (2 запроса) и SAVEPOINT/RELEASE транзакций.
+BATCH_QUERIES = 12
+
+
+@pytest.fixture
+def admin_client(api_client, db):
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+    api_client.force_authenticate(user=admin)
+    return api_client
+
+
+@pytest.fixture
+def catalog(db):
+    Category.objects.create(name='Фильм', slug='movie')
+    Category.objects.create(name='Книга', slug='book')
+    for slug in ('drama', 'comedy', 'rock'):
+        Genre.objects.create(name=slug.title(), slug=slug)
+
+
+def item(i, category='movie', genre=('drama', 'comedy')):
+    return {
+        'name': f'Произведение {i}',
+        'year': 2000,
+        'category': category,
+        'genre': list(genre),
+        'description': f'Описание {i}',
+    }
+
+
+class TestTitleBatch:
+
+    def test_create(self, admin_client, catalog,
+                    django_assert_max_num_queries):
+        data = [item(i) for i in range(BATCH_SIZE)]
+        data[1] = item(1, category='book', genre=('rock', 'rock'))
+        data[2] = item(2, genre=())
+        with django_assert_max_num_queries(BATCH_QUERIES):
+            response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 201
+        results = response.json()
+        assert len(results) == BATCH_SIZE
+        assert [title['name'] for title in results] == [
+            title['name'] for title in data
+        ]
+        assert results[1]['category'] == {'name': 'Книга', 'slug': 'book'}
+        assert results[1]['genre'] == [{'name': 'Rock', 'slug': 'rock'}]
+        assert results[2]['genre'] == []
+        assert Title.objects.count() == BATCH_SIZE
+        assert GenreTitle.objects.count() == (BATCH_SIZE - 2) * 2 + 1
+        title = Title.objects.get(pk=results[0]['id'])
+        assert title.name == 'Произведение 0'
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ]
+
+    def test_list_cache_invalidated(self, admin_client, catalog):
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 0
+        admin_client.post(URL, [item(0)], format='json')
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 1
+
+    def test_item_errors(self, admin_client, catalog):
+        data = [
+            item(0),
+            item(1, category='cartoon'),
+            {**item(2), 'year': 3000},
+            item(3, genre=('drama', 'jazz', 'blues')),
+            {'name': 'Без категории', 'year': 2000, 'genre': []},
+        ]
+        response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == len(data)
+        assert errors[0] == {}
+        assert set(errors[2]) == {'year'}
+        assert set(errors[4]) == {'category'}
+        assert Title.objects.count() == 0
+        data = [data[0], data[1], data[3]]
+        errors = admin_client.post(URL, data, format='json').json()
+        assert errors[0] == {}
+        assert 'cartoon' in errors[1]['category'][0]
+        assert len(errors[2]['genre']) == 2
+        assert Title.objects.count() == 0
+
+    @pytest.mark.parametrize('data', ({}, 'titles', []))
+    def test_not_a_list(self, admin_client, catalog, data):
+        response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 400
+        assert Title.objects.count() == 0
+
+    def test_max_size(self, admin_client, catalog, settings):
+        settings.TITLE_BATCH_MAX_SIZE = 2
+        data = [item(i) for i in range(3)]
+        response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 400
+        assert Title.objects.count() == 0
+
+    def test_permissions(self, api_client, catalog):
+        response = api_client.post(URL, [item(0)], format='json')
+        assert response.status_code == 401
+        user = User.objects.create(username='user', email='u@yamdb.fake')
+        api_client.force_authenticate(user=user)
+        response = api_client.post(URL, [item(0)], format='json')
+        assert response.status_code == 403
+
+    def test_queries_do_not_grow(self, admin_client, catalog,
+                                 django_assert_max_num_queries):
+        """Запросов на пакет - не больше BATCH_QUERIES при любом размере."""
+        data = [item(i) for i in range(10)]
+        with CaptureQueriesContext(connection) as single:
+            for title in data:
+                response = admin_client.post('/api/v1/titles/', title,
+                                             format='json')
+                assert response.status_code == 201
+        assert len(single) > len(data) * 2
+        for size in (1, len(data), BATCH_SIZE):
+            data = [item(i) for i in range(size)]
+            with django_assert_max_num_queries(BATCH_QUERIES):
+                response = admin_client.post(URL, data, format='json')
+            assert response.status_code == 201
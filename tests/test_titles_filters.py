@@ -0,0 +1,51 @@
+import pytest
+from reviews.models import Category, Genre, GenreTitle, Title
+
+
+@pytest.fixture
+def catalog(db):
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    Genre.objects.create(name='Рок', slug='rock')
+    titles = {
+        'drama': (movie, (drama,)),
+        'comedy': (movie, (comedy,)),
+        'dramedy': (book, (drama, comedy)),
+        'none': (None, ()),
+    }
+    for name, (category, genres) in titles.items():
+        title = Title.objects.create(name=name, year=2000, category=category)
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title=title, genre=genre) for genre in genres
+        )
+
+
+def names(client, query):
+    response = client.get(f'/api/v1/titles/?{query}')
+    assert response.status_code == 200
+    data = response.json()
+    result = [item['name'] for item in data['results']]
+    assert data['count'] == len(result), 'Проверьте, что строки не дублируются'
+    return sorted(result)
+
+
+class TestTitleFilters:
+
+    @pytest.mark.parametrize('query, expected', (
+        ('category=movie', ['comedy', 'drama']),
+        ('category=movie,book', ['comedy', 'drama', 'dramedy']),
+        ('category=mov', []),
+        ('category__icontains=mov', ['comedy', 'drama']),
+        ('genre=drama', ['drama', 'dramedy']),
+        ('genre=drama,comedy', ['comedy', 'drama', 'dramedy']),
+        ('genre=rock', []),
+        ('genre__all=drama,comedy', ['dramedy']),
+        ('genre__all=drama,drama', ['drama', 'dramedy']),
+        ('genre__all=drama,rock', []),
+        ('genre__icontains=dram', ['drama', 'dramedy']),
+        ('genre=drama,comedy&category=book', ['dramedy']),
+    ))
+    def test_slug_filters(self, api_client, catalog, query, expected):
+        assert names(api_client, query) == expected
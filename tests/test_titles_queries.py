@@ -0,0 +1,63 @@
+import pytest
+from reviews.models import Category, Genre, GenreTitle, Title
+
+TITLES_COUNT = 600
+# С запросом к очереди удаления: категории и жанры в ней скрыты.
+LIST_QUERIES = 4
+RETRIEVE_QUERIES = 3
+
+
+@pytest.fixture
+def titles(db):
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(4)
+    )
+    categories = list(Category.objects.order_by('pk'))
+    Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {i}',
+            year=2000,
+            category=categories[i % len(categories)],
+        )
+        for i in range(TITLES_COUNT)
+    )
+    genre_ids = [genre.pk for genre in Genre.objects.all()]
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title_id=title_id, genre_id=genre_id)
+        for title_id in Title.objects.values_list('pk', flat=True)
+        for genre_id in genre_ids[:title_id % len(genre_ids) + 1]
+    )
+    return Title.objects.order_by('pk')
+
+
+class TestTitleQueries:
+
+    @pytest.mark.parametrize('limit', (10, 500))
+    @pytest.mark.parametrize('query', (
+        '',
+        '&genre=genre-0',
+        '&category=category-1',
+        '&year=2000&name=Произведение',
+    ))
+    def test_list_queries(self, api_client, titles,
+                          django_assert_num_queries, limit, query):
+        with django_assert_num_queries(LIST_QUERIES):
+            response = api_client.get(f'/api/v1/titles/?limit={limit}{query}')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert results, 'Проверьте, что фильтр возвращает произведения'
+        assert all(item['category'] for item in results)
+        assert all(item['genre'] for item in results)
+
+    @pytest.mark.parametrize('limit', (10, 500))
+    def test_retrieve_queries(self, api_client, titles,
+                              django_assert_num_queries, limit):
+        for title in titles[:limit]:
+            with django_assert_num_queries(RETRIEVE_QUERIES):
+                response = api_client.get(f'/api/v1/titles/{title.pk}/')
+            assert response.status_code == 200
+            assert response.json()['genre']
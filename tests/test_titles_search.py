@@ -0,0 +1,120 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from reviews.models import Category, Genre, Title, User
+from reviews.search import SQLITE_FTS_TABLE, search_titles
+
+
+@pytest.fixture
+def admin_client(api_client, db):
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+    api_client.force_authenticate(user=admin)
+    return api_client
+
+
+@pytest.fixture
+def catalog(db):
+    Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.create(name='Драма', slug='drama')
+    Title.objects.bulk_create(
+        Title(name=name, year=1994) for name in (
+            'Побег из Шоушенка',
+            'Побег из Шоушенка: документальный фильм о побеге',
+            'Крестный отец',
+        )
+    )
+
+
+def trigger_names():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'reviews_title'"
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def titles_found(text):
+    return [title.name for title in search_titles(Title.objects.all(), text)]
+
+
+def search(client, text):
+    response = client.get('/api/v1/titles/', {'search': text})
+    assert response.status_code == 200
+    return [item['name'] for item in response.json()['results']]
+
+
+class TestTitleSearch:
+
+    def test_prefix_search(self, api_client, catalog):
+        assert sorted(search(api_client, 'шоушен')) == [
+            'Побег из Шоушенка',
+            'Побег из Шоушенка: документальный фильм о побеге',
+        ]
+        assert search(api_client, 'Крестный ОТЕЦ') == ['Крестный отец']
+        assert search(api_client, 'матрица') == []
+        assert search(api_client, '"*()') == []
+
+    def test_index_follows_writes(self, admin_client, catalog):
+        response = admin_client.post('/api/v1/titles/', {
+            'name': 'Зелёная миля',
+            'year': 1999,
+            'category': 'movie',
+            'genre': ['drama'],
+        })
+        assert response.status_code == 201
+        title_id = response.json()['id']
+        assert search(admin_client, 'миля') == ['Зелёная миля']
+
+        admin_client.patch(f'/api/v1/titles/{title_id}/', {'name': 'Мгла'})
+        assert search(admin_client, 'миля') == []
+        assert search(admin_client, 'мгла') == ['Мгла']
+
+        admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert search(admin_client, 'мгла') == []
+
+    def test_index_created_by_migration(self, db):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name LIKE %s",
+                (f'{SQLITE_FTS_TABLE}%',)
+            )
+            names = {row[0] for row in cursor.fetchall()}
+        assert {
+            SQLITE_FTS_TABLE, f'{SQLITE_FTS_TABLE}_insert',
+            f'{SQLITE_FTS_TABLE}_delete', f'{SQLITE_FTS_TABLE}_update',
+        } <= names
+
+    @pytest.mark.django_db(transaction=True)
+    def test_triggers_restored_after_alter_field(self, catalog):
+        """
+        AlterField на SQLite пересоздаёт reviews_title без триггеров,
+        migrate создаёт их заново и перестраивает индекс.
+        """
+        field = Title._meta.get_field('year')
+        altered = field.clone()
+        altered.set_attributes_from_name('year')
+        with connection.schema_editor() as editor:
+            editor.alter_field(Title, field, altered)
+        assert not trigger_names()
+        Title.objects.create(name='Зелёная миля', year=1999)
+
+        call_command('migrate', verbosity=0)
+        assert len(trigger_names()) == 3
+        Title.objects.create(name='Бойцовский клуб', year=1999)
+        assert titles_found('миля') == ['Зелёная миля']
+        assert titles_found('клуб') == ['Бойцовский клуб']
+
+    def test_cursor_rejected(self, api_client, catalog):
+        response = api_client.get(
+            '/api/v1/titles/', {'search': 'побег', 'cursor': ''}
+        )
+        assert response.status_code == 400
+        assert 'cursor' in response.json()
+        response = api_client.get(
+            '/api/v1/titles/', {'search': 'побег', 'limit': 1, 'offset': 1}
+        )
+        assert response.status_code == 200
+        assert response.json()['count'] == 2
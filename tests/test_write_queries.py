@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+
+import pytest
+from api.serializers import ReviewSerializer
+from django.db import IntegrityError
+from rest_framework.serializers import ModelSerializer
+from reviews.models import Category, Comment, Review, Title, User
+
+# Запросы в тестах включают SAVEPOINT/RELEASE: тест выполняется
+# в транзакции, поэтому atomic() создаёт точку сохранения.
+# Запись отзыва читает рейтинг произведения для рейтингов лучших
+# (reviews.ranking); удаление ещё и исключает его из них.
+REVIEW_CREATE_QUERIES = 6
+# Повтор: ещё запрос на существование отзыва после IntegrityError.
+REVIEW_DUPLICATE_QUERIES = 6
+REVIEW_UPDATE_QUERIES = 4
+REVIEW_DELETE_QUERIES = 6
+COMMENT_CREATE_QUERIES = 2
+COMMENT_UPDATE_QUERIES = 2
+COMMENT_DELETE_QUERIES = 2
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create(username='author', email='a@yamdb.fake')
+
+
+@pytest.fixture
+def title(db):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    return Title.objects.create(name='Произведение', year=2000,
+                                category=category)
+
+
+@pytest.fixture
+def client(api_client, author):
+    api_client.force_authenticate(user=author)
+    return api_client
+
+
+@pytest.fixture
+def review(title, author):
+    return Review.objects.create(title=title, author=author, text='Отзыв',
+                                 score=5)
+
+
+class TestReviewWriteQueries:
+
+    def test_create(self, client, title, django_assert_num_queries):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        with django_assert_num_queries(REVIEW_CREATE_QUERIES):
+            response = client.post(url, {'text': 'Отзыв', 'score': 8})
+        assert response.status_code == 201
+        assert response.json()['title'] == title.name
+        assert response.json()['author'] == 'author'
+
+        with django_assert_num_queries(REVIEW_DUPLICATE_QUERIES):
+            response = client.post(url, {'text': 'Ещё отзыв', 'score': 3})
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Отзыв уже был ранее']
+        }
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (8, 1)
+
+    def test_other_integrity_error(self, title, author, monkeypatch):
+        def create(self, validated_data):
+            raise IntegrityError('NOT NULL constraint failed')
+        monkeypatch.setattr(ModelSerializer, 'create', create)
+        serializer = ReviewSerializer(
+            data={'text': 'Отзыв', 'score': 8},
+            context={'request': SimpleNamespace(user=author)},
+        )
+        assert serializer.is_valid()
+        with pytest.raises(IntegrityError):
+            serializer.save(title=title, author=author)
+
+    def test_update_and_delete(self, client, title, review,
+                               django_assert_num_queries):
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        with django_assert_num_queries(REVIEW_UPDATE_QUERIES):
+            response = client.patch(url, {'score': 9})
+        assert response.status_code == 200
+        with django_assert_num_queries(REVIEW_DELETE_QUERIES):
+            response = client.delete(url)
+        assert response.status_code == 204
+        title.refresh_from_db()
+        assert title.rating_count == 0
+
+    def test_missing_title(self, client, review):
+        response = client.post('/api/v1/titles/0/reviews/',
+                               {'text': 'Отзыв', 'score': 8})
+        assert response.status_code == 404
+        response = client.patch(f'/api/v1/titles/0/reviews/{review.pk}/',
+                                {'score': 9})
+        assert response.status_code == 404
+        assert client.get('/api/v1/titles/0/reviews/').status_code == 404
+
+
+class TestCommentWriteQueries:
+
+    def test_create_update_delete(self, client, title, review,
+                                  django_assert_num_queries):
+        url = f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        with django_assert_num_queries(COMMENT_CREATE_QUERIES):
+            response = client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 201
+        assert response.json()['review'] == review.text
+        url = f'{url}{response.json()["id"]}/'
+        with django_assert_num_queries(COMMENT_UPDATE_QUERIES):
+            response = client.patch(url, {'text': 'Исправлено'})
+        assert response.status_code == 200
+        with django_assert_num_queries(COMMENT_DELETE_QUERIES):
+            response = client.delete(url)
+        assert response.status_code == 204
+        assert not Comment.objects.exists()
+
+    def test_review_of_other_title(self, client, review):
+        other = Title.objects.create(name='Другое', year=2001)
+        url = f'/api/v1/titles/{other.pk}/reviews/{review.pk}/comments/'
+        assert client.post(url, {'text': 'Комментарий'}).status_code == 404
+        assert client.get(url).status_code == 404